@@ -9,6 +9,10 @@ evaluation of unnecessary square roots.
 Module
 ------
     fdist
-        Contains _fdist and _fdist2 for fast distance calculations
+        Contains dist and dist2 for fast distance calculations between two
+        points, as well as array kernels which work on whole numpy arrays
+        without copying them: dist_set and dist2_set (point to set of points),
+        dist_mat and dist2_mat (distance matrices) and cutoff_pairs (pairs of
+        points closer than a cutoff)
 """
 #from fromage.fdist import fdist
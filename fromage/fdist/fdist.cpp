@@ -13,3 +13,148 @@ double dist(double x1, double y1, double z1, double x2, double y2, double z2) {
         return di;
 
 }
+
+/* The array kernels return 0, or -1 without writing anything if an array is
+ * too short for the amount of points in the others */
+
+/* Squared distances from one point to each of a set of points */
+int c_dist2_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out) {
+        long long n_pos = len_pos / 3;
+        if (len_point < 3 || n_pos > len_out) {
+                return -1;
+        }
+        for (long long i = 0; i < n_pos; i++) {
+                out[i] = dist2(point[0], point[1], point[2], pos[3*i], pos[3*i+1], pos[3*i+2]);
+        }
+        return 0;
+}
+
+/* Distances from one point to each of a set of points */
+int c_dist_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out) {
+        if (c_dist2_set(point, len_point, pos, len_pos, out, len_out) != 0) {
+                return -1;
+        }
+        long long n_pos = len_pos / 3;
+        for (long long i = 0; i < n_pos; i++) {
+                out[i] = sqrt(out[i]);
+        }
+        return 0;
+}
+
+/* Squared distance matrix between two sets of points, row-major */
+int c_dist2_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out) {
+        long long n_a = len_a / 3;
+        long long n_b = len_b / 3;
+        if (n_a * n_b > len_out) {
+                return -1;
+        }
+        for (long long i = 0; i < n_a; i++) {
+                c_dist2_set(pos_a + 3*i, 3, pos_b, len_b, out + i*n_b, n_b);
+        }
+        return 0;
+}
+
+/* Distance matrix between two sets of points, row-major */
+int c_dist_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out) {
+        if (c_dist2_mat(pos_a, len_a, pos_b, len_b, out, len_out) != 0) {
+                return -1;
+        }
+        long long n_out = (len_a / 3) * (len_b / 3);
+        for (long long i = 0; i < n_out; i++) {
+                out[i] = sqrt(out[i]);
+        }
+        return 0;
+}
+
+/* Pairs (i, j) of points such that the distance minus rad_a[i] and rad_b[j]
+ * is at most cutoff. If half is not 0, the two sets are the same and only
+ * j > i is considered. The pairs are written up to the capacity len_dd of the
+ * output and the total amount of pairs is returned, or -1 if there are fewer
+ * radii than points */
+long long c_cutoff_pairs(const double *pos_a, long long len_a, const double *rad_a, long long len_rad_a,
+                         const double *pos_b, long long len_b, const double *rad_b, long long len_rad_b,
+                         double cutoff, int half,
+                         long long *ii, long long len_ii, long long *jj, long long len_jj,
+                         double *dd, long long len_dd) {
+        long long n_a = len_a / 3;
+        long long n_b = len_b / 3;
+        if (len_rad_a < n_a || len_rad_b < n_b) {
+                return -1;
+        }
+        long long found = 0;
+        for (long long i = 0; i < n_a; i++) {
+                long long j_start = half ? i + 1 : 0;
+                for (long long j = j_start; j < n_b; j++) {
+                        double d = dist(pos_a[3*i], pos_a[3*i+1], pos_a[3*i+2],
+                                        pos_b[3*j], pos_b[3*j+1], pos_b[3*j+2]);
+                        if (d - rad_a[i] - rad_b[j] <= cutoff) {
+                                if (found < len_dd && found < len_ii && found < len_jj) {
+                                        ii[found] = i;
+                                        jj[found] = j;
+                                        dd[found] = d;
+                                }
+                                found++;
+                        }
+                }
+        }
+        return found;
+}
+
+/* Set the value of each grid point to 1 if the closest atom is in the molecule
+ * and 0 otherwise. The squared distance to each atom is multiplied by its
+ * weight before comparing. Ties go to the molecule */
+int c_grid_proximity(double *grid, long long len_grid, const double *mol_pos, long long len_mol,
+                     const double *mol_w, long long len_mol_w, const double *rest_pos, long long len_rest,
+                     const double *rest_w, long long len_rest_w) {
+        long long n_points = len_grid / 4;
+        long long n_mol = len_mol / 3;
+        long long n_rest = len_rest / 3;
+        if (len_mol_w < n_mol || len_rest_w < n_rest) {
+                return -1;
+        }
+#pragma omp parallel for schedule(static)
+        for (long long p = 0; p < n_points; p++) {
+                double *point = grid + 4 * p;
+                double min_dist2 = HUGE_VAL;
+                int close_to_mol = 0;
+                for (long long i = 0; i < n_mol; i++) {
+                        double r = dist2(point[0], point[1], point[2], mol_pos[3*i], mol_pos[3*i+1], mol_pos[3*i+2]) * mol_w[i];
+                        if (r < min_dist2) {
+                                min_dist2 = r;
+                                close_to_mol = 1;
+                        }
+                }
+                for (long long j = 0; j < n_rest; j++) {
+                        double r = dist2(point[0], point[1], point[2], rest_pos[3*j], rest_pos[3*j+1], rest_pos[3*j+2]) * rest_w[j];
+                        if (r < min_dist2) {
+                                min_dist2 = r;
+                                close_to_mol = 0;
+                        }
+                }
+                point[3] = close_to_mol;
+        }
+        return 0;
+}
+
+/* Set the value of each grid point to 1 if it is closer to an atom than the
+ * square root of rad2 of that atom and 0 otherwise */
+int c_grid_vdw(double *grid, long long len_grid, const double *pos, long long len_pos,
+               const double *rad2, long long len_rad2) {
+        long long n_points = len_grid / 4;
+        long long n_pos = len_pos / 3;
+        if (len_rad2 < n_pos) {
+                return -1;
+        }
+#pragma omp parallel for schedule(static)
+        for (long long p = 0; p < n_points; p++) {
+                double *point = grid + 4 * p;
+                point[3] = 0;
+                for (long long i = 0; i < n_pos; i++) {
+                        if (dist2(point[0], point[1], point[2], pos[3*i], pos[3*i+1], pos[3*i+2]) < rad2[i]) {
+                                point[3] = 1;
+                                break;
+                        }
+                }
+        }
+        return 0;
+}
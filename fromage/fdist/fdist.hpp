@@ -3,4 +3,25 @@
 
 double dist2(double x1, double y1, double z1, double x2, double y2, double z2);
 double dist(double x1, double y1, double z1, double x2, double y2, double z2);
+
+/* Array kernels. Coordinates are flat C arrays x1 y1 z1 x2 y2 z2 etc. and the
+ * lengths are amounts of doubles, as handed over by the buffer protocol. They
+ * return 0, or -1 if an array is too short */
+int c_dist2_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out);
+int c_dist_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out);
+int c_dist2_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out);
+int c_dist_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out);
+long long c_cutoff_pairs(const double *pos_a, long long len_a, const double *rad_a, long long len_rad_a,
+                         const double *pos_b, long long len_b, const double *rad_b, long long len_rad_b,
+                         double cutoff, int half,
+                         long long *ii, long long len_ii, long long *jj, long long len_jj,
+                         double *dd, long long len_dd);
+
+/* Grid kernels. The grid is a flat array of rows x y z value and the value
+ * column is overwritten. They are threaded with OpenMP when available */
+int c_grid_proximity(double *grid, long long len_grid, const double *mol_pos, long long len_mol,
+                     const double *mol_w, long long len_mol_w, const double *rest_pos, long long len_rest,
+                     const double *rest_w, long long len_rest_w);
+int c_grid_vdw(double *grid, long long len_grid, const double *pos, long long len_pos,
+               const double *rad2, long long len_rad2);
 #endif /* FDIST_HPP */
@@ -4,8 +4,276 @@
 %{
 
 #define SWIG_FILE_WITH_INIT
+#include <string.h>
 #include "fdist.hpp"
 %}
 
+/* The array kernels read and write numpy arrays (or anything else with the
+ * buffer protocol) in place. The arrays must be C-contiguous */
+
+%define %fdist_buffer(CTYPE, FORMATS, FLAGS)
+%typemap(in) (CTYPE *BUFFER, long long LENGTH) (Py_buffer view) {
+    if (PyObject_GetBuffer($input, &view, FLAGS | PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) != 0) {
+        SWIG_fail;
+    }
+    if (view.itemsize != sizeof(CTYPE) || view.format == NULL ||
+        strchr(FORMATS, view.format[strlen(view.format) - 1]) == NULL) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_TypeError, "Expected a contiguous array of " #CTYPE);
+        SWIG_fail;
+    }
+    $1 = ($1_ltype) view.buf;
+    $2 = (long long) (view.len / sizeof(CTYPE));
+}
+%typemap(freearg) (CTYPE *BUFFER, long long LENGTH) {
+    /* $1 is only set once the buffer is held */
+    if ($1 != NULL) {
+        PyBuffer_Release(&view$argnum);
+    }
+}
+%enddef
+
+%fdist_buffer(const double, "d", PyBUF_SIMPLE)
+%fdist_buffer(double, "d", PyBUF_WRITABLE)
+%fdist_buffer(long long, "lq", PyBUF_WRITABLE)
+
+%apply (const double *BUFFER, long long LENGTH) {
+    (const double *point, long long len_point), (const double *pos, long long len_pos),
+    (const double *pos_a, long long len_a), (const double *pos_b, long long len_b),
+    (const double *rad_a, long long len_rad_a), (const double *rad_b, long long len_rad_b),
+    (const double *mol_pos, long long len_mol), (const double *mol_w, long long len_mol_w),
+    (const double *rest_pos, long long len_rest), (const double *rest_w, long long len_rest_w),
+    (const double *rad2, long long len_rad2)
+};
+%apply (double *BUFFER, long long LENGTH) {
+    (double *out, long long len_out), (double *dd, long long len_dd),
+    (double *grid, long long len_grid)
+};
+
+/* The array kernels do not touch Python objects so other Python threads can
+ * run while they work */
+%define %fdist_release_gil(FUNC)
+%exception FUNC {
+    Py_BEGIN_ALLOW_THREADS
+    $action
+    Py_END_ALLOW_THREADS
+}
+%enddef
+
+%fdist_release_gil(c_dist2_set)
+%fdist_release_gil(c_dist_set)
+%fdist_release_gil(c_dist2_mat)
+%fdist_release_gil(c_dist_mat)
+%fdist_release_gil(c_cutoff_pairs)
+%fdist_release_gil(c_grid_proximity)
+%fdist_release_gil(c_grid_vdw)
+%apply (long long *BUFFER, long long LENGTH) {
+    (long long *ii, long long len_ii), (long long *jj, long long len_jj)
+};
+
 double dist2(double x1, double y1, double z1, double x2, double y2, double z2);
 double dist(double x1, double y1, double z1, double x2, double y2, double z2);
+
+int c_dist2_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out);
+int c_dist_set(const double *point, long long len_point, const double *pos, long long len_pos, double *out, long long len_out);
+int c_dist2_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out);
+int c_dist_mat(const double *pos_a, long long len_a, const double *pos_b, long long len_b, double *out, long long len_out);
+long long c_cutoff_pairs(const double *pos_a, long long len_a, const double *rad_a, long long len_rad_a,
+                         const double *pos_b, long long len_b, const double *rad_b, long long len_rad_b,
+                         double cutoff, int half,
+                         long long *ii, long long len_ii, long long *jj, long long len_jj,
+                         double *dd, long long len_dd);
+int c_grid_proximity(double *grid, long long len_grid, const double *mol_pos, long long len_mol,
+                     const double *mol_w, long long len_mol_w, const double *rest_pos, long long len_rest,
+                     const double *rest_w, long long len_rest_w);
+int c_grid_vdw(double *grid, long long len_grid, const double *pos, long long len_pos,
+               const double *rad2, long long len_rad2);
+
+%pythoncode %{
+import numpy as _np
+
+
+def _coords(pos):
+    """Return an N x 3 C-contiguous float array, without copying if possible"""
+    return _np.ascontiguousarray(pos, dtype=_np.float64).reshape((-1, 3))
+
+
+def _check(status):
+    """Raise ValueError if a kernel found an array too short"""
+    if status < 0:
+        raise ValueError("An array is too short for the amount of points")
+    return status
+
+
+def dist2_set(point, pos):
+    """
+    Return the squared distances from a point to each of a set of points
+
+    Parameters
+    ----------
+    point : 3 x 1 array-like
+        The reference point
+    pos : N x 3 array-like
+        The set of points
+    Returns
+    -------
+    out : N x 1 numpy array
+        Squared distances
+
+    """
+    point = _coords(point)
+    pos = _coords(pos)
+    out = _np.empty(len(pos))
+    _check(c_dist2_set(point, pos, out))
+    return out
+
+
+def dist_set(point, pos):
+    """Return the distances from a point to each of a set of points"""
+    point = _coords(point)
+    pos = _coords(pos)
+    out = _np.empty(len(pos))
+    _check(c_dist_set(point, pos, out))
+    return out
+
+
+def dist2_mat(pos_a, pos_b=None):
+    """
+    Return the matrix of squared distances between two sets of points
+
+    Parameters
+    ----------
+    pos_a : N x 3 array-like
+        The first set of points
+    pos_b : M x 3 array-like or None
+        The second set of points. If None, the full matrix of pos_a
+    Returns
+    -------
+    out : N x M numpy array
+        Squared distances between pos_a[i] and pos_b[j]
+
+    """
+    pos_a = _coords(pos_a)
+    pos_b = pos_a if pos_b is None else _coords(pos_b)
+    out = _np.empty((len(pos_a), len(pos_b)))
+    _check(c_dist2_mat(pos_a, pos_b, out))
+    return out
+
+
+def dist_mat(pos_a, pos_b=None):
+    """Return the matrix of distances between two sets of points"""
+    pos_a = _coords(pos_a)
+    pos_b = pos_a if pos_b is None else _coords(pos_b)
+    out = _np.empty((len(pos_a), len(pos_b)))
+    _check(c_dist_mat(pos_a, pos_b, out))
+    return out
+
+
+def cutoff_pairs(pos_a, cutoff, pos_b=None, rad_a=None, rad_b=None):
+    """
+    Return the pairs of points closer than a cutoff
+
+    The distance of a pair can be reduced by a radius for each point, for
+    example to measure the distance between covalent spheres.
+
+    Parameters
+    ----------
+    pos_a : N x 3 array-like
+        The first set of points
+    cutoff : float
+        Maximum distance minus radii of a pair
+    pos_b : M x 3 array-like or None
+        The second set of points. If None, the pairs i < j of pos_a
+    rad_a, rad_b : N x 1 and M x 1 array-likes or None
+        The radii of the points. If None, zero
+    Returns
+    -------
+    ii, jj : numpy arrays of ints
+        Indices of the pairs in pos_a and pos_b
+    dd : numpy array of floats
+        Distance between the centres of each pair
+
+    """
+    half = pos_b is None
+    pos_a = _coords(pos_a)
+    if half:
+        pos_b = pos_a
+        rad_b = rad_a
+    else:
+        pos_b = _coords(pos_b)
+    if rad_a is None:
+        rad_a = _np.zeros(len(pos_a))
+    if rad_b is None:
+        rad_b = _np.zeros(len(pos_b))
+    rad_a = _np.ascontiguousarray(rad_a, dtype=_np.float64)
+    rad_b = _np.ascontiguousarray(rad_b, dtype=_np.float64)
+
+    # guess the amount of pairs and try again if there are more
+    cap = 8 * max(len(pos_a), len(pos_b), 1)
+    while True:
+        ii = _np.empty(cap, dtype=_np.int64)
+        jj = _np.empty(cap, dtype=_np.int64)
+        dd = _np.empty(cap)
+        n_pairs = _check(c_cutoff_pairs(pos_a, rad_a, pos_b, rad_b, float(cutoff),
+                                        int(half), ii, jj, dd))
+        if n_pairs <= cap:
+            return ii[:n_pairs], jj[:n_pairs], dd[:n_pairs]
+        cap = n_pairs
+
+
+def _weights(weights, n_at):
+    """Return a float array of weights, ones if None"""
+    if weights is None:
+        return _np.ones(n_at)
+    return _np.ascontiguousarray(weights, dtype=_np.float64)
+
+
+def grid_proximity(grid, mol_pos, rest_pos, mol_weights=None, rest_weights=None):
+    """
+    Mark the points of a grid which are closest to a molecule
+
+    The fourth column of the grid becomes 1 if the closest atom to the point
+    is in the molecule and 0 if it is one of the rest. The squared distances
+    are multiplied by the weight of each atom before comparing. The points are
+    shared out between OpenMP threads and the GIL is released.
+
+    Parameters
+    ----------
+    grid : N x 4 C-contiguous numpy array of floats
+        Rows of x y z value. Modified in place
+    mol_pos, rest_pos : M x 3 and L x 3 array-likes
+        Positions of the atoms of the molecule and of the rest
+    mol_weights, rest_weights : M x 1 and L x 1 array-likes or None
+        Weights of each atom. If None, 1
+
+    """
+    mol_pos = _coords(mol_pos)
+    rest_pos = _coords(rest_pos)
+    _check(c_grid_proximity(grid, mol_pos, _weights(mol_weights, len(mol_pos)),
+                            rest_pos, _weights(rest_weights, len(rest_pos))))
+    return
+
+
+def grid_vdw(grid, pos, rad):
+    """
+    Mark the points of a grid which are inside spheres
+
+    The fourth column of the grid becomes 1 if the point is inside the sphere
+    of radius rad[i] around pos[i] for any i and 0 otherwise. The points are
+    shared out between OpenMP threads and the GIL is released.
+
+    Parameters
+    ----------
+    grid : N x 4 C-contiguous numpy array of floats
+        Rows of x y z value. Modified in place
+    pos : M x 3 array-like
+        Centres of the spheres
+    rad : M x 1 array-like
+        Radii of the spheres
+
+    """
+    pos = _coords(pos)
+    rad2 = _np.ascontiguousarray(rad, dtype=_np.float64)**2
+    _check(c_grid_vdw(grid, pos, rad2))
+    return
+%}
@@ -0,0 +1,266 @@
+# This file was automatically generated by SWIG (https://www.swig.org).
+# Version 4.5.1
+#
+# Do not make changes to this file unless you know what you are doing - modify
+# the SWIG interface file instead.
+
+import typing
+# Import the low-level C/C++ module
+if getattr(globals().get("__spec__"), "parent", None) or __package__ or "." in __name__:
+    from . import _fdist
+else:
+    import _fdist
+
+import builtins as __builtin__
+
+def _swig_repr(self):
+    try:
+        strthis = "proxy of " + self.this.__repr__()
+    except __builtin__.Exception:
+        strthis = ""
+    return "<%s.%s; %s >" % (self.__class__.__module__, self.__class__.__name__, strthis,)
+
+
+def _swig_setattr_nondynamic_instance_variable(set):
+    def set_instance_attr(self, name, value):
+        if name == "this":
+            set(self, name, value)
+        elif name == "thisown":
+            self.this.own(value)
+        elif hasattr(self, name) and isinstance(getattr(type(self), name), property):
+            set(self, name, value)
+        else:
+            raise AttributeError("You cannot add instance attributes to %s" % self)
+    return set_instance_attr
+
+
+def _swig_setattr_nondynamic_class_variable(set):
+    def set_class_attr(cls, name, value):
+        if hasattr(cls, name) and not isinstance(getattr(cls, name), property):
+            set(cls, name, value)
+        else:
+            raise AttributeError("You cannot add class attributes to %s" % cls)
+    return set_class_attr
+
+
+class _SwigNonDynamicMeta(type):
+    """Meta class to enforce nondynamic attributes (no new attributes) for a class"""
+    __setattr__ = _swig_setattr_nondynamic_class_variable(type.__setattr__)
+
+
+
+def dist2(x1, y1, z1, x2, y2, z2):
+    return _fdist.dist2(x1, y1, z1, x2, y2, z2)
+
+def dist(x1, y1, z1, x2, y2, z2):
+    return _fdist.dist(x1, y1, z1, x2, y2, z2)
+
+def c_dist2_set(point, pos, out):
+    return _fdist.c_dist2_set(point, pos, out)
+
+def c_dist_set(point, pos, out):
+    return _fdist.c_dist_set(point, pos, out)
+
+def c_dist2_mat(pos_a, pos_b, out):
+    return _fdist.c_dist2_mat(pos_a, pos_b, out)
+
+def c_dist_mat(pos_a, pos_b, out):
+    return _fdist.c_dist_mat(pos_a, pos_b, out)
+
+def c_cutoff_pairs(pos_a, rad_a, pos_b, rad_b, cutoff, half, ii, jj, dd):
+    return _fdist.c_cutoff_pairs(pos_a, rad_a, pos_b, rad_b, cutoff, half, ii, jj, dd)
+
+def c_grid_proximity(grid, mol_pos, mol_w, rest_pos, rest_w):
+    return _fdist.c_grid_proximity(grid, mol_pos, mol_w, rest_pos, rest_w)
+
+def c_grid_vdw(grid, pos, rad2):
+    return _fdist.c_grid_vdw(grid, pos, rad2)
+
+import numpy as _np
+
+
+def _coords(pos):
+    """Return an N x 3 C-contiguous float array, without copying if possible"""
+    return _np.ascontiguousarray(pos, dtype=_np.float64).reshape((-1, 3))
+
+
+def _check(status):
+    """Raise ValueError if a kernel found an array too short"""
+    if status < 0:
+        raise ValueError("An array is too short for the amount of points")
+    return status
+
+
+def dist2_set(point, pos):
+    """
+    Return the squared distances from a point to each of a set of points
+
+    Parameters
+    ----------
+    point : 3 x 1 array-like
+        The reference point
+    pos : N x 3 array-like
+        The set of points
+    Returns
+    -------
+    out : N x 1 numpy array
+        Squared distances
+
+    """
+    point = _coords(point)
+    pos = _coords(pos)
+    out = _np.empty(len(pos))
+    _check(c_dist2_set(point, pos, out))
+    return out
+
+
+def dist_set(point, pos):
+    """Return the distances from a point to each of a set of points"""
+    point = _coords(point)
+    pos = _coords(pos)
+    out = _np.empty(len(pos))
+    _check(c_dist_set(point, pos, out))
+    return out
+
+
+def dist2_mat(pos_a, pos_b=None):
+    """
+    Return the matrix of squared distances between two sets of points
+
+    Parameters
+    ----------
+    pos_a : N x 3 array-like
+        The first set of points
+    pos_b : M x 3 array-like or None
+        The second set of points. If None, the full matrix of pos_a
+    Returns
+    -------
+    out : N x M numpy array
+        Squared distances between pos_a[i] and pos_b[j]
+
+    """
+    pos_a = _coords(pos_a)
+    pos_b = pos_a if pos_b is None else _coords(pos_b)
+    out = _np.empty((len(pos_a), len(pos_b)))
+    _check(c_dist2_mat(pos_a, pos_b, out))
+    return out
+
+
+def dist_mat(pos_a, pos_b=None):
+    """Return the matrix of distances between two sets of points"""
+    pos_a = _coords(pos_a)
+    pos_b = pos_a if pos_b is None else _coords(pos_b)
+    out = _np.empty((len(pos_a), len(pos_b)))
+    _check(c_dist_mat(pos_a, pos_b, out))
+    return out
+
+
+def cutoff_pairs(pos_a, cutoff, pos_b=None, rad_a=None, rad_b=None):
+    """
+    Return the pairs of points closer than a cutoff
+
+    The distance of a pair can be reduced by a radius for each point, for
+    example to measure the distance between covalent spheres.
+
+    Parameters
+    ----------
+    pos_a : N x 3 array-like
+        The first set of points
+    cutoff : float
+        Maximum distance minus radii of a pair
+    pos_b : M x 3 array-like or None
+        The second set of points. If None, the pairs i < j of pos_a
+    rad_a, rad_b : N x 1 and M x 1 array-likes or None
+        The radii of the points. If None, zero
+    Returns
+    -------
+    ii, jj : numpy arrays of ints
+        Indices of the pairs in pos_a and pos_b
+    dd : numpy array of floats
+        Distance between the centres of each pair
+
+    """
+    half = pos_b is None
+    pos_a = _coords(pos_a)
+    if half:
+        pos_b = pos_a
+        rad_b = rad_a
+    else:
+        pos_b = _coords(pos_b)
+    if rad_a is None:
+        rad_a = _np.zeros(len(pos_a))
+    if rad_b is None:
+        rad_b = _np.zeros(len(pos_b))
+    rad_a = _np.ascontiguousarray(rad_a, dtype=_np.float64)
+    rad_b = _np.ascontiguousarray(rad_b, dtype=_np.float64)
+
+# guess the amount of pairs and try again if there are more
+    cap = 8 * max(len(pos_a), len(pos_b), 1)
+    while True:
+        ii = _np.empty(cap, dtype=_np.int64)
+        jj = _np.empty(cap, dtype=_np.int64)
+        dd = _np.empty(cap)
+        n_pairs = _check(c_cutoff_pairs(pos_a, rad_a, pos_b, rad_b, float(cutoff),
+                                        int(half), ii, jj, dd))
+        if n_pairs <= cap:
+            return ii[:n_pairs], jj[:n_pairs], dd[:n_pairs]
+        cap = n_pairs
+
+
+def _weights(weights, n_at):
+    """Return a float array of weights, ones if None"""
+    if weights is None:
+        return _np.ones(n_at)
+    return _np.ascontiguousarray(weights, dtype=_np.float64)
+
+
+def grid_proximity(grid, mol_pos, rest_pos, mol_weights=None, rest_weights=None):
+    """
+    Mark the points of a grid which are closest to a molecule
+
+    The fourth column of the grid becomes 1 if the closest atom to the point
+    is in the molecule and 0 if it is one of the rest. The squared distances
+    are multiplied by the weight of each atom before comparing. The points are
+    shared out between OpenMP threads and the GIL is released.
+
+    Parameters
+    ----------
+    grid : N x 4 C-contiguous numpy array of floats
+        Rows of x y z value. Modified in place
+    mol_pos, rest_pos : M x 3 and L x 3 array-likes
+        Positions of the atoms of the molecule and of the rest
+    mol_weights, rest_weights : M x 1 and L x 1 array-likes or None
+        Weights of each atom. If None, 1
+
+    """
+    mol_pos = _coords(mol_pos)
+    rest_pos = _coords(rest_pos)
+    _check(c_grid_proximity(grid, mol_pos, _weights(mol_weights, len(mol_pos)),
+                            rest_pos, _weights(rest_weights, len(rest_pos))))
+    return
+
+
+def grid_vdw(grid, pos, rad):
+    """
+    Mark the points of a grid which are inside spheres
+
+    The fourth column of the grid becomes 1 if the point is inside the sphere
+    of radius rad[i] around pos[i] for any i and 0 otherwise. The points are
+    shared out between OpenMP threads and the GIL is released.
+
+    Parameters
+    ----------
+    grid : N x 4 C-contiguous numpy array of floats
+        Rows of x y z value. Modified in place
+    pos : M x 3 array-like
+        Centres of the spheres
+    rad : M x 1 array-like
+        Radii of the spheres
+
+    """
+    pos = _coords(pos)
+    rad2 = _np.ascontiguousarray(rad, dtype=_np.float64)**2
+    _check(c_grid_vdw(grid, pos, rad2))
+    return
+
+
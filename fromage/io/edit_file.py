@@ -1,6 +1,8 @@
 """Functions for creating files needed for other software"""
 
 import numpy as np
+import shutil
+import tempfile
 from random import randint
 
 
@@ -92,6 +94,91 @@ def write_xyz(in_name, atoms, char=False):
     return
 
 
+def write_xyz_iter(in_name, mols, char=False):
+    """
+    Write an xyz file from groups of atoms which are only read once
+
+    The atom lines are first written to a temporary file and copied after the
+    number of atoms once it is known, so that the groups can come from a
+    generator and never all be in memory.
+
+    Parameters
+    ----------
+    in_name : string
+        Name of the xyz file. Include the file extension, e.g. "molecule.xyz"
+    mols : iterable of lists of Atom objects or Mol objects
+        Atoms to write
+    char : optional bool
+        Write the charge of the atom in the 4th column
+
+    """
+    n_atoms = 0
+    with tempfile.TemporaryFile(mode="w+") as atom_file:
+        for mol in mols:
+            for atom in mol:
+                if char:
+                    atom_file.write(str(atom) + "\n")
+                else:
+                    atom_file.write(atom.xyz_str() + "\n")
+                n_atoms += 1
+        atom_file.seek(0)
+        with open(in_name, "w") as out_file:
+            out_file.write(str(n_atoms) + "\n")
+            out_file.write(in_name + "\n")
+            shutil.copyfileobj(atom_file, out_file)
+    return
+
+
+def write_xyz_frames(in_name, mols, char=False, comments=None):
+    """
+    Write several configurations one after the other in an xyz file
+
+    Parameters
+    ----------
+    in_name : string
+        Name of the xyz file. Include the file extension, e.g. "traj.xyz"
+    mols : iterable of lists of Atom objects or Mol objects
+        The atoms of each configuration
+    char : optional bool
+        Write the charge of the atom in the 4th column
+    comments : list of str, optional
+        Comment line of each configuration. Empty if None
+
+    """
+    with open(in_name, "w") as out_file:
+        for i, mol in enumerate(mols):
+            out_file.write(str(len(mol)) + "\n")
+            if comments is not None:
+                out_file.write(comments[i])
+            out_file.write("\n")
+            for atom in mol:
+                if char:
+                    out_file.write(str(atom) + "\n")
+                else:
+                    out_file.write(atom.xyz_str() + "\n")
+    return
+
+
+def write_points_iter(in_name, mols):
+    """
+    Write point charges as lines of x y z q from groups of atoms
+
+    Parameters
+    ----------
+    in_name : string
+        Name of the file
+    mols : iterable of lists of Atom objects or Mol objects
+        Atoms to write as point charges
+
+    """
+    with open(in_name, "w") as out_file:
+        for mol in mols:
+            for atom in mol:
+                out_file.write("{:10.6f} {:10.6f} {:10.6f} {:10.6f}".format(
+                    atom.x, atom.y, atom.z, atom.q) + "\n")
+    return
+
+
 def write_uc(in_name, vectors, aN, bN, cN, atoms):
     """
     Write a .uc file for Ewald.c.
@@ -106,8 +193,9 @@ def write_uc(in_name, vectors, aN, bN, cN, atoms):
         Lattice vectors
     aN,bN,cN : ints
         Number of times each lattice vector should be multiplied
-    atoms : list of Atom objects
-        Unit cell atoms for the file
+    atoms : list of Atom objects or Mol object
+        Unit cell atoms for the file. The fractional coordinates of a Mol with
+        the same lattice vectors are reused instead of being recomputed
 
     """
     line1 = vectors[0].tolist() + [aN]
@@ -118,22 +206,19 @@ def write_uc(in_name, vectors, aN, bN, cN, atoms):
     out_file.write("{:10.6f} {:10.6f} {:10.6f} {:10d}".format(*line2) + "\n")
     out_file.write("{:10.6f} {:10.6f} {:10.6f} {:10d}".format(*line3) + "\n")
 
-    # transpose to get the transformation matrix
-    M = np.transpose(vectors)
-    # inverse transformation matrix
-    U = np.linalg.inv(M)
-
-    for atom in atoms:
-        # change of basis transformation
-        dir_pos = [atom.x, atom.y, atom.z]
-        frac_pos = np.dot(U, dir_pos).tolist()
-        for coord in frac_pos:
-            # if the coordinate is out of range
-            if coord < 0 or coord > 1:
-                # translate it to the range [0,1]
-                frac_pos[frac_pos.index(coord)] = coord % 1
+    if hasattr(atoms, "confined_frac_pos") and np.array_equal(atoms.vectors, vectors):
+        frac_pos = atoms.confined_frac_pos()
+    else:
+        # change of basis transformation of every atom at once
+        dir_pos = np.array([[atom.x, atom.y, atom.z] for atom in atoms]).reshape((-1, 3))
+        frac_pos = np.dot(dir_pos, np.linalg.inv(vectors))
+        # translate the coordinates which are out of range to the range [0,1]
+        out_of_range = (frac_pos < 0) | (frac_pos > 1)
+        frac_pos[out_of_range] %= 1
+
+    for atom, atom_frac in zip(atoms, frac_pos):
         str_line = "{:10.6f} {:10.6f} {:10.6f} {:14.10f} {:>6}".format(
-            *frac_pos + [atom.q] + [atom.elem]) + "\n"
+            *atom_frac.tolist() + [atom.q] + [atom.elem]) + "\n"
         out_file.write(str_line)
     out_file.close()
     return
@@ -7,10 +7,11 @@ outside of this file for clarity.
 import numpy as np
 import fromage.utils.per_table as pt
 
-from fromage.utils.mol import Mol
+from fromage.utils.mol import Mol, mol_from_arrays
 from fromage.utils import per_table as per
 from fromage.utils.atom import Atom
 from fromage.utils.volume import CubeGrid
+from fromage.utils.trajectory import Trajectory
 
 
 def read_vasp(in_name):
@@ -115,6 +116,84 @@ def read_xyz(in_name):
     return atom_step
 
 
+def _xyz_frame_starts(xyz_content):
+    """Return the line number of the atom count of each frame of an xyz file"""
+    starts = []
+    i = 0
+    while i < len(xyz_content):
+        line = xyz_content[i]
+        if line.strip() and line.split()[0].isdigit():
+            starts.append(i)
+            # jump over the comment and atom lines
+            i += int(line.split()[0]) + 2
+        else:
+            i += 1
+    return starts
+
+
+def _read_xyz_arrays(in_name, last_only=False):
+    """
+    Read the frames of a .xyz file into arrays without making Atom objects
+
+    All frames must have the same number of atoms or a ValueError is raised.
+
+    Parameters
+    ----------
+    in_name : str
+        Name of the file to read
+    last_only : bool
+        If True, only the last frame is parsed
+    Returns
+    -------
+    elems : list of str
+        Element symbols of the first parsed frame
+    frames : F x N x 3 numpy array
+        Coordinates of each frame
+
+    """
+    with open(in_name) as xyz_file:
+        xyz_content = xyz_file.readlines()
+
+    starts = _xyz_frame_starts(xyz_content)
+    if last_only:
+        starts = starts[-1:]
+    n_at = int(xyz_content[starts[0]].split()[0])
+    atom_lines = []
+    for k, start in enumerate(starts):
+        n_frame = int(xyz_content[start].split()[0])
+        if n_frame != n_at:
+            raise ValueError("frame {} has {} atoms, expected {}".format(
+                k, n_frame, n_at))
+        atom_lines.extend(xyz_content[start + 2:start + n_at + 2])
+    table = np.array(" ".join(atom_lines).split()).reshape((-1, 4))
+    elems = table[:n_at, 0].tolist()
+    frames = table[:, 1:].astype(float).reshape((len(starts), n_at, 3))
+    return elems, frames
+
+
+def read_traj(in_name, vectors=np.zeros((3, 3))):
+    """
+    Read a .xyz file with several configurations into a Trajectory
+
+    Every configuration must have the same atoms in the same order.
+
+    Parameters
+    ----------
+    in_name : str
+        Name of the file to read
+    vectors : 3 x 3 np array
+        The unit cell vectors if pertinent
+    Returns
+    -------
+    traj : Trajectory object
+        All of the configurations in the file
+
+    """
+    elems, frames = _read_xyz_arrays(in_name)
+    traj = Trajectory(frames, elems, vectors=vectors)
+    return traj
+
+
 def read_pos(in_name):
     """
     Return the last or only set of atomic positions in a file
@@ -134,7 +213,9 @@ def read_pos(in_name):
         The last or only set of atomic positions in the file
 
     """
-    atoms = read_xyz(in_name)[-1]
+    elems, frames = _read_xyz_arrays(in_name, last_only=True)
+    atoms = [Atom(elem, pos[0], pos[1], pos[2])
+             for elem, pos in zip(elems, frames[0])]
 
     return atoms
 
@@ -158,8 +239,8 @@ def mol_from_file(in_name, bonding='', vectors=np.zeros((3, 3))):
         The atomic positions in the file
 
     """
-    mol = Mol(read_pos(in_name))
-    mol.vectors = vectors
+    elems, frames = _read_xyz_arrays(in_name, last_only=True)
+    mol = mol_from_arrays(frames[0], elems, vectors=vectors)
     mol.set_bonding_str(bonding)
 
     return mol
@@ -236,15 +317,11 @@ def read_points(in_name):
 
     """
     with open(in_name) as pts_file:
-        pts_content = pts_file.readlines()
-
-        # store point charges here
-    points = Mol([])
+        pts_content = pts_file.read()
 
-    for line in pts_content:
-        xIn, yIn, zIn, qIn = map(float, line.split())
-        point = Atom("point", xIn, yIn, zIn, qIn)
-        points.append(point)
+    # each line is x y z q. Parse everything at once and skip making Atoms
+    values = np.array(pts_content.split(), dtype=float).reshape((-1, 4))
+    points = mol_from_arrays(values[:, :3], "point", charges=values[:, 3])
 
     return points
 
@@ -12,144 +12,122 @@ a target cluster xyz to assign the charges to the cluster.
 Usage:
 assign_charges.py mol.log clust.xyz
 
+Several targets, or an xyz file with several frames, are charged with the same
+reference in a pool of processes and written as one multi-frame xyz file or a
+.npy array, with a count of the atoms left without charge in each frame:
+assign_charges.py mol.log traj.xyz other.xyz -j 4 -o traj_char.xyz
+
 Includes options for Mulliken or RESP and ouptut file names.
 """
 
 import numpy as np
 import sys
+import os
+import json
+import hashlib
 import argparse
+from multiprocessing import Pool
+from scipy import sparse
 
 import fromage.io.read_file as rf
+import fromage.io.edit_file as ef
+from fromage.utils import connectivity as cn
 
 
-def detect_1_connect(in_atoms):
+def detect_connect(in_atoms, max_depth=None):
     """
-    Make a matrix of first connectivities of a list of atoms.
+    Make a sparse matrix of the bond orders separating atoms
+
+    The sparse bond graph is searched breadth-first, see
+    connectivity.path_lengths.
 
     Parameters
     ----------
     in_atoms : Mol object
         Atoms which need their connectivity detected
-    vectors : 3x3 array-like or None
-        Lattice vectors of the system if it is periodic. If not use None
+    max_depth : int or None
+        Largest bond order to look for. If None, all connected atoms are found
 
     Returns
     -------
-    cnct : numpy matrix
-        The matrix where each row and each column correspond to one atom. If the
-        two atoms are bonded or the same, the matrix element is 1. Otherwise it
-        is 0
-
-    """
-    nat_mol = len(in_atoms)
-    cnct = np.zeros((nat_mol, nat_mol),dtype=int)
-    for i, i_atom in enumerate(in_atoms):
-        for j, j_atom in enumerate(in_atoms):
-            if np.count_nonzero(in_atoms.vectors) == 0:
-                if in_atoms.bonded(i_atom, j_atom):
-                    cnct[i][j] = 1
-            else:
-                if in_atoms.per_bonded(i_atom, j_atom):
-                    cnct[i][j] = 1
+    cnct : scipy.sparse.csr_matrix of ints
+        The matrix where each row and each column correspond to one atom. The
+        matrix element is the smallest number of bonds between the two atoms,
+        1 if they are the same atom and no entry if they are not connected
+
+    """
+    periodic = np.count_nonzero(in_atoms.vectors) != 0
+    if periodic:
+        graph = in_atoms.periodic_bond_graph()[0]
+    else:
+        graph = in_atoms.bond_graph()
+    # an atom is connected to itself
+    cnct = cn.path_lengths(graph, max_depth=max_depth) + \
+        sparse.identity(graph.shape[0], dtype=int, format='csr')
+    cnct.sort_indices()
     return cnct
 
 
-def expand_connect(in_mat):
+def detect_fingerprints(in_atoms, rounds=None):
     """
-    Expand a connectivity matrix
-
-    For one atom, checks which other atoms are connected to it (connectors) and
-    which are not (dangles). Then for each dangle checks if it has connectors in
-    common with the original atom and if so assigns that matrix element the
-    smallest combination of connectors.
+    Return a hashed fingerprint of the bonded environment of each atom
 
-    Parameter
-    ---------
-    in_mat : 2-d array-like
-        Connectivity matrix to be expanded
+    See connectivity.wl_fingerprints. The fingerprints are cached on the Mol
+    and do not depend on the order of the atoms or on the run,
+    so that they can be stored and compared later.
 
+    Parameters
+    ----------
+    in_atoms : Mol object
+        Atoms which need their fingerprints detected
+    rounds : int or None
+        Number of bonds around each atom described by its fingerprint. If
+        None, as many as are needed to tell apart all atoms of different
+        environments
     Returns
     -------
-    out_mat : 2-d array-like
-        Once-expanded connectivity matrix
-
-    """
-    out_mat = np.copy(in_mat)
-    for i, row in enumerate(in_mat):
-        # indices of unconnected atoms
-        dangles = []
-        # indices of connected atoms
-        connectors = []
-        for j, element in enumerate(row):
-            if element == 0 and j > i:
-                dangles.append(j)
-            elif element != 0:
-                connectors.append(j)
-        for dangle in dangles:
-            orders = []
-            for k, dangle_element in enumerate(in_mat[dangle]):
-                if dangle_element != 0 and k in connectors:
-                    orders.append(dangle_element + in_mat[i][k])
-                # if orders is not empty
-                if orders:
-                    out_mat[i][dangle] = min(orders)
-                    out_mat[dangle][i] = min(orders)
-    return out_mat
-
-
-def complete_expand(in_mat):
-    """Expand a matrix until it stops expanding."""
-    mat = np.copy(in_mat)
-    i = 1
-    while True:
-        i += 1
-        temp_mat = expand_connect(mat)
-        if np.array_equal(mat, temp_mat):
-            break
-        mat = np.copy(temp_mat)
-
-    return mat
-
-
-def charged_kinds(in_atoms, in_kinds):
-    """
-    Get charged atom kinds from charged atoms and kinds.
-
-    For each kind of atom to be charged, goes through the list of atoms and
-    makes an average of the partial atomic charge of atoms of that type.
+    fingerprints : N x 1 numpy array of numpy.uint64
+        The fingerprint of each atom
+    rounds : int
+        The number of rounds used, which has to be the same to compare
+        fingerprints
+
+    """
+    def compute_fingerprints():
+        periodic = np.count_nonzero(in_atoms.vectors) != 0
+        if periodic:
+            graph = in_atoms.periodic_bond_graph()[0]
+        else:
+            graph = in_atoms.bond_graph()
+        at_nums = [atom.at_num for atom in in_atoms]
+        return cn.wl_fingerprints(graph, at_nums, rounds=rounds)
+
+    return in_atoms.cached("fingerprints_" + str(rounds), compute_fingerprints)
+
+
+def fingerprint_charges(fingerprints, charges):
+    """
+    Return the average charge of the atoms of each fingerprint
 
     Parameters
     ----------
-    in_atoms : Mol object
-        The atoms should be charged and some of them at least should be of the
-        relevant kind
-    in_kinds : list of tuples
-        The tuples are of the form (a,b) where a is an element string (like 'C')
-        and b is a frozenset of ((element string,order of connection),amount of
-        connections). (a,b) is known as an atom kind
-
+    fingerprints : N x 1 array-like of ints
+        Fingerprint of each atom, see detect_fingerprints
+    charges : N x 1 array-like of floats
+        Charge of each atom
     Returns
     -------
-    q_kinds : list of tuples
-        Each tuple is now (average charge,kind). This tuple is known as a
-        charged kind
-
-    """
-    q_kinds = []
-    for kind in in_kinds:
-        charges = []
-        for atom in in_atoms:
-            if atom.kind == kind:
-                charges.append(atom.q)
-        if charges:  # if not empty
-            avg_charge = sum(charges) / float(len(charges))
-        else:
-            avg_charge = 0
-        q_kinds.append((avg_charge, kind))
-    return q_kinds
+    fp_charges : dict
+        Average charge keyed by fingerprint, as a Python int
 
+    """
+    unique_fps, groups = np.unique(np.asarray(fingerprints), return_inverse=True)
+    totals = np.bincount(groups, weights=charges, minlength=len(unique_fps))
+    amounts = np.bincount(groups, minlength=len(unique_fps))
+    return dict(zip(unique_fps.tolist(), (totals / amounts).tolist()))
 
-def assign_charges(char_atoms, unchar_atoms):
+
+def assign_charges(char_atoms, unchar_atoms, max_depth=None):
     """
     Assign charges from one list of atoms to another list of atoms.
 
@@ -158,82 +136,384 @@ def assign_charges(char_atoms, unchar_atoms):
     in the input and the output. The uncharged atoms are changed and there is no
     output.
 
+    Each atom is matched by the fingerprint of its bonded environment, see
+    detect_fingerprints, and given the average charge of the charged atoms
+    with the same fingerprint. Atoms without a match keep their charge.
+
     Parameters
     ----------
     char_atoms : Mol object
         Atoms which already have assigned charge
-    char_vectors : 3x3 array-like or None
-        Lattice vectors of the input system if it is periodic. If not use None
     unchar_atoms : Mol object
         Atoms which need charges assigned to them
-    unchar_vectors : 3x3 array-like or None
-        See char_vectors
-
-    """
-    # detect the charged atom's connectivity matrix
-    char_first = detect_1_connect(char_atoms)
-    char_cnct = complete_expand(char_first)
-
-    # get charged atom kinds as a result
-    kinds = []
-    for i, atom in enumerate(char_atoms):
-        atom.set_connectivity(char_atoms, char_cnct[i])
-        kinds.append(atom.kind)
-    kinds = set(kinds)
-    q_kinds = charged_kinds(char_atoms, kinds)
-
-    # detect uncharged atom connectivity
-    unchar_first = detect_1_connect(unchar_atoms)
-    unchar_cnct = complete_expand(unchar_first)
-
-    # determine kind and cross check with charged kinds
-    for i, atom in enumerate(unchar_atoms):
-        atom.set_connectivity(unchar_atoms, unchar_cnct[i])
-        for q_kind in q_kinds:
-            if atom.kind == q_kind[1]:
-                atom.q = q_kind[0]
+    max_depth : int or None
+        Number of rounds of the fingerprints, which is the number of bonds
+        around each atom that its fingerprint describes. If None, at least the
+        diameter of the molecules of the charged Mol and enough rounds to tell
+        apart all of its atom environments
+
+    """
+    apply_charge_table(unchar_atoms, *charge_table(char_atoms, max_depth=max_depth))
     return
 
 
-def main(in_xyz, in_log, target, output, bonding, thresh, kind):
-    if(in_xyz):
-        mol = rf.mol_from_file(in_xyz)
+def charge_table(char_atoms, max_depth=None):
+    """
+    Return the average charge of each atom environment of charged atoms
+
+    Parameters
+    ----------
+    char_atoms : Mol object
+        Atoms which already have assigned charge
+    max_depth : int or None
+        See assign_charges
+    Returns
+    -------
+    fp_charges : dict
+        Average charge keyed by fingerprint, see fingerprint_charges
+    rounds : int
+        Number of rounds of the fingerprints
+
+    """
+    # the charged atoms decide how far the environments need to go
+    char_fps, rounds = detect_fingerprints(char_atoms, rounds=max_depth)
+    if max_depth is None and len(char_atoms):
+        # describe at least whole molecules so that atoms of other molecules
+        # are not matched
+        diameter = int(detect_connect(char_atoms).max())
+        if diameter > rounds:
+            char_fps, rounds = detect_fingerprints(char_atoms, rounds=diameter)
+    fp_charges = fingerprint_charges(char_fps, char_atoms.charges())
+    return fp_charges, rounds
+
+
+def apply_charge_table(unchar_atoms, fp_charges, rounds, by_molecule=False):
+    """
+    Give atoms the charges of a table of atom environments
+
+    Atoms whose fingerprint is not in the table keep their charge.
+
+    Parameters
+    ----------
+    unchar_atoms : Mol object
+        Atoms which need charges assigned to them
+    fp_charges, rounds : see charge_table
+    by_molecule : bool
+        If True, only fingerprint one copy of each different molecule, see
+        assign_charges_by_molecule
+
+    """
+    if by_molecule:
+        new_charges = unchar_atoms.charges()
+        for copies in molecule_copies(unchar_atoms):
+            template = unchar_atoms.take(copies[0])
+            template_fps = detect_fingerprints(template, rounds=rounds)[0].tolist()
+            matched = np.array([fp in fp_charges for fp in template_fps], dtype=bool)
+            template_charges = np.array([fp_charges.get(fp, 0.0) for fp in template_fps])
+            new_charges[copies[:, matched]] = template_charges[matched]
+        unchar_atoms.change_charges(new_charges)
+        return
+
+    unchar_fps = detect_fingerprints(unchar_atoms, rounds=rounds)[0]
+    new_charges = unchar_atoms.charges()
+    for i, fp in enumerate(unchar_fps.tolist()):
+        if fp in fp_charges:
+            new_charges[i] = fp_charges[fp]
+    unchar_atoms.change_charges(new_charges)
+    return
+
+
+def molecule_copies(in_atoms):
+    """
+    Group the molecules of a Mol which are copies of one another
+
+    Two molecules are copies if their atoms come in the same order of
+    elements and are bonded in the same way, as happens when a cluster is made
+    by translating the molecules of a cell. Periodic Mols are split with their
+    bonds through the boundaries.
+
+    Parameters
+    ----------
+    in_atoms : Mol object
+        Atoms to split into molecules
+    Returns
+    -------
+    copies : list of M x n numpy arrays of ints
+        For each different molecule, one row of atom indices per copy, in the
+        order of the first copy
+
+    """
+    periodic = np.count_nonzero(in_atoms.vectors) != 0
+    if periodic:
+        graph = in_atoms.periodic_bond_graph()[0]
+        orders = in_atoms.cached("periodic_molecules", lambda:
+                                 cn.periodic_molecule_orders(*in_atoms.periodic_bond_graph()))[0]
     else:
-        mol = rf.mol_from_gauss(in_log)
-    charges = rf.read_g_char(in_log, kind)[0]
-    cluster = rf.mol_from_file(target)
+        graph = in_atoms.bond_graph()
+        orders = in_atoms.cached("molecules", lambda: cn.molecule_orders(graph))
+    if len(orders) == 0:
+        return []
+    at_nums = np.array([atom.at_num for atom in in_atoms], dtype=int)
+    # molecule and position in the molecule of every atom
+    sizes = np.array([len(order) for order in orders])
+    mol_ids = np.repeat(np.arange(len(orders)), sizes)
+    all_orders = np.concatenate(orders)
+    owner = np.empty(len(in_atoms), dtype=int)
+    owner[all_orders] = mol_ids
+    local = np.empty(len(in_atoms), dtype=int)
+    local[all_orders] = np.arange(len(all_orders)) - (np.cumsum(sizes) - sizes)[mol_ids]
+    # bonds in local indices, sorted by molecule
+    bonds = graph.tocoo()
+    bond_order = np.lexsort((local[bonds.col], local[bonds.row], owner[bonds.row]))
+    bond_mols = owner[bonds.row][bond_order]
+    local_bonds = np.stack((local[bonds.row], local[bonds.col]), axis=1)[bond_order]
+    bond_splits = np.searchsorted(bond_mols, np.arange(1, len(orders)))
+
+    groups = {}
+    for order, mol_bonds in zip(orders, np.split(local_bonds, bond_splits)):
+        key = (at_nums[order].tobytes(), mol_bonds.tobytes())
+        groups.setdefault(key, []).append(order)
+    copies = [np.array(group) for group in groups.values()]
+    return copies
+
+
+def assign_charges_by_molecule(char_atoms, unchar_atoms, max_depth=None):
+    """
+    Assign charges from one list of atoms to another, one molecule at a time
+
+    Gives the same charges as assign_charges but the uncharged atoms are split
+    into molecules, see molecule_copies, and only one copy of each different
+    molecule is matched against the charged atoms. Its charges are then given
+    to the same atoms of every other copy. This is much faster for clusters
+    made of many copies of a few molecules.
+
+    Parameters
+    ----------
+    char_atoms : Mol object
+        Atoms which already have assigned charge
+    unchar_atoms : Mol object
+        Atoms which need charges assigned to them
+    max_depth : int or None
+        See assign_charges
+
+    """
+    apply_charge_table(unchar_atoms, *charge_table(char_atoms, max_depth=max_depth),
+                       by_molecule=True)
+    return
+
+
+# version of the fingerprints and of the layout of the charge table sidecar
+# files. Tables saved with another version are computed again
+TABLE_VERSION = 1
+
+
+def _file_hash(in_names):
+    """Return the SHA-256 hex digest of the contents of some files"""
+    digest = hashlib.sha256()
+    for in_name in in_names:
+        with open(in_name, "rb") as in_file:
+            for block in iter(lambda: in_file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def gauss_charge_table(in_log, pop="ESP", bonding="dis", thresh=None, max_depth=None,
+                       in_xyz=None, neutralise=False, cache=True):
+    """
+    Return the charge table of a Gaussian population analysis
+
+    The table is saved in a sidecar file, in_log + ".charges.json", keyed by
+    the contents of the input files and the settings. When the same log is
+    used again with the same settings the table is read from there, without
+    parsing the log or detecting the connectivity of its atoms. Sidecar files
+    written with another TABLE_VERSION are ignored and overwritten.
 
+    Parameters
+    ----------
+    in_log : str
+        Gaussian log file with the population analysis
+    pop : str
+        Kind of charges, mulliken or esp
+    bonding : str
+        Bonding type of the reference, see Mol.set_bonding
+    thresh : float or None
+        Bonding threshold. If None, the default of the bonding type
+    max_depth : int or None
+        Number of rounds of the fingerprints, see assign_charges
+    in_xyz : str or None
+        xyz file of the geometry if the one in the log file is not good
+    neutralise : bool
+        If True, subtract the total charge from the last atom before making
+        the table
+    cache : bool
+        If False, neither read nor write the sidecar file
+    Returns
+    -------
+    fp_charges, rounds : see charge_table
+    total : float
+        Total charge of the population analysis before neutralising
+
+    """
+    in_names = [in_log] if in_xyz is None else [in_log, in_xyz]
+    side_name = in_log + ".charges.json"
+    settings = json.dumps([pop.lower(), bonding, thresh, max_depth, neutralise])
+    content_hash = _file_hash(in_names)
+
+    stored = {"version": TABLE_VERSION, "hash": content_hash, "tables": {}}
+    if cache and os.path.isfile(side_name):
+        try:
+            with open(side_name) as side_file:
+                old = json.load(side_file)
+            if old.get("version") == TABLE_VERSION and old.get("hash") == content_hash:
+                stored = old
+        except (IOError, ValueError):
+            pass
+    if settings in stored["tables"]:
+        table = stored["tables"][settings]
+        fp_charges = {int(fp): q for fp, q in table["charges"]}
+        return fp_charges, table["rounds"], table["total"]
+
+    if in_xyz:
+        mol = rf.mol_from_file(in_xyz)
+        mol.raw_assign_charges(rf.read_g_char(in_log, pop)[0])
+    else:
+        mol = rf.mol_from_gauss(in_log, pop=pop)
+    charges = mol.charges()
+    total = float(np.sum(charges))
+    if neutralise and total != 0.0:
+        charges[-1] -= total
+    mol.change_charges(charges)
     mol.set_bonding(bonding=bonding, thresh=thresh)
-    cluster.set_bonding(bonding=bonding, thresh=thresh)
+    fp_charges, rounds = charge_table(mol, max_depth=max_depth)
+
+    if cache:
+        stored["tables"][settings] = {"rounds": rounds, "total": total,
+                                      "charges": sorted(fp_charges.items())}
+        try:
+            with open(side_name, "w") as side_file:
+                json.dump(stored, side_file)
+        except IOError:
+            pass
+    return fp_charges, rounds, total
+
 
-    for atom, char in zip(mol, charges):
-        atom.q = char
+# charge table of the worker processes of charge_frames
+_pool_table = None
+
+
+def _init_pool(fp_charges, rounds):
+    """Give a worker process the charge table"""
+    global _pool_table
+    _pool_table = (fp_charges, rounds)
+    return
 
-    assign_charges(mol, cluster)
 
-    # warning if some atoms have not been assigned or if some original charges
-    # were 0
-    bad_atoms = []
-    for atom in cluster:
-        if abs(atom.q) <= 0.000:
-            bad_atoms.append(atom)
-    if len(bad_atoms) > 0:
-        print("WARNING: " + str(len(bad_atoms)) + " atoms have null charge!")
-        print(bad_atoms)
+def _charge_frame(in_mol):
+    """Return the charges of a Mol from the charge table of the process"""
+    apply_charge_table(in_mol, *_pool_table)
+    return in_mol.charges()
 
-    out_file = open(output, "w")
-    out_file.write(str(len(cluster)) + "\n\n")
-    for atom in cluster:
-        out_file.write(str(atom) + "\n")
-    out_file.close()
+
+def charge_frames(mols, fp_charges, rounds, processes=1):
+    """
+    Assign charges to many Mols with one charge table
+
+    The Mols are charged in a pool of processes which each receive the table
+    once. The input Mols are not modified.
+
+    Parameters
+    ----------
+    mols : list of Mol objects
+        The configurations to charge, for instance the frames of a Trajectory
+    fp_charges, rounds : see charge_table
+    processes : int
+        Number of processes. If 1, no pool is started
+    Returns
+    -------
+    all_charges : list of numpy arrays
+        The charges of each Mol
+
+    """
+    if processes == 1:
+        _init_pool(fp_charges, rounds)
+        return [_charge_frame(mol.copy()) for mol in mols]
+    pool = Pool(processes, initializer=_init_pool, initargs=(fp_charges, rounds))
+    try:
+        all_charges = pool.map(_charge_frame, mols, chunksize=max(1, len(mols) // (4 * processes)))
+    finally:
+        pool.close()
+        pool.join()
+    return all_charges
+
+
+def main(in_xyz, in_log, targets, output, bonding, thresh, kind, max_depth=None, cache=True,
+         processes=1, array=False):
+    if isinstance(targets, str):
+        targets = [targets]
+    fp_charges, rounds, _ = gauss_charge_table(in_log, pop=kind, bonding=bonding,
+                                               thresh=thresh, max_depth=max_depth,
+                                               in_xyz=in_xyz, cache=cache)
+
+    # every frame of every target
+    mols = []
+    labels = []
+    for target in targets:
+        traj = rf.read_traj(target)
+        for i, mol in enumerate(traj):
+            mol.set_bonding(bonding=bonding, thresh=thresh)
+            mols.append(mol)
+            labels.append(target + " frame " + str(i))
+
+    if len(mols) == 1 and not array:
+        cluster = mols[0]
+        apply_charge_table(cluster, fp_charges, rounds)
+
+        # warning if some atoms have not been assigned or if some original charges
+        # were 0
+        bad_atoms = []
+        for atom in cluster:
+            if abs(atom.q) <= 0.000:
+                bad_atoms.append(atom)
+        if len(bad_atoms) > 0:
+            print("WARNING: " + str(len(bad_atoms)) + " atoms have null charge!")
+            print(bad_atoms)
+
+        out_file = open(output, "w")
+        out_file.write(str(len(cluster)) + "\n\n")
+        for atom in cluster:
+            out_file.write(str(atom) + "\n")
+        out_file.close()
+        return
+
+    all_charges = charge_frames(mols, fp_charges, rounds, processes=processes)
+
+    # summary of the atoms which have not been assigned in each frame
+    n_bad = 0
+    for label, charges in zip(labels, all_charges):
+        n_null = int(np.count_nonzero(np.abs(charges) <= 0.000))
+        n_bad += n_null
+        print("{:<40} {:>8} atoms {:>8} with null charge".format(label, len(charges), n_null))
+    if n_bad > 0:
+        print("WARNING: " + str(n_bad) + " atoms have null charge!")
+
+    if array:
+        if len(set(len(charges) for charges in all_charges)) > 1:
+            raise ValueError("The frames do not all have the same number of atoms "
+                             "so their charges cannot be written as one array")
+        np.save(output, np.array(all_charges))
+    else:
+        for mol, charges in zip(mols, all_charges):
+            mol.change_charges(charges)
+        ef.write_xyz_frames(output, mols, char=True, comments=labels)
+    return
 
 if __name__ == '__main__':
     # parse the input
     parser = argparse.ArgumentParser()
     parser.add_argument("in_log", help="Input .log file with RESP analysis",
                         default="gaussian.log")
-    parser.add_argument("target", help="Target .xyz file to assign charges to",
-                        default="cluster.xyz")
+    parser.add_argument("targets", help="Target .xyz files to assign charges to. Files with several frames are charged frame by frame",
+                        nargs="+", default="cluster.xyz")
     parser.add_argument(
         "-i", "--in_xyz", help="Input .xyz file of single molecule if the geometry in the log file is not good")
     parser.add_argument("-o", "--output", help="Name of the output file",
@@ -243,7 +523,16 @@ if __name__ == '__main__':
                         default=1.7, type=float)
     parser.add_argument("-k", "--kind", help="Kind of population, mulliken or esp",
                         default="esp", type=str)
+    parser.add_argument("-d", "--depth", help="Number of fingerprint rounds, i.e. bonds around each atom which are used to tell atoms apart. Default: at least the whole molecule",
+                        default=None, type=int)
+    parser.add_argument("-n", "--no_cache", help="Do not read or write the table of charges saved next to the log file",
+                        action="store_true")
+    parser.add_argument("-j", "--processes", help="Number of processes charging the frames at the same time. Default 1",
+                        default=1, type=int)
+    parser.add_argument("-a", "--array", help="Write the charges of every frame as one frames x atoms array in a .npy file",
+                        action="store_true")
     user_input = sys.argv[1:]
     args = parser.parse_args(user_input)
-    main(args.in_xyz, args.in_log, args.target,
-         args.output, args.bonding, args.threshold, args.kind)
+    main(args.in_xyz, args.in_log, args.targets,
+         args.output, args.bonding, args.threshold, args.kind, args.depth,
+         not args.no_cache, args.processes, args.array)
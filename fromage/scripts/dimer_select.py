@@ -40,6 +40,12 @@ def vector_distance(x1, y1, z1, x2, y2, z2):
     return dist
 
 
+def atom_pos(atoms):
+    """Return an N x 3 array of the coordinates of a list of atoms"""
+    pos = np.array([(atom.x, atom.y, atom.z) for atom in atoms]).reshape((-1, 3))
+    return pos
+
+
 def make_dimers_cd(molecules, cd):
     """
     Generate a list of dimers based on centroid distances cd
@@ -85,13 +91,13 @@ def make_dimers_vdw(molecules):
         # loop over atoms in another molecule
         for mol_2_no, mol2 in enumerate(molecules[mol_1_no:]):
             if mol1 != mol2:
-                for atom1 in mol1:
-                    for atom2 in mol2:
-                        # vdw distances + 1.5 damping factor, as per Day et al.
-                        if vector_distance(atom1.x, atom1.y, atom1.z, atom2.x, atom2.y, atom2.z) <= atom1.vdw + atom2.vdw + 1.5:
-                            dimer = mol1 + mol2
-                            dimers.append(dimer)
-                            break
+                vdw1 = np.array([atom.vdw for atom in mol1])
+                vdw2 = np.array([atom.vdw for atom in mol2])
+                # vdw distances + 1.5 damping factor, as per Day et al.
+                dist = fd.dist_mat(atom_pos(mol1), atom_pos(mol2))
+                if np.any(dist <= vdw1[:, None] + vdw2[None, :] + 1.5):
+                    dimer = mol1 + mol2
+                    dimers.append(dimer)
 
     return dimers
 
@@ -110,10 +116,8 @@ def loop_atoms(mol_1, mol_2, ad):
     -------
     mol1+mol2: list of atom objects
     """
-    for atom1 in mol_1:
-        for atom2 in mol_2:
-            if vector_distance(atom1.x, atom1.y, atom1.z, atom2.x, atom2.y, atom2.z) <= ad:
-                return mol_1 + mol_2
+    if np.any(fd.dist_mat(atom_pos(mol_1), atom_pos(mol_2)) <= ad):
+        return mol_1 + mol_2
 
 
 def make_dimers_ad(molecules, ad):
@@ -173,12 +177,12 @@ def interatomic_distances(dimers):
     """
     connections = []
     for dim_no, dim_atom in enumerate(dimers):
-        dim_cons = []
-        for atom_no_A, atom_A in enumerate(dim_atom):
-            for atom_no_B, atom_B in enumerate(dim_atom[atom_no_A:]):
-                if atom_A != atom_B:
-                    dim_cons.append(round(vector_distance(
-                        atom_A.x, atom_A.y, atom_A.z, atom_B.x, atom_B.y, atom_B.z), 0))
+        # every pair of the small dimer is wanted so there is nothing to prune
+        ii, jj, dd = fd.cutoff_pairs(atom_pos(dim_atom), np.inf)
+        elems = np.array([atom.elem for atom in dim_atom])
+        # skip pairs of overlapping identical atoms
+        distinct = (dd >= 1e-5) | (elems[ii] != elems[jj])
+        dim_cons = np.round(dd[distinct], 0).tolist()
         connections.append(sorted(dim_cons))
     return connections
 
@@ -203,11 +207,7 @@ if __name__ == "__main__":
     print("\n1. Generating molecules.\nMax bond length {}".format(args.bond))
     molecules = ha.make_molecules(atoms, args.bond)
     print("{} molecules generated".format(len(molecules)))
-    lengths = []
-    for atom1 in molecules[0]:
-        for atom2 in molecules[0]:
-            x1, y1, z1, x2, y2, z2 = atom1.x, atom1.y, atom1.z, atom2.x, atom2.y, atom2.z
-            lengths.append(vector_distance(x1, y1, z1, x2, y2, z2))
+    lengths = fd.dist_mat(atom_pos(molecules[0])).ravel().tolist()
 
     # SELECT DIMERS
     print("\n2. Generating dimers")
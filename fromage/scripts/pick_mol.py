@@ -10,7 +10,6 @@ pick_mol.py input_file.xyz 7 13 42
 """
 import sys
 import argparse
-from copy import copy
 
 from fromage.io import read_file as rf
 from fromage.io import edit_file as ef
@@ -54,12 +53,9 @@ def picker(in_name, out_name, labels, bonding, thresh, reverse=False):
 
     # to print out the non specified atoms
     if reverse:
-        to_remove = [copy(i) for i in selected]
-        selected = atoms.copy()
-        selected.atoms = []
-        for atom in atoms:
-            if atom not in to_remove:
-                selected.append(atom)
+        to_remove = selected
+        selected = atoms.take([i for i, atom in enumerate(atoms)
+                               if atom not in to_remove])
 
     selected.write_xyz(out_name)
 
@@ -20,7 +20,7 @@ from datetime import datetime
 from fromage.io import read_file as rf
 from fromage.io import edit_file as ef
 from fromage.io import parse_config_file as pcf
-from fromage.scripts.assign_charges import assign_charges
+from fromage.scripts.assign_charges import assign_charges, gauss_charge_table, apply_charge_table
 import fromage.utils.run_sequence as rs
 
 
@@ -61,18 +61,17 @@ if __name__ == '__main__':
                 charges[-1] -= sum(charges)
 
         if program.lower() == "gaussian":
-            mol_char = rf.mol_from_gauss(pop_file, pop=method)
-            mol_char.bonding = in_mol.bonding
-            mol_char.thresh = in_mol.thresh
-            charges = [i.q for i in mol_char]
-            # correct charges if they are not perfectly neutral
-            if sum(charges) != 0.0:
+            # the charges are corrected if they are not perfectly neutral and
+            # the table of charges is kept next to the log for the next run
+            fp_charges, rounds, total = gauss_charge_table(
+                pop_file, pop=method, bonding=in_mol.bonding,
+                thresh=in_mol.thresh, neutralise=True)
+            if total != 0.0:
                 output_file.write("Charge correction: " +
-                                  str(sum(charges)) + "\n")
-                mol_char[-1].q -= sum(charges)
+                                  str(total) + "\n")
 
             # assign charges to the rest of the cell
-            in_mol.populate(mol_char)
+            apply_charge_table(in_mol, fp_charges, rounds)
 
         output_file.close()
         return
@@ -92,7 +91,7 @@ if __name__ == '__main__':
     cell.vectors = inputs["vectors"]
     cell.bonding = inputs["bonding"]
     cell.thresh = inputs["bond_thresh"]
-    cell = cell.confined()
+    cell.confine()
 
     output_file.write("Read " + str(len(cell)) + " atoms in cell_file\n")
     output_file.close()
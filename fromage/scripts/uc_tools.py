@@ -12,6 +12,7 @@ import time
 
 from fromage.io import read_file as rf
 from fromage.io import edit_file as ef
+from fromage.utils.periodic import PeriodicCell
 
 
 def compare_id(id_i, id_j):
@@ -45,7 +46,7 @@ def compare_id(id_i, id_j):
         return sdiff
 
 
-def main(in_xyz, vectors_file, complete, confine, frac, dupli, output, bonding, thresh, bonding_str, print_mono, trans, clust_rad, inclusivity, center_label):
+def main(in_xyz, vectors_file, complete, confine, frac, dupli, per_dupli, output, bonding, thresh, bonding_str, print_mono, trans, clust_rad, inclusivity, center_label):
     vectors = rf.read_vectors(vectors_file)
     atoms = rf.mol_from_file(in_xyz,vectors=vectors)
 
@@ -84,9 +85,9 @@ def main(in_xyz, vectors_file, complete, confine, frac, dupli, output, bonding,
         mod_cell = deepcopy(atoms)
         print_now = False
 
-    if dupli:
+    if dupli or per_dupli:
         # purge duplicate atoms
-        mod_cell.remove_duplicates()
+        mod_cell.remove_duplicates(periodic=per_dupli)
         print_now = True
 
     if print_now:
@@ -104,6 +105,7 @@ def main(in_xyz, vectors_file, complete, confine, frac, dupli, output, bonding,
         clust.write_xyz("cluster_out.xyz")
 
     if print_mono:
+        cell = PeriodicCell(vectors)
         identities = []
         # for each molecule of the modified unit cell
         for mol_i in mols:
@@ -115,13 +117,10 @@ def main(in_xyz, vectors_file, complete, confine, frac, dupli, output, bonding,
             identity = []
             # for each dimer including the selected molecule
             for mol_j in rest:
-                dimer_distances = []
                 # get all of the interatomic distances across the dimer using the
                 # shortest lattice distance
-                for at_i in mol_i:
-                    for at_j in mol_j:
-                        dimer_distances.append(at_i.per_dist(at_j,vectors))
-                        dimer_distances.sort()
+                dist = cell.min_image(mol_i.get_pos(), mol_j.get_pos())[0]
+                dimer_distances = sorted(dist.ravel().tolist())
                 identity.append(dimer_distances)
                 identity.sort()
             identities.append(identity)
@@ -189,6 +188,8 @@ if __name__ == '__main__':
                         help="Create a supercell via lattice translations", default=None, type=int, nargs='*')
     parser.add_argument("-d", "--remove_duplicate_atoms",
                         help="Purge duplicate atoms", action="store_true")
+    parser.add_argument("-D", "--remove_periodic_duplicate_atoms",
+                        help="Purge duplicate atoms including those related by a lattice translation", action="store_true")
     parser.add_argument("-r", "--radius", help="Generate a cluster of molecules of the given radius. Radius 0.0 turns this off.",
                         default=0.0, type=float)
     parser.add_argument("-i", "--inclusivity", help="Choose between inclusive (inc) or exclusive (exc) radius selecting.", default='exc', type=str),
@@ -196,6 +197,6 @@ if __name__ == '__main__':
     user_input = sys.argv[1:]
     args = parser.parse_args(user_input)
     main(args.in_xyz, args.vectors, args.complete, args.confine, args.fractional,
-         args.remove_duplicate_atoms, args.output, args.bonding, args.thresh, args.bonding_string, args.mono, args.translations, args.radius, args.inclusivity, args.center)
+         args.remove_duplicate_atoms, args.remove_periodic_duplicate_atoms, args.output, args.bonding, args.thresh, args.bonding_string, args.mono, args.translations, args.radius, args.inclusivity, args.center)
     end = time.time()
     print("\nTotal time: {}s".format(round((end - start), 1)))
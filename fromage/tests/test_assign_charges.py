@@ -0,0 +1,74 @@
+import os
+import json
+import shutil
+import pytest
+from pytest import approx
+import numpy as np
+
+import fromage.io.read_file as rf
+import fromage.scripts.assign_charges as ac
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def pop_log(tmpdir):
+    """Return the path to a copy of a Gaussian population log"""
+    out_name = str(tmpdir.join("benzene_pop.log"))
+    shutil.copy(os.path.join(here, "benzene_pop.log"), out_name)
+    return out_name
+
+
+def test_gauss_charge_table(pop_log):
+    fp_charges, rounds, total = ac.gauss_charge_table(pop_log)
+    assert os.path.isfile(pop_log + ".charges.json")
+    mol = rf.mol_from_gauss(pop_log)
+    assert total == approx(np.sum(mol.charges()))
+    assert (fp_charges, rounds) == ac.charge_table(mol)
+    # the table is read back from the sidecar file while the log is the same
+    with open(pop_log + ".charges.json") as side_file:
+        stored = json.load(side_file)
+    for table in stored["tables"].values():
+        table["charges"][0][1] = 99.0
+    with open(pop_log + ".charges.json", "w") as side_file:
+        json.dump(stored, side_file)
+    assert 99.0 in ac.gauss_charge_table(pop_log)[0].values()
+    # tables of another version are not trusted
+    stored["version"] = ac.TABLE_VERSION + 1
+    with open(pop_log + ".charges.json", "w") as side_file:
+        json.dump(stored, side_file)
+    assert ac.gauss_charge_table(pop_log)[0] == fp_charges
+    with open(pop_log + ".charges.json") as side_file:
+        assert json.load(side_file)["version"] == ac.TABLE_VERSION
+    with open(pop_log, "a") as log_file:
+        log_file.write(" edited\n")
+    assert ac.gauss_charge_table(pop_log)[0] == fp_charges
+
+def test_apply_charge_table(pop_log):
+    clust = rf.mol_from_file(os.path.join(here, "benzene_clust.xyz"))
+    fp_charges, rounds, _ = ac.gauss_charge_table(pop_log, cache=False)
+    assert not os.path.isfile(pop_log + ".charges.json")
+    ac.apply_charge_table(clust, fp_charges, rounds)
+    # every C and every H of benzene has the same environment so each atom of
+    # the cluster gets the average charge of its element in the log
+    ref = rf.mol_from_gauss(pop_log)
+    ref_elems = np.array([atom.elem for atom in ref])
+    expected = [np.mean(ref.charges()[ref_elems == atom.elem]) for atom in clust]
+    assert clust.charges() == approx(expected)
+    by_mol = rf.mol_from_file(os.path.join(here, "benzene_clust.xyz"))
+    ac.apply_charge_table(by_mol, fp_charges, rounds, by_molecule=True)
+    assert by_mol.charges() == approx(expected)
+
+
+def test_charge_frames(pop_log):
+    clust = rf.mol_from_file(os.path.join(here, "benzene_clust.xyz"))
+    fp_charges, rounds, _ = ac.gauss_charge_table(pop_log, cache=False)
+    moved = clust.copy()
+    moved.translate([1.0, 2.0, 3.0])
+    serial = ac.charge_frames([clust, moved], fp_charges, rounds)
+    assert np.all(clust.charges() == 0)
+    assert serial[0] == approx(serial[1])
+    ac.apply_charge_table(clust, fp_charges, rounds)
+    assert serial[0] == approx(clust.charges())
+    pooled = ac.charge_frames([clust, moved], fp_charges, rounds, processes=2)
+    assert np.array(pooled) == approx(np.array(serial))
@@ -57,3 +57,24 @@ def test_per_lap_img(c_at, o_at, vectors):
 def test_put_in_cell(o_at_outside,vectors):
     in_box = o_at_outside.put_in_cell(vectors)
     assert in_box.x == approx(0.1)
+
+def test_shared_element(c_at):
+    """Atoms of the same element share one record"""
+    other = Atom("c", 1.0, 0.0, 0.0)
+    assert c_at.element is other.element
+    assert other.elem == "C"
+    assert c_at.cov == approx(0.68)
+
+def test_slots(c_at):
+    """Atoms carry no instance dictionary"""
+    assert not hasattr(c_at, "__dict__")
+
+def test_uid(c_at):
+    assert c_at.copy().uid == c_at.uid
+    assert c_at.v_translated([1.0, 0.0, 0.0]).uid != c_at.uid
+
+def test_eq_charge_tolerance(c_at):
+    other = c_at.copy()
+    other.q = c_at.q + 1.0
+    assert c_at != other
+    assert other != c_at
@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+
+from fromage.utils import connectivity as cn
+from fromage.utils.periodic import PeriodicCell
+
+
+@pytest.fixture
+def chain():
+    """Return positions of a chain of 4 atoms 1 apart and a lone atom"""
+    pos = np.array([[0.0, 0.0, 0.0],
+                    [10.0, 0.0, 0.0],
+                    [2.0, 0.0, 0.0],
+                    [1.0, 0.0, 0.0],
+                    [3.0, 0.0, 0.0]])
+    return pos
+
+
+def test_bond_graph(chain):
+    graph = cn.bond_graph(chain, np.zeros(5), 1.1)
+    pairs = sorted(zip(*graph.nonzero()))
+    assert pairs == [(0, 3), (2, 3), (2, 4), (3, 0), (3, 2), (4, 2)]
+
+
+def test_bond_graph_radii(chain):
+    radii = np.full(5, 0.5)
+    assert cn.bond_graph(chain, radii, 0.1).nnz == 6
+    assert cn.bond_graph(chain, radii, -0.1).nnz == 0
+
+
+def test_bfs_order(chain):
+    graph = cn.bond_graph(chain, np.zeros(5), 1.1)
+    assert cn.bfs_order(graph, [4]) == [4, 2, 3, 0]
+    allowed = np.array([True, True, True, False, True])
+    assert cn.bfs_order(graph, [4], allowed) == [4, 2]
+
+
+def test_molecule_orders(chain):
+    graph = cn.bond_graph(chain, np.zeros(5), 1.1)
+    mols = [m.tolist() for m in cn.molecule_orders(graph)]
+    assert mols == [[0, 3, 2, 4], [1]]
+
+
+def test_path_lengths(chain):
+    graph = cn.bond_graph(chain, np.zeros(5), 1.1)
+    lengths = cn.path_lengths(graph).toarray()
+    assert lengths[4].tolist() == [3, 0, 1, 2, 0]
+    assert np.all(lengths == lengths.T)
+    short = cn.path_lengths(graph, max_depth=2).toarray()
+    assert short[4].tolist() == [0, 0, 1, 2, 0]
+
+
+def test_wl_fingerprints(chain):
+    graph = cn.bond_graph(chain, np.zeros(5), 1.1)
+    fps, rounds = cn.wl_fingerprints(graph, np.zeros(5, dtype=int))
+    assert fps.dtype == np.uint64
+    assert rounds == 1
+    assert fps[0] == fps[4] and fps[2] == fps[3]
+    assert len(set(fps.tolist())) == 3
+    # the fingerprints do not depend on the order of the atoms
+    order = [4, 1, 3, 0, 2]
+    graph = cn.bond_graph(chain[order], np.zeros(5), 1.1)
+    assert cn.wl_fingerprints(graph, np.zeros(5, dtype=int), rounds)[0].tolist() == fps[order].tolist()
+
+
+def test_periodic_bond_graph():
+    cell = PeriodicCell(np.identity(3) * 10)
+    pos = np.array([[0.5, 5.0, 5.0],
+                    [9.7, 5.0, 5.0],
+                    [5.0, 5.0, 5.0]])
+    graph, offsets = cn.periodic_bond_graph(cell, pos, np.zeros(3), 1.0)
+    assert sorted(zip(*graph.nonzero())) == [(0, 1), (1, 0)]
+    assert offsets.tolist() == [[-1, 0, 0], [1, 0, 0]]
+
+
+def test_periodic_molecule_orders():
+    cell = PeriodicCell(np.identity(3) * 10)
+    # a chain going backwards through the boundary and a lone atom
+    pos = np.array([[0.5, 5.0, 5.0],
+                    [5.0, 5.0, 5.0],
+                    [8.1, 5.0, 5.0],
+                    [9.7, 5.0, 5.0],
+                    [8.9, 5.0, 5.0],
+                    [7.3, 5.0, 5.0]])
+    graph, offsets = cn.periodic_bond_graph(cell, pos, np.zeros(6), 1.0)
+    mols, shifts = cn.periodic_molecule_orders(graph, offsets)
+    assert [m.tolist() for m in mols] == [[0, 3, 4, 2, 5], [1]]
+    assert shifts[0].tolist() == [[0, 0, 0]] + [[-1, 0, 0]] * 4
+    found, bfs_shifts = cn.periodic_bfs_order(graph, offsets, [0])
+    assert found == mols[0].tolist()
+    assert bfs_shifts.tolist() == shifts[0].tolist()
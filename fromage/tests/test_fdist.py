@@ -0,0 +1,70 @@
+import pytest
+from pytest import approx
+import numpy as np
+
+from fromage.fdist import fdist as fd
+
+
+@pytest.fixture
+def points():
+    """Return a 4 x 3 array of points"""
+    out_points = np.array([[0.0, 0.0, 0.0],
+                           [1.0, 0.0, 0.0],
+                           [0.0, 2.0, 0.0],
+                           [0.0, 0.0, 3.0]])
+    return out_points
+
+
+def test_dist_set(points):
+    assert fd.dist_set(points[1], points) == approx([1.0, 0.0, np.sqrt(5), np.sqrt(10)])
+    assert fd.dist2_set([0, 0, 0], points) == approx([0.0, 1.0, 4.0, 9.0])
+
+
+def test_dist_mat(points):
+    mat = fd.dist_mat(points)
+    assert mat.shape == (4, 4)
+    assert mat[2, 3] == approx(np.sqrt(13))
+    assert fd.dist2_mat(points[:2], points).shape == (2, 4)
+
+
+def test_cutoff_pairs(points):
+    ii, jj, dd = fd.cutoff_pairs(points, 2.0)
+    assert list(zip(ii, jj)) == [(0, 1), (0, 2)]
+    assert dd == approx([1.0, 2.0])
+
+
+def test_cutoff_pairs_radii(points):
+    rad = np.array([0.0, 0.0, 0.0, 1.0])
+    ii, jj, dd = fd.cutoff_pairs(points[:1], 2.0, points, rad_b=rad)
+    assert list(jj) == [0, 1, 2, 3]
+
+
+def test_wrong_dtype():
+    with pytest.raises(TypeError):
+        fd.c_dist_set(np.zeros(3, dtype=np.float32), np.zeros(3), np.zeros(1))
+
+
+def test_short_output(points):
+    out = np.full(3, -1.0)
+    assert fd.c_dist_mat(np.zeros(6), np.zeros(6), out) == -1
+    assert np.all(out == -1.0)
+    with pytest.raises(ValueError):
+        fd.grid_proximity(np.zeros((2, 4)), points[:2], points[2:], mol_weights=[1.0])
+
+
+def test_grid_proximity(points):
+    grid = np.zeros((2, 4))
+    grid[0, :3] = [0.4, 0.0, 0.0]
+    grid[1, :3] = [0.0, 1.8, 0.0]
+    fd.grid_proximity(grid, points[:2], points[2:])
+    assert list(grid[:, 3]) == [1.0, 0.0]
+    # heavy weights push the points towards the rest
+    fd.grid_proximity(grid, points[:2], points[2:], mol_weights=[100.0, 100.0])
+    assert list(grid[:, 3]) == [0.0, 0.0]
+
+
+def test_grid_vdw(points):
+    grid = np.zeros((3, 4))
+    grid[:, 0] = [0.5, 2.0, 3.0]
+    fd.grid_vdw(grid, points[:2], [0.1, 1.5])
+    assert list(grid[:, 3]) == [1.0, 1.0, 0.0]
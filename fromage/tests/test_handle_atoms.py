@@ -0,0 +1,33 @@
+import pytest
+import fromage.io.read_file as rf
+from fromage.utils import handle_atoms as ha
+
+
+@pytest.fixture
+def at_list():
+    """Return the atoms of a water dimer"""
+    return list(rf.mol_from_file("h2o_dimer.xyz"))
+
+
+def test_select(at_list):
+    first = ha.select(1.6, at_list, 0)
+    second = ha.select(1.6, at_list, 4)
+    assert sorted(at_list.index(at) for at in first) == [0, 1, 2]
+    assert sorted(at_list.index(at) for at in second) == [3, 4, 5]
+
+
+def test_make_molecules(at_list):
+    molecules = ha.make_molecules(at_list, 1.6)
+    assert len(molecules) == 2
+    for molecule in molecules:
+        assert len(molecule) == 3
+        assert sorted(at.elem for at in molecule) == ["H", "H", "O"]
+
+
+def test_make_cluster(at_list):
+    # only the first oxygen seeds the small cluster
+    assert len(ha.make_cluster(at_list, 0.5, 1.6)) == 3
+    # both oxygens seed the large one
+    clust = ha.make_cluster(at_list, 3.1, 1.6)
+    assert len(clust) == 6
+    assert sorted(at.elem for at in clust) == ["H"] * 4 + ["O"] * 2
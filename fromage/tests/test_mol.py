@@ -4,6 +4,7 @@ import fromage.io.read_file as rf
 import numpy as np
 from fromage.utils.atom import Atom
 from fromage.utils.mol import Mol
+from fromage.fdist import fdist as fd
 
 
 @pytest.fixture
@@ -84,6 +85,25 @@ def test_duplicity(h2o_dup):
     h2o_dup.remove_duplicates()
     assert len(h2o_dup) == 3
 
+def test_duplicity_map(h2o_dup):
+    """The merge map points each atom to the one it was merged into"""
+    n_before = len(h2o_dup)
+    merge_map = h2o_dup.remove_duplicates()
+    assert len(merge_map) == n_before
+    assert set(merge_map) == {0, 1, 2}
+
+def test_per_duplicity(h2o_dimer):
+    """Atoms related by a lattice translation are duplicates if periodic"""
+    h2o_dimer.vectors = np.identity(3) * 20.0
+    shifted = h2o_dimer.copy()
+    shifted.translate(h2o_dimer.vectors[1])
+    h2o_dimer += shifted
+    h2o_dimer.remove_duplicates()
+    assert len(h2o_dimer) == 12
+    merge_map = h2o_dimer.remove_duplicates(periodic=True)
+    assert len(h2o_dimer) == 6
+    assert list(merge_map[6:]) == list(range(6))
+
 def test_len(h2o_dimer):
     """The len method is implemented"""
     assert len(h2o_dimer) == 6
@@ -194,6 +214,18 @@ def test_centered_supercell_alt(hc1_cell):
     new_cell = hc1_cell.centered_supercell(trans, from_origin=True)
     assert len(new_cell) == approx(1184)
 
+def test_lazy_supercell(hc1_cell):
+    trans = np.array([1,2,1])
+    full = hc1_cell.centered_supercell(trans)
+    lazy = hc1_cell.centered_supercell(trans, lazy=True)
+    assert len(lazy) == len(full)
+    assert np.all(lazy.vectors == full.vectors)
+    assert lazy.get_pos([5, 1000]) == approx(full.get_pos()[[5, 1000]])
+    assert lazy[1000].get_pos() == approx(full[1000].get_pos())
+    assert lazy[1000].elem == full[1000].elem
+    assert lazy.take(slice(10, 20)).get_pos() == approx(full.get_pos()[10:20])
+    assert lazy.materialise().get_pos() == approx(full.get_pos())
+
 def test_make_cluster(hc1_cell):
     clust = hc1_cell.make_cluster(15)
     assert len(clust) == 296
@@ -202,6 +234,16 @@ def test_confine(hc1_complete_cell):
     conf = hc1_complete_cell.confined()
     assert conf[19].x == approx(-0.202155)
 
+def test_confine_inplace(hc1_complete_cell):
+    conf = hc1_complete_cell.confined()
+    hc1_complete_cell.confine()
+    assert hc1_complete_cell.get_pos() == approx(conf.get_pos())
+
+def test_frac_round_trip(hc1_cell):
+    frac = hc1_cell.dir_to_frac_pos()
+    assert np.all((frac.get_pos() >= 0) & (frac.get_pos() <= 1))
+    assert frac.frac_to_dir_pos().get_pos() == approx(hc1_cell.confined().get_pos())
+
 def test_set_bonding_str(h2o_dimer):
     h2o_dimer.set_bonding_str("dis")
     assert h2o_dimer.bonding == "dis"
@@ -218,3 +260,203 @@ def test_set_bonding_str(h2o_dimer):
     h2o_dimer.set_bonding_str("-0.1cov")
     assert h2o_dimer.bonding == "cov"
     assert h2o_dimer.thresh == -0.1
+
+def test_atom_view_writes_through(h2o_dimer):
+    """Atoms handed out by a Mol modify the Mol's arrays"""
+    h2o_dimer[1].x = 5.0
+    h2o_dimer[2].q = 0.3
+    assert h2o_dimer.get_pos()[1][0] == approx(5.0)
+    assert h2o_dimer.charges()[2] == approx(0.3)
+
+def test_array_shapes(h2o_dimer, newat):
+    h2o_dimer.append(newat)
+    assert h2o_dimer.get_pos().shape == (7, 3)
+    assert h2o_dimer.charges().shape == (7,)
+    assert h2o_dimer[-1].elem == "C"
+
+def test_pop_detaches(h2o_dimer):
+    popped = h2o_dimer.pop(0)
+    popped.x = 100.0
+    assert len(h2o_dimer) == 5
+    assert all(at.x != 100.0 for at in h2o_dimer)
+
+def test_view_stale_after_remove(h2o_dimer, newat):
+    """Views are invalidated, not retargeted, when rows are removed or inserted"""
+    last = h2o_dimer[5]
+    kept = h2o_dimer[4].copy()
+    h2o_dimer.remove(h2o_dimer[0])
+    with pytest.raises(RuntimeError):
+        last.x
+    assert kept in h2o_dimer
+    first = h2o_dimer[0]
+    h2o_dimer.insert(0, newat)
+    with pytest.raises(RuntimeError):
+        first.x = 1.0
+    first = h2o_dimer[0]
+    h2o_dimer[0] = kept
+    with pytest.raises(RuntimeError):
+        first.elem
+
+def test_view_valid_after_append(h2o_dimer, newat):
+    first = h2o_dimer[0]
+    h2o_dimer.append(newat)
+    h2o_dimer.translate(np.array([1.0, 0.0, 0.0]))
+    assert first.x == approx(1.0)
+
+def test_copy_on_write(h2o_dimer):
+    """Copies share their arrays until one of them is modified"""
+    new_mol = h2o_dimer.copy()
+    assert np.shares_memory(new_mol._pos, h2o_dimer._pos)
+    new_mol[0].x = 10.0
+    assert h2o_dimer[0].x != approx(10.0)
+    assert not np.shares_memory(new_mol._pos, h2o_dimer._pos)
+
+def test_slice_is_mol(h2o_dimer):
+    """Slicing returns a Mol which does not affect the original when modified"""
+    water = h2o_dimer[3:]
+    assert isinstance(water, Mol)
+    assert len(water) == 3
+    water.translate(np.array([1.0, 0.0, 0.0]))
+    assert water[0].x == approx(h2o_dimer[3].x + 1.0)
+
+def test_membership_moved_copy(h2o_dimer):
+    """A moved copy keeps its uid but is found by value"""
+    mol = h2o_dimer.select(0)
+    shifted = mol.copy()
+    shifted.translate([5.0, 0.0, 0.0])
+    mol += shifted
+    assert mol.index(shifted[0]) == 3
+    mol.remove(shifted[0])
+    assert len(mol) == 5
+    assert mol[0].get_pos() == approx(h2o_dimer[0].get_pos())
+    assert shifted[0] not in mol
+    assert h2o_dimer[0] in mol
+
+def test_membership_by_value(h2o_dimer):
+    """Atoms with a different identity are compared by value"""
+    at = h2o_dimer[4].copy()
+    at._uid = -1
+    assert at in h2o_dimer
+    assert h2o_dimer.index(at) == 4
+
+def test_es_pot_many(h2o_dimer):
+    h2o_dimer.change_charges([-0.8, 0.4, 0.4, -0.8, 0.4, 0.4])
+    points = np.array([[5.0, 5.0, 5.0], [-3.0, 1.0, 2.0], [0.5, -4.0, 1.0]])
+    single = [h2o_dimer.es_pot(point) for point in points]
+    # a tiny memory cap forces one point per chunk
+    assert h2o_dimer.es_pot_many(points, max_mem=1) == approx(single)
+
+def test_es_pot_many_excl(h2o_dimer):
+    h2o_dimer.change_charges([-0.8, 0.4, 0.4, -0.8, 0.4, 0.4])
+    point = h2o_dimer[0].get_pos()
+    pot = h2o_dimer.es_pot_many([point], excl_rad=0.01)[0]
+    assert pot == approx(h2o_dimer[1:].es_pot(point))
+
+
+def test_cell_follows_vectors(h2o_dimer):
+    h2o_dimer.vectors = np.identity(3) * 10
+    assert h2o_dimer.cell.inv == approx(np.identity(3) * 0.1)
+    h2o_dimer.vectors[0, 0] = 20
+    assert h2o_dimer.cell.inv[0, 0] == approx(0.05)
+
+
+def test_frac_pos_cache(h2o_dimer):
+    h2o_dimer.vectors = np.identity(3) * 10
+    frac = h2o_dimer.frac_pos()
+    assert frac == approx(h2o_dimer.get_pos() * 0.1)
+    # reused until something changes
+    assert h2o_dimer.frac_pos() is frac
+    h2o_dimer.change_charges(np.ones(len(h2o_dimer)))
+    assert h2o_dimer.frac_pos() is frac
+    assert h2o_dimer.copy().frac_pos() is frac
+    h2o_dimer[0].x += 1.0
+    assert h2o_dimer.frac_pos()[0, 0] == approx(frac[0, 0] + 0.1)
+    h2o_dimer.vectors = np.identity(3) * 20
+    assert h2o_dimer.frac_pos() == approx(h2o_dimer.get_pos() * 0.05)
+
+
+def test_bond_cache(h2o_dimer):
+    graph = h2o_dimer.bond_graph()
+    assert h2o_dimer.bond_graph() is graph
+    h2o_dimer.change_charges(np.ones(len(h2o_dimer)))
+    assert h2o_dimer.bond_graph() is graph
+    copy_mol = h2o_dimer.copy()
+    assert copy_mol.bond_graph() is graph
+    # different settings have their own value
+    h2o_dimer.set_bonding(bonding='cov', thresh=0.2)
+    assert h2o_dimer.bond_graph() is not graph
+    h2o_dimer.set_bonding(bonding='dis', thresh=1.8)
+    assert h2o_dimer.bond_graph() is graph
+    # moving atoms forgets it, but not in the copy
+    h2o_dimer.translate([1.0, 0.0, 0.0])
+    assert h2o_dimer.bond_graph() is not graph
+    assert copy_mol.bond_graph() is graph
+
+def test_populate_by_molecule(hc1_cell):
+    mol = hc1_cell.complete_cell()[1][0]
+    mol.change_charges(np.linspace(0.1, 1, len(mol)))
+    clust = hc1_cell.make_cluster(12)
+    whole = clust.copy()
+    whole.populate(mol)
+    clust.populate(mol, by_molecule=True)
+    assert clust.charges() == approx(whole.charges())
+    assert np.count_nonzero(clust.charges()) == len(clust)
+
+def test_make_cluster_inc(hc1_cell):
+    clust = hc1_cell.make_cluster(9, mode='inc')
+    assert len(clust) == 962
+    # every molecule has an atom within the radius
+    for mol in clust.segregate():
+        assert np.min(np.linalg.norm(mol.get_pos(), axis=1)) < 9
+
+def test_make_cluster_central(hc1_cell):
+    central = hc1_cell.complete_cell()[1][0]
+    # far from the origin to check that the cluster follows the central mol
+    central.translate(hc1_cell.vectors[0] * 3)
+    for mode in ('exc', 'inc'):
+        clust = hc1_cell.make_cluster(6, mode=mode, central_mol=central)
+        assert len(clust) > 0
+        for mol in clust.segregate():
+            dist = fd.dist_mat(mol.get_pos(), central.get_pos()).min(axis=1)
+            if mode == 'exc':
+                assert np.all(dist < 6)
+            else:
+                assert np.any(dist < 6)
+    # the central molecule is in its own cluster
+    clust = hc1_cell.make_cluster(6, central_mol=central)
+    assert np.min(fd.dist_mat(central.get_pos(), clust.get_pos()), axis=1) == approx(np.zeros(len(central)))
+
+def test_make_cluster_exc_small(hc1_cell):
+    # no molecule of the cell fits whole in a sphere of 6 Angstrom
+    with pytest.warns(UserWarning):
+        clust = hc1_cell.make_cluster(6)
+    assert len(clust) == 0
+    with pytest.warns(UserWarning):
+        assert list(hc1_cell.iter_cluster(6)) == []
+    # but molecules fit in the union of spheres around a central molecule
+    central = hc1_cell.complete_cell()[1][0]
+    clust = hc1_cell.make_cluster(6, central_mol=central)
+    assert len(clust) == 37
+    assert len(hc1_cell.make_cluster(6, mode='inc')) > 0
+
+def test_iter_cluster(hc1_cell):
+    def rows(mol):
+        return sorted(map(tuple, np.round(mol.get_pos(), 5).tolist()))
+    for mode in ('exc', 'inc'):
+        clust = hc1_cell.make_cluster(12, mode=mode)
+        assert len(clust) > 0
+        streamed = Mol([])
+        for mol in hc1_cell.iter_cluster(12, mode=mode):
+            streamed.extend(mol)
+        assert rows(streamed) == rows(clust)
+
+def test_write_cluster(hc1_cell, tmpdir):
+    out_name = str(tmpdir.join("clust.xyz"))
+    hc1_cell.write_cluster(out_name, 15)
+    clust = rf.mol_from_file(out_name)
+    assert len(clust) == 296
+    with open(out_name) as out_file:
+        assert out_file.readline() == "296\n"
+    pts_name = str(tmpdir.join("clust.pts"))
+    hc1_cell.write_cluster(pts_name, 15, points=True)
+    assert len(rf.read_points(pts_name)) == 296
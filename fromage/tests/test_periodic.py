@@ -0,0 +1,113 @@
+import pytest
+from pytest import approx
+import numpy as np
+
+from fromage.utils.periodic import PeriodicCell, neighbour_shifts, reduce_lattice, \
+    translation_grid, lattice_images
+
+
+@pytest.fixture
+def cell():
+    """Return a monoclinic PeriodicCell"""
+    vectors = np.array([[12.1199998856, 0.0, 0.0],
+                        [0.0, 10.2849998474, 0.0],
+                        [-5.4720203118, 0.0, 11.2441994632]])
+    return PeriodicCell(vectors)
+
+
+def brute_min_image(cell, a, b):
+    """Shortest distance from a to any image of b up to four cells away"""
+    mults = range(-4, 5)
+    shifts = np.array([(i, j, k) for i in mults for j in mults for k in mults])
+    imgs = b + np.dot(shifts, cell.vectors)
+    return np.min(np.linalg.norm(imgs - a, axis=1))
+
+
+def test_frac_round_trip(cell):
+    pos = np.array([[1.0, 2.0, 3.0], [-4.0, 20.0, 0.5]])
+    assert cell.cart(cell.frac(pos)) == approx(pos)
+    assert cell.frac(cell.vectors) == approx(np.identity(3))
+
+
+def test_wrap(cell):
+    frac = cell.frac(cell.wrap([[-1.0, 25.0, 30.0]]))
+    assert np.all(frac >= 0) and np.all(frac < 1)
+
+
+def test_neighbour_shifts():
+    assert neighbour_shifts.shape == (27, 3)
+    assert len(set(map(tuple, neighbour_shifts))) == 27
+
+
+def test_min_image(cell):
+    rng = np.random.RandomState(0)
+    pos_a = cell.cart(rng.uniform(-1, 2, (6, 3)))
+    pos_b = cell.cart(rng.uniform(-1, 2, (5, 3)))
+    dist, offsets = cell.min_image(pos_a, pos_b)
+    assert dist.shape == (6, 5)
+    assert offsets.shape == (6, 5, 3)
+    for i, a in enumerate(pos_a):
+        for j, b in enumerate(pos_b):
+            assert dist[i, j] == approx(brute_min_image(cell, a, b))
+            img = b + cell.offset_vecs(offsets[i, j])
+            assert np.linalg.norm(img - a) == approx(dist[i, j])
+
+
+def test_min_image_chunks(cell):
+    rng = np.random.RandomState(1)
+    pos = cell.cart(rng.uniform(0, 1, (10, 3)))
+    dist, _ = cell.min_image(pos)
+    assert cell.min_image(pos, max_mem=1)[0] == approx(dist)
+    assert np.diag(dist) == approx(np.zeros(10))
+
+
+def test_min_image_pairs(cell):
+    pos_a = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.5]])
+    pos_b = pos_a + np.array([cell.vectors[1] + [0.1, 0.0, 0.0],
+                              -2 * cell.vectors[2]])
+    dist, offsets = cell.min_image_pairs(pos_a, pos_b)
+    assert dist == approx([0.1, 0.0])
+    assert offsets.tolist() == [[0, -1, 0], [0, 0, 2]]
+
+
+def test_reduce_lattice():
+    # the cubic lattice in a very skewed basis
+    vectors = np.array([[1.0, 0.0, 0.0],
+                        [5.0, 1.0, 0.0],
+                        [13.0, 7.0, 1.0]])
+    reduced, transform = reduce_lattice(vectors)
+    assert np.dot(transform, vectors) == approx(reduced)
+    assert abs(round(np.linalg.det(transform))) == 1
+    assert np.linalg.norm(reduced, axis=1) == approx([1.0, 1.0, 1.0])
+
+
+def test_min_image_skewed():
+    vectors = np.array([[3.0, 0.0, 0.0],
+                        [14.7, 0.5, 0.0],
+                        [8.1, 6.3, 2.0]])
+    cell = PeriodicCell(vectors)
+    rng = np.random.RandomState(2)
+    pos_a = cell.cart(rng.uniform(0, 1, (4, 3)))
+    pos_b = cell.cart(rng.uniform(0, 1, (4, 3)))
+    dist, offsets = cell.min_image(pos_a, pos_b)
+    assert abs(round(np.linalg.det(cell.transform))) == 1
+    # brute force over a wider range of images in the reduced basis, around
+    # the image closest in fractional coordinates
+    mults = range(-3, 4)
+    shifts = np.array([(i, j, k) for i in mults for j in mults for k in mults])
+    for i, a in enumerate(pos_a):
+        for j, b in enumerate(pos_b):
+            base = np.round(np.dot(b - a, np.linalg.inv(cell.reduced)))
+            imgs = b + np.dot(shifts - base, cell.reduced)
+            assert dist[i, j] == approx(np.min(np.linalg.norm(imgs - a, axis=1)))
+            img = b + cell.offset_vecs(offsets[i, j])
+            assert np.linalg.norm(img - a) == approx(dist[i, j])
+
+
+def test_lattice_images(cell):
+    grid = translation_grid(range(2), range(-1, 1), [3])
+    assert grid.tolist() == [[0, -1, 3], [0, 0, 3], [1, -1, 3], [1, 0, 3]]
+    pos = np.array([[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+    images = lattice_images(pos, cell.vectors, grid)
+    assert images.shape == (8, 3)
+    assert images[5] == approx(pos[1] + cell.cart(grid[2]))
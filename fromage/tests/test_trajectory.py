@@ -0,0 +1,59 @@
+import pytest
+from pytest import approx
+import numpy as np
+
+import fromage.io.read_file as rf
+from fromage.utils.mol import Mol
+
+
+@pytest.fixture
+def h2o_traj():
+    """Return a Trajectory of three frames of a water dimer"""
+    out_traj = rf.read_traj("h2o_traj.xyz")
+    return out_traj
+
+
+def test_read_traj(h2o_traj):
+    assert len(h2o_traj) == 3
+    assert h2o_traj.frames.shape == (3, 6, 3)
+    assert h2o_traj[2][0].x == approx(0.2)
+
+
+def test_read_traj_uneven(tmp_path):
+    path = tmp_path / "uneven.xyz"
+    path.write_text("2\n\nH 0 0 0\nH 0 0 1\n"
+                    "3\n\nH 0 0 0\nH 0 0 1\nH 0 0 2\n")
+    with pytest.raises(ValueError, match="frame 1 has 3 atoms, expected 2"):
+        rf.read_traj(str(path))
+
+
+def test_frame_is_mol(h2o_traj):
+    mol = h2o_traj[1]
+    assert isinstance(mol, Mol)
+    assert mol[1].elem == "H"
+    assert np.shares_memory(mol._pos, h2o_traj.frames)
+
+
+def test_frame_copy_on_write(h2o_traj):
+    mol = h2o_traj[0]
+    mol.translate(np.array([1.0, 0.0, 0.0]))
+    assert h2o_traj.frames[0, 0, 0] == approx(0.0)
+
+
+def test_slice_shares(h2o_traj):
+    sub = h2o_traj[1:]
+    assert len(sub) == 2
+    assert np.shares_memory(sub.frames, h2o_traj.frames)
+    assert sub[0][0].x == approx(0.1)
+
+
+def test_same_atoms(h2o_traj):
+    assert np.all(h2o_traj[0].uids() == h2o_traj[2].uids())
+    # membership compares positions so a moved atom is not in another frame
+    assert h2o_traj[0][3] not in h2o_traj[2]
+
+
+def test_read_pos_last():
+    atoms = rf.read_pos("h2o_traj.xyz")
+    assert len(atoms) == 6
+    assert atoms[0].x == approx(0.2)
@@ -11,10 +11,19 @@ Modules
     calc
         Defines different Calc classes which run different electronic structure
         programs
+    connectivity
+        Finds the bonds between atoms as a sparse graph and the molecules
+        they form
     handle_atoms
         Manipulates lists of Atom objects
     per_table
         Data from the periodic table
+    periodic
+        Defines the PeriodicCell object for fractional coordinates and
+        minimum image distances in a lattice
+    trajectory
+        Defines the Trajectory object which stores several configurations of
+        the same atoms as one array
     volume
         Tools for the calculation of vdW spheres and Voronoi volumes in a
         molecular crystal
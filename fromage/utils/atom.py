@@ -5,8 +5,31 @@ from collections import Counter
 from copy import deepcopy
 
 from fromage.utils import per_table as per
+from fromage.utils.periodic import as_cell
 from fromage.fdist import fdist as fd
 
+# the next unused atom identity
+_uid_count = 0
+
+
+def take_uids(n=1):
+    """
+    Reserve a block of unused atom identities
+
+    Parameters
+    ----------
+    n : int
+        The amount of identities to reserve
+    Returns
+    -------
+    start : int
+        The first identity of the block. The block is range(start, start + n)
+
+    """
+    global _uid_count
+    start = _uid_count
+    _uid_count += n
+    return start
 
 class Atom(object):
     """
@@ -15,8 +38,29 @@ class Atom(object):
     Sometimes also used to represent point charges as atoms of element "point".
     Several functions are present like translate or find_centroid.
 
+    The atoms obtained by indexing or iterating over a Mol are lightweight
+    views on the arrays of that Mol: reading or setting their coordinates,
+    charge or element reads or sets the corresponding row of the Mol. Use
+    copy() to get a standalone atom. A view is tied to a row, not to an atom,
+    so once atoms are removed, inserted or replaced in its Mol (remove, pop,
+    insert, clear, item assignment or setting atoms) using it raises a
+    RuntimeError instead of reading another atom. Appending, extending and
+    moving atoms keep the views valid.
+
+    Atoms use __slots__ and share one per_table.Element record per element for
+    the atomic number, valence electrons, radii and mass.
+
+    Every atom carries an integer identity, uid, which is kept by copies and by
+    the atoms of copied Mols but not by translated copies. Mol membership tests
+    use it to find the row of an atom without comparing every row, as long as
+    that row is still equal to the atom.
+
     Attributes
     ----------
+    uid : int
+        Identity of the atom
+    element : Element object
+        Shared record of the element data
     x,y,z : floats
         Cartesian coordinates
     q : float
@@ -26,55 +70,190 @@ class Atom(object):
         function which takes the connectivity matrix as argument
     kind : tuple
         Tuple of (atom element,connectivity). This defines the kind of atom
-    total_e : int
+    at_num : int
         Atomic number
-    valence : int
+    valence_e : int
         Number of valence electrons
     vdw : float
         Van der Waals radius in Angstrom
     cov : float
         Covalent radius in Angstrom
     """
+    __slots__ = ("_mol", "_index", "_gen", "_uid", "_element", "_x", "_y", "_z", "_q",
+                 "_kind", "num", "es")
 
     def __init__(self, elemIn="H", xIn=0.0, yIn=0.0, zIn=0.0, qIn=0.0, num=1):
+        # Atoms handed out by a Mol are views on the arrays of that Mol. A
+        # standalone atom has no Mol and keeps its own values
+        self._mol = None
+        self._index = None
+        self._gen = None
+        self._uid = take_uids()
         self.elem = elemIn
-        self.x = 0.0
-        self.y = 0.0
-        self.z = 0.0
-        self.q = 0.0
+        self._x = 0.0
+        self._y = 0.0
+        self._z = 0.0
+        self._q = 0.0
         self.num = 1
         # Atom objects with no charge can have feel a finite electostatic
         # potential which we include as
         self.es = 0.0
-        # The connectivity is a frozenset (because a list would have a built-in ordering)
-        # of the tuples of the form (A,N) where A is an tuple of different
-        # distances to atoms e.g. ("C",4) if there is a carbon 4 bonds away. N
-        # is the amount of carbons 4 bonds away
-        self.connectivity = None
         # Kind is a tuple of (elem,connectivity) and as such is enough to define
         # an atom type at least as well as it would be defined in a forcefield
         # e.g. in acrolein: This is a C atom with 1 O 1-away, an H 1-away, a C
         # 1-away, an H 2-away, a C 2-away and 2 H 3-away
-        self.kind = None
+        # The connectivity is a frozenset (because a list would have a built-in ordering)
+        # of the tuples of the form (A,N) where A is an tuple of different
+        # distances to atoms e.g. ("C",4) if there is a carbon 4 bonds away. N
+        # is the amount of carbons 4 bonds away
+        self._kind = None
 
         # deal with some sneaky int that may be disguised as float
         try:
-            self.x = float(xIn)
-            self.y = float(yIn)
-            self.z = float(zIn)
-            self.q = float(qIn)
+            self._x = float(xIn)
+            self._y = float(yIn)
+            self._z = float(zIn)
+            self._q = float(qIn)
 
         except ValueError:
             print("Some coordinates or charges cannot be cast to float!")
 
-        table = per.periodic
-        self.at_num = table[self.elem.lower()]["at_num"]
-        self.valence_e = table[self.elem.lower()]["valence_e"]
-        self.cov = table[self.elem.lower()]["cov"]
-        self.vdw = table[self.elem.lower()]["vdw"]
-        self.mass = table[self.elem.lower()]["mass"]
-        # to string methods to be used mainly for debugging and .qc file
+    @classmethod
+    def _view(cls, mol, index):
+        """Return an Atom which reads and writes row index of a Mol"""
+        view = cls.__new__(cls)
+        view._mol = mol
+        view._index = index
+        view._gen = mol._generation
+        view.num = 1
+        view.es = 0.0
+        return view
+
+    def _row(self):
+        """Return the row viewed in the Mol, which must not have been reordered"""
+        if self._gen != self._mol._generation:
+            raise RuntimeError("Atom view is stale since atoms were removed, "
+                               "inserted or replaced in its Mol. Index the "
+                               "Mol again or copy() the atom beforehand")
+        return self._index
+
+    # the identity, positions, charge, element and kind of an atom are read
+    # from its Mol if it has one
+    @property
+    def uid(self):
+        if self._mol is None:
+            return self._uid
+        return int(self._mol._ids[self._row()])
+
+    @property
+    def x(self):
+        if self._mol is None:
+            return self._x
+        return self._mol._pos[self._row(), 0]
+
+    @x.setter
+    def x(self, value):
+        if self._mol is None:
+            self._x = value
+        else:
+            self._mol._set_coord(self._row(), 0, value)
+
+    @property
+    def y(self):
+        if self._mol is None:
+            return self._y
+        return self._mol._pos[self._row(), 1]
+
+    @y.setter
+    def y(self, value):
+        if self._mol is None:
+            self._y = value
+        else:
+            self._mol._set_coord(self._row(), 1, value)
+
+    @property
+    def z(self):
+        if self._mol is None:
+            return self._z
+        return self._mol._pos[self._row(), 2]
+
+    @z.setter
+    def z(self, value):
+        if self._mol is None:
+            self._z = value
+        else:
+            self._mol._set_coord(self._row(), 2, value)
+
+    @property
+    def q(self):
+        if self._mol is None:
+            return self._q
+        return self._mol._q[self._row()]
+
+    @q.setter
+    def q(self, value):
+        if self._mol is None:
+            self._q = value
+        else:
+            self._mol._set_charge(self._row(), value)
+
+    @property
+    def element(self):
+        if self._mol is None:
+            return self._element
+        return per.elements[self._mol._elem[self._row()]]
+
+    @property
+    def elem(self):
+        return self.element.symbol
+
+    @elem.setter
+    def elem(self, value):
+        if self._mol is None:
+            self._element = per.element(value)
+        else:
+            self._mol._set_elem(self._row(), per.elem_index[value.lower()])
+
+    @property
+    def kind(self):
+        if self._mol is None:
+            return self._kind
+        return self._mol._kind[self._row()]
+
+    @kind.setter
+    def kind(self, value):
+        if self._mol is None:
+            self._kind = value
+        else:
+            self._mol._set_kind(self._row(), value)
+
+    @property
+    def connectivity(self):
+        if self.kind is None:
+            return None
+        return self.kind[1]
+
+    @property
+    def at_num(self):
+        return self.element.at_num
+
+    @property
+    def valence_e(self):
+        return self.element.valence_e
 
+    @property
+    def cov(self):
+        return self.element.cov
+
+    @property
+    def vdw(self):
+        return self.element.vdw
+
+    @property
+    def mass(self):
+        return self.element.mass
+
+    # to string methods to be used mainly for debugging and .qc file
     def __repr__(self):
         return "{:>6} {:10.6f} {:10.6f} {:10.6f} {:10.6f}".format(self.elem, self.x, self.y, self.z, self.q)
 
@@ -83,11 +262,26 @@ class Atom(object):
 
         # equality function
     def __eq__(self, other):
-        return self.elem.lower() == other.elem.lower() and self.dist(other) < 1e-5 and self.q - other.q < 1e-5
+        return self.elem.lower() == other.elem.lower() and self.dist(other) < 1e-5 and abs(self.q - other.q) < 1e-5
 #        return self.elem.lower() == other.elem.lower() and self.x == other.x and self.y == other.y and self.z == other.z and self.q == other.q
 
     def copy(self):
-        return deepcopy(self)
+        """Return a standalone copy of the atom with the same uid"""
+        new_at = Atom(self.elem, self.x, self.y, self.z, self.q)
+        new_at._uid = self.uid
+        new_at.num = self.num
+        new_at.es = self.es
+        new_at.kind = self.kind
+        return new_at
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        new_at = self.copy()
+        new_at.kind = deepcopy(self.kind, memo)
+        return new_at
+
     def set_pos(self, pos_array):
         """
         Assign coordinates via numpy array
@@ -187,9 +381,9 @@ class Atom(object):
         aVec,bVec,cVec : 3x1 array-likes
             Unit cell vectors
         order : positive int
-            The amount of translations to be considered. Order 1 considers a
-            translation by -1, 0 and 1 of each lattice vector and all resulting
-            combination. Order 2 is [-2, -1, 0, 1, 2] and so onzx
+            Unused. The closest image is searched for in a reduced cell where
+            translations by -1, 0 and 1 are always enough. Kept for
+            compatibility
 
         Returns
         -------
@@ -199,34 +393,11 @@ class Atom(object):
             Coordinates of the closest image to the point
 
         """
-
         in_pos = np.array([x1, y1, z1])
-        vectors = np.array([aVec, bVec, cVec])
-        multipliers = np.arange(-order, order + 1)
-
-        # sets comprised of the ranges of lattice vector values
-        aSet = [i * vectors[0] for i in multipliers]
-        bSet = [i * vectors[1] for i in multipliers]
-        cSet = [i * vectors[2] for i in multipliers]
-
-        # minimum r distance
-        rMin = float("inf")
-
-        # loop over all possible translations of the input point
-        for trans1 in aSet:
-            for trans2 in bSet:
-                for trans3 in cSet:
-                    img_pos = in_pos + trans1 + trans2 + trans3
-                    # r=np.linalg.norm(self.my_pos-img_pos)
-                    r = self.c_dist(img_pos[0], img_pos[1], img_pos[2])
-                    # if this particular translation of the point is the closest
-                    # to the atom so far
-                    if r < rMin:
-                        rMin = r
-                        # image coordinates
-                        x3 = img_pos[0]
-                        y3 = img_pos[1]
-                        z3 = img_pos[2]
+        cell = as_cell([aVec, bVec, cVec])
+        dist, offset = cell.min_image_pairs([self.get_pos()], [in_pos])
+        rMin = dist[0]
+        x3, y3, z3 = in_pos + cell.offset_vecs(offset[0])
         return rMin, x3, y3, z3
 
     def per_dist(self, other_atom, vectors, ref='dis', new_pos=False):
@@ -237,12 +408,13 @@ class Atom(object):
         ----------
         other_atom : Atom object
             The atom which to which the distance is being calculated
-        vectors : 3 x 3 numpy array
-            Unit cell vectors
-        order : positive int
-            The amount of translations to be considered. Order 1 considers a
-            translation by -1, 0 and 1 of each lattice vector and all resulting
-            combination. Order 2 is [-2, -1, 0, 1, 2] and so onzx
+        vectors : 3 x 3 numpy array or PeriodicCell object
+            Unit cell vectors. Pass a PeriodicCell when calling this repeatedly
+            to avoid inverting the vectors every time
+        ref : str
+            'dis', 'cov' or 'vdw', see dist
+        new_pos : bool
+            If True, also return the closest image
 
         Returns
         -------
@@ -252,38 +424,10 @@ class Atom(object):
              Closest image of the atom being targeted
 
         """
-        # First put the other atom inside the cell
-        other_atom = other_atom.put_in_cell(vectors)
-
-        multipliers = np.array([-1, 0, 1])
-
-        # sets comprised of the ranges of lattice vector values
-        a_set = [i * vectors[0] for i in multipliers]
-        b_set = [i * vectors[1] for i in multipliers]
-        c_set = [i * vectors[2] for i in multipliers]
-
-        # minimum r distance
-        r_min = float("inf")
-
-        # is the minimal distance unique?
-        unique = True
-
-        # loop over all possible translations of the input point
-        for trans_a in a_set:
-            for trans_b in b_set:
-                for trans_c in c_set:
-                    cell_origin = trans_a + trans_b + trans_c
-                    tmp_img_atom = other_atom.v_translated(cell_origin)
-                    r = self.dist(tmp_img_atom, ref=ref)
-                    if r <= r_min:
-                        if r < r_min:
-                            unique = True
-                        if r == r_min:
-                            unique = False
-                        r_min = r
-                        at_img = tmp_img_atom
-        if not unique:
-            print("WARNING: the closest periodic image is ill-defined")
+        cell = as_cell(vectors)
+        dist, offset = cell.min_image_pairs(self.get_pos(), other_atom.get_pos())
+        at_img = other_atom.v_translated(cell.offset_vecs(offset))
+        r_min = self.dist(at_img, ref=ref)
         if new_pos:
             return r_min, at_img
         else:
@@ -292,23 +436,11 @@ class Atom(object):
     def put_in_cell(self, vectors):
         """
         Return a new atom at a position inside the parallelepiped cell
-        """
-        # transpose to get the transformation matrix
-        M = np.transpose(vectors)
-        # inverse transformation matrix
-        U = np.linalg.inv(M)
-
-        dir_pos = np.array([self.x, self.y, self.z])
-        frac_pos = np.dot(U, dir_pos)
-        # translate to the range [0.1]
-        new_frac_pos = [i % 1 for i in frac_pos]
 
-        new_dir_pos = np.dot(M, new_frac_pos)
-
-        new_at = deepcopy(self)
-        new_at.x = new_dir_pos[0]
-        new_at.y = new_dir_pos[1]
-        new_at.z = new_dir_pos[2]
+        vectors can be a 3 x 3 numpy array or a PeriodicCell object.
+        """
+        new_at = self.copy()
+        new_at.set_pos(as_cell(vectors).wrap(self.get_pos()))
 
         return new_at
 
@@ -366,8 +498,7 @@ class Atom(object):
         for i, atom in enumerate(in_atoms):
             if in_row[i] != 0:
                 links.append((in_atoms[i].elem, in_row[i]))
-        self.connectivity = frozenset(Counter(links).most_common())
-        self.kind = (self.elem, self.connectivity)
+        self.kind = (self.elem, frozenset(Counter(links).most_common()))
         return
 
     def es_pot(self, position):
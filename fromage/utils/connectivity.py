@@ -0,0 +1,425 @@
+"""Functions for the bond graph of a set of atoms
+
+The bonds are stored as a sparse N x N adjacency matrix in CSR format, built
+from a KD-tree so that only pairs of atoms which are close enough to be bonded
+are ever measured. Searches over the graph return atoms in breadth-first order
+where the neighbours of an atom come in increasing index, which is the order
+in which fromage has always listed the atoms of a molecule.
+
+In a periodic system each bond also carries the integer lattice translation
+of the closest image of its second atom, so that a search over the graph can
+translate the atoms it finds to make their molecule whole.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, breadth_first_order
+from scipy.spatial import cKDTree
+
+from fromage.utils.periodic import neighbour_shifts
+
+
+def bond_graph(pos, radii, thresh):
+    """
+    Return the sparse adjacency matrix of the bonds between atoms
+
+    Two atoms i and j are bonded if dist(i, j) - radii[i] - radii[j] <= thresh.
+
+    Parameters
+    ----------
+    pos : N x 3 array-like
+        Cartesian coordinates of the atoms
+    radii : N x 1 array-like
+        Radius of each atom which is subtracted from the distances
+    thresh : float
+        Threshold for the bonding detection
+    Returns
+    -------
+    graph : N x N scipy.sparse.csr_matrix of bools
+        Symmetric adjacency matrix without diagonal, with sorted indices
+
+    """
+    pos = np.asarray(pos, dtype=float).reshape((-1, 3))
+    radii = np.asarray(radii, dtype=float)
+    n_at = len(pos)
+    if n_at > 1:
+        # no bond can be longer than this
+        max_r = thresh + 2 * np.max(radii)
+        tree = cKDTree(pos)
+        pairs = tree.query_pairs(max(max_r, 0.0), output_type='ndarray')
+    else:
+        pairs = np.zeros((0, 2), dtype=int)
+    if len(pairs):
+        diff = pos[pairs[:, 0]] - pos[pairs[:, 1]]
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        dist -= radii[pairs[:, 0]] + radii[pairs[:, 1]]
+        pairs = pairs[dist <= thresh]
+    return _symmetric_graph(pairs, n_at)
+
+
+def periodic_bond_graph(cell, pos, radii, thresh):
+    """
+    Return the bond graph of a periodic system with the image of each bond
+
+    Atom i is bonded to the closest image of atom j if their distance minus
+    radii[i] and radii[j] is at most thresh. The atoms are wrapped into the
+    reduced cell, which is repeated once in every direction, and the bonds are
+    found with a KD-tree. This finds all bonds shorter than the smallest width
+    of the reduced cell.
+
+    Parameters
+    ----------
+    cell : PeriodicCell object
+        The lattice of the system
+    pos : N x 3 array-like
+        Cartesian coordinates of the atoms
+    radii : N x 1 array-like
+        Radius of each atom which is subtracted from the distances
+    thresh : float
+        Threshold for the bonding detection
+    Returns
+    -------
+    graph : N x N scipy.sparse.csr_matrix of bools
+        Adjacency matrix without diagonal, with sorted indices
+    offsets : E x 3 numpy array of ints
+        For the bond stored at graph.indices[k] from atom i to atom j, the
+        image of j is at pos[j] + offsets[k].vectors
+
+    """
+    pos = np.asarray(pos, dtype=float).reshape((-1, 3))
+    radii = np.asarray(radii, dtype=float)
+    n_at = len(pos)
+    if n_at == 0:
+        return _symmetric_graph(np.zeros((0, 2), dtype=int), 0), np.zeros((0, 3), dtype=int)
+    # wrap into the reduced cell
+    red_frac = np.dot(pos, np.linalg.inv(cell.reduced))
+    wraps = np.floor(red_frac).astype(int)
+    wrapped = pos - np.dot(wraps, cell.reduced)
+    images = (np.dot(neighbour_shifts, cell.reduced)[:, None, :] +
+              wrapped[None, :, :]).reshape((-1, 3))
+    max_r = max(thresh + 2 * np.max(radii), 0.0)
+    close = cKDTree(wrapped).sparse_distance_matrix(cKDTree(images), max_r,
+                                                    output_type='ndarray')
+    rows = close['i'].astype(int)
+    shift_idx, cols = np.divmod(close['j'].astype(int), n_at)
+    dist = close['v']
+    keep = rows != cols
+    rows, cols, shift_idx, dist = rows[keep], cols[keep], shift_idx[keep], dist[keep]
+    # only keep the closest image of each pair
+    order = np.lexsort((dist, cols, rows))
+    rows, cols, shift_idx, dist = rows[order], cols[order], shift_idx[order], dist[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    bonded = first & (dist - radii[rows] - radii[cols] <= thresh)
+    rows, cols, shift_idx = rows[bonded], cols[bonded], shift_idx[bonded]
+
+    red_offsets = neighbour_shifts[shift_idx] - wraps[cols] + wraps[rows]
+    offsets = np.dot(red_offsets, cell.transform)
+    # the bonds are already sorted by row then column
+    indptr = np.zeros(n_at + 1, dtype=int)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_at))
+    graph = sparse.csr_matrix((np.ones(len(cols), dtype=bool), cols, indptr),
+                              shape=(n_at, n_at))
+    return graph, offsets
+
+
+def path_lengths(graph, max_depth=None):
+    """
+    Return the number of bonds separating each pair of atoms
+
+    All the atoms are searched from at once, one bond further at each step,
+    by multiplying the sparse matrix of the newly reached pairs with the bond
+    graph. Only connected pairs are stored so the memory grows with the size
+    of the molecules rather than the square of the number of atoms.
+
+    Parameters
+    ----------
+    graph : N x N scipy.sparse matrix
+        Symmetric adjacency matrix
+    max_depth : int or None
+        Number of bonds after which the search stops. If None, search until
+        every molecule is complete
+    Returns
+    -------
+    lengths : N x N scipy.sparse.csr_matrix of ints
+        The length of the shortest path between two atoms, or no entry if
+        they are not connected within max_depth bonds or are the same atom
+
+    """
+    n_at = graph.shape[0]
+    adjacency = sparse.csr_matrix(graph, dtype=int)
+    reached = sparse.identity(n_at, dtype=int, format='csr')
+    frontier = reached
+    lengths = sparse.csr_matrix((n_at, n_at), dtype=int)
+    depth = 0
+    while frontier.nnz and (max_depth is None or depth < max_depth):
+        depth += 1
+        step = frontier.dot(adjacency)
+        # forget the pairs which were already reached
+        step = step - step.multiply(reached)
+        step.eliminate_zeros()
+        step.data[:] = 1
+        frontier = step
+        reached = reached + step
+        lengths = lengths + depth * step
+    lengths.sort_indices()
+    return lengths
+
+
+def _mix(values):
+    """Scramble an array of 64 bit unsigned ints with the splitmix64 finaliser"""
+    values = np.asarray(values, dtype=np.uint64)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def wl_fingerprints(graph, labels, rounds=None):
+    """
+    Return a hashed Weisfeiler-Lehman fingerprint of each atom
+
+    Each atom starts from a hash of its label. At every round, the hashes of
+    the neighbours of each atom are scrambled and summed, which does not
+    depend on their order, and combined with the hash of the atom. After k
+    rounds the fingerprint describes the atoms up to k bonds away. The hashes
+    only use fixed integer arithmetic so the same atom environment gives the
+    same fingerprint in any system and any run.
+
+    Parameters
+    ----------
+    graph : N x N scipy.sparse.csr_matrix
+        Symmetric adjacency matrix
+    labels : N x 1 array-like of non-negative ints
+        Initial label of each atom, for instance the atomic number
+    rounds : int or None
+        Number of rounds. If None, stop when a round no longer splits any
+        group of atoms with equal fingerprints
+    Returns
+    -------
+    fingerprints : N x 1 numpy array of numpy.uint64
+        The fingerprint of each atom
+    rounds : int
+        The number of rounds which were done. Fingerprints from different
+        systems can only be compared if they have the same number of rounds
+
+    """
+    n_at = graph.shape[0]
+    rows = np.repeat(np.arange(n_at), np.diff(graph.indptr))
+    cols = graph.indices
+    fingerprints = _mix(np.asarray(labels, dtype=np.uint64) + np.uint64(1))
+    n_groups = len(np.unique(fingerprints))
+    done = 0
+    while rounds is None or done < rounds:
+        neighbours = np.zeros(n_at, dtype=np.uint64)
+        np.add.at(neighbours, rows, _mix(fingerprints[cols] ^ np.uint64(0x9e3779b97f4a7c15)))
+        new_fingerprints = _mix(fingerprints ^ _mix(neighbours))
+        if rounds is None:
+            new_groups = len(np.unique(new_fingerprints))
+            if new_groups == n_groups:
+                break
+            n_groups = new_groups
+        fingerprints = new_fingerprints
+        done += 1
+    return fingerprints, done
+
+
+def _symmetric_graph(pairs, n_at):
+    """Return the CSR adjacency matrix of undirected pairs of indices"""
+    rows = np.concatenate((pairs[:, 0], pairs[:, 1]))
+    cols = np.concatenate((pairs[:, 1], pairs[:, 0]))
+    graph = sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)),
+                              shape=(n_at, n_at))
+    graph.sort_indices()
+    return graph
+
+
+def bfs_order(graph, labels, allowed=None):
+    """
+    Return the atoms connected to some labels in breadth-first order
+
+    Parameters
+    ----------
+    graph : N x N scipy.sparse.csr_matrix
+        Adjacency matrix with sorted indices
+    labels : list of ints
+        The atoms from which the search starts, which come first in the output
+    allowed : boolean array or None
+        Mask of the atoms which can be added. If None, all atoms
+    Returns
+    -------
+    found : list of ints
+        The indices of the connected atoms
+
+    """
+    if allowed is None:
+        remaining = np.ones(graph.shape[0], dtype=bool)
+    else:
+        remaining = np.array(allowed, dtype=bool)
+    remaining[labels] = False
+    found = list(labels)
+    indptr, indices = graph.indptr, graph.indices
+    # the list grows while it is being looped over until no atom is added
+    i = 0
+    while i < len(found):
+        node = found[i]
+        neighbours = indices[indptr[node]:indptr[node + 1]]
+        new = neighbours[remaining[neighbours]]
+        if len(new):
+            remaining[new] = False
+            found.extend(new.tolist())
+        i += 1
+    return found
+
+
+def periodic_bfs_order(graph, offsets, labels, allowed=None):
+    """
+    Return the atoms connected to some labels and the images which join them
+
+    Same as bfs_order but each atom is also given the lattice translation
+    which puts it next to the atom it was found from.
+
+    Parameters
+    ----------
+    graph, offsets : see periodic_bond_graph()
+    labels : list of ints
+        The atoms from which the search starts, which are not translated
+    allowed : boolean array or None
+        Mask of the atoms which can be added. If None, all atoms
+    Returns
+    -------
+    found : list of ints
+        The indices of the connected atoms
+    shifts : M x 3 numpy array of ints
+        The lattice translation of each found atom
+
+    """
+    n_at = graph.shape[0]
+    if allowed is None:
+        remaining = np.ones(n_at, dtype=bool)
+    else:
+        remaining = np.array(allowed, dtype=bool)
+    remaining[labels] = False
+    found = list(labels)
+    shift = np.zeros((n_at, 3), dtype=int)
+    indptr, indices = graph.indptr, graph.indices
+    i = 0
+    while i < len(found):
+        node = found[i]
+        bonds = slice(indptr[node], indptr[node + 1])
+        neighbours = indices[bonds]
+        take = remaining[neighbours]
+        new = neighbours[take]
+        if len(new):
+            remaining[new] = False
+            shift[new] = shift[node] + offsets[bonds][take]
+            found.extend(new.tolist())
+        i += 1
+    return found, shift[found]
+
+
+def _molecule_forest(graph):
+    """
+    Return the breadth-first order of every molecule and the search tree
+
+    Returns
+    -------
+    order : N x 1 numpy array of ints
+        The atoms of each molecule in breadth-first order, molecule after
+        molecule
+    parents : N x 1 numpy array of ints
+        The atom from which each atom was found, or itself for the first atom
+        of a molecule
+    counts : list of ints
+        The number of atoms in each molecule
+
+    """
+    n_at = graph.shape[0]
+    n_mol, mol_labels = connected_components(graph, directed=False)
+    _, firsts = np.unique(mol_labels, return_index=True)
+    mol_order = np.argsort(firsts)
+    # rank of each molecule when sorted by first atom
+    rank = np.empty(n_mol, dtype=int)
+    rank[mol_order] = np.arange(n_mol)
+
+    # the virtual atom n_at is bonded to the first atom of each molecule
+    bonds = graph.tocoo()
+    rows = np.concatenate((bonds.row, np.full(n_mol, n_at)))
+    cols = np.concatenate((bonds.col, np.sort(firsts)))
+    full = sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)),
+                             shape=(n_at + 1, n_at + 1))
+    full.sort_indices()
+    order, preds = breadth_first_order(full, n_at, directed=True,
+                                       return_predecessors=True)
+    order = order[1:]
+    parents = preds[:n_at]
+    parents[parents == n_at] = np.flatnonzero(parents == n_at)
+    # a stable sort keeps the breadth-first order inside each molecule
+    order = order[np.argsort(rank[mol_labels[order]], kind='stable')]
+    counts = np.bincount(mol_labels, minlength=n_mol)[mol_order]
+    return order, parents, counts
+
+
+def molecule_orders(graph):
+    """
+    Return the atoms of every connected molecule in breadth-first order
+
+    The molecules are sorted by their first atom and each molecule is searched
+    from its first atom, so that the result is the same as repeatedly calling
+    bfs_order from the first atom not yet in a molecule. All molecules are
+    searched at once by starting from a virtual atom bonded to the first atom
+    of each molecule.
+
+    Parameters
+    ----------
+    graph : N x N scipy.sparse.csr_matrix
+        Adjacency matrix
+    Returns
+    -------
+    molecules : list of numpy arrays of ints
+        The indices of the atoms of each molecule
+
+    """
+    if graph.shape[0] == 0:
+        return []
+    order, _, counts = _molecule_forest(graph)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+def periodic_molecule_orders(graph, offsets):
+    """
+    Return the atoms of every molecule and the images which make it whole
+
+    Same as molecule_orders but each atom is also given the lattice
+    translation which joins it to the first atom of its molecule. The
+    translations are summed along the search tree by pointer jumping so that
+    no loop over the atoms is needed.
+
+    Parameters
+    ----------
+    graph, offsets : see periodic_bond_graph()
+    Returns
+    -------
+    molecules : list of numpy arrays of ints
+        The indices of the atoms of each molecule
+    shifts : list of M x 3 numpy arrays of ints
+        The lattice translation of each atom of each molecule
+
+    """
+    n_at = graph.shape[0]
+    if n_at == 0:
+        return [], []
+    order, parents, counts = _molecule_forest(graph)
+    atoms = np.arange(n_at)
+    # the bond from the parent of each atom, found among the sorted bonds
+    bond_rows = np.repeat(atoms, np.diff(graph.indptr))
+    bond_keys = bond_rows * n_at + graph.indices
+    is_root = parents == atoms
+    bond = np.searchsorted(bond_keys, parents * n_at + atoms)
+    shift = np.zeros((n_at, 3), dtype=int)
+    shift[~is_root] = offsets[bond[~is_root]]
+    # shift[i] sums the translations from i up to but excluding up[i]
+    up = parents.copy()
+    while np.any(up[up] != up):
+        shift += shift[up]
+        up = up[up]
+    splits = np.cumsum(counts)[:-1]
+    return np.split(order, splits), np.split(shift[order], splits)
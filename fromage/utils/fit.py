@@ -105,14 +105,9 @@ def coeff_row(var_points, sample):
 
 def dep_var(var_points, fix_points, samples):
     """Return the dependent variable array"""
-    l_dep = []
-    for sam in samples:
-        # entry = sam.es - \
-        #     var_points.es_pot(sam.get_pos()) - fix_points.es_pot(sam.get_pos())
-        entry = sam[3] - \
-            var_points.es_pot(sam[0:3]) - fix_points.es_pot(sam[0:3])
-        l_dep.append(entry)
-    out_dep = np.array(l_dep)
+    samples = np.asarray(samples, dtype=float)
+    out_dep = samples[:, 3] - var_points.es_pot_many(samples[:, 0:3]) - \
+        fix_points.es_pot_many(samples[:, 0:3])
     return out_dep
 
 
@@ -1,9 +1,14 @@
 """Some functions to handle lists of atoms
+
+Selections are tracked as sets of indices in the list of atoms so that checking
+whether an atom was already selected does not compare coordinates.
 """
 import numpy as np
 from copy import copy
 
 from fromage.utils.atom import Atom
+from fromage.utils.periodic import as_cell, translation_grid, lattice_images
+from fromage.utils import connectivity as cn
 
 
 def select(max_r, atoms, label):
@@ -32,24 +37,19 @@ def select(max_r, atoms, label):
         The atoms belonging to the molecule which is selected
 
     """
+    selected = [atoms[i] for i in _select_idx(max_r, atoms, label)]
+    return selected
 
-    new_atoms = [atoms[label]]
-    selected = new_atoms
-    n = True
-    while n == True:
-        n = False
-        old_atoms = new_atoms
-        new_atoms = []
-        for i in old_atoms:
-            for j in atoms:
-                # find atoms bonded to the newest atoms in the list
-                if i.c_dist(j.x, j.y, j.z) <= max_r and j not in selected:
-                    new_atoms.append(j)
-                    selected.append(j)
-                    # if no more atoms are found stop the loop
-                    n = True
 
-    return selected
+def _atoms_graph(max_r, atoms):
+    """Return the bond graph of a list of atoms bonded when closer than max_r"""
+    pos = np.array([at.get_pos() for at in atoms]).reshape((-1, 3))
+    return cn.bond_graph(pos, np.zeros(len(pos)), max_r)
+
+
+def _select_idx(max_r, atoms, label):
+    """Return the indices of the atoms selected by select()"""
+    return cn.bfs_order(_atoms_graph(max_r, atoms), [label])
 
 
 def select_per(max_r, atoms, label, vectors):
@@ -79,31 +79,42 @@ def select_per(max_r, atoms, label, vectors):
         periodic boundaries
 
     """
-    # list of selected atoms from the unit cell
-    selected = [atoms[label]]
+    sel_idx, selected_img = _select_per_idx(max_r, atoms, label, vectors)
+    selected = [atoms[i] for i in sel_idx]
+    return selected, selected_img
+
+
+def _select_per_idx(max_r, atoms, label, vectors):
+    """Return the indices and images of the atoms selected by select_per()"""
+    # indices of selected atoms from the unit cell
+    selected = [label]
     # list of selected atoms where the periodic image
     # atoms are translated back to form a molecule
     selected_img = [atoms[label]]
 
-    # n is true as long as there are still molecules to add to the list
-    n = True
-    while n == True:
-        n = False
-        for i in selected_img:
-            for j in atoms:
-                # contains the distance from the point or image and the
-                # coordinates of the point or image
-                gamma = i.dist_lat(j.x, j.y, j.z, vectors[
-                    0], vectors[1], vectors[2])
-
-                # if the atom is close enough to be part of the molecule
-                # and is not already part of the molecule
-                if gamma[0] <= max_r and j not in selected:
-                    selected.append(j)
-                    k = copy(j)
-                    k.x, k.y, k.z = gamma[1:]
-                    selected_img.append(k)
-                    n = True
+    cell = as_cell(vectors)
+    pos = np.array([at.get_pos() for at in atoms]).reshape((-1, 3))
+    # mask of the atoms already selected
+    done = np.zeros(len(pos), dtype=bool)
+    done[label] = True
+
+    # the list grows while it is being looped over until no atom is added
+    for i in selected_img:
+        rest = np.flatnonzero(~done)
+        if len(rest) == 0:
+            break
+        # distances from the image to the closest image of each atom
+        dist, offsets = cell.min_image([i.get_pos()], pos[rest])
+        # if the atom is close enough to be part of the molecule
+        close = dist[0] <= max_r
+        img_pos = pos[rest[close]] + cell.offset_vecs(offsets[0][close])
+        for j, j_pos in zip(rest[close], img_pos):
+            j = int(j)
+            selected.append(j)
+            done[j] = True
+            k = copy(atoms[j])
+            k.x, k.y, k.z = j_pos
+            selected_img.append(k)
 
     return selected, selected_img
 
@@ -135,29 +146,33 @@ def multi_select(max_r, atoms, labels, vectors):
         periodic boundaries
 
     """
+    sel_idx, selected_img_mols = _multi_select_idx(max_r, atoms, labels, vectors)
+    selected_mols = [atoms[i] for i in sel_idx]
+
+    return selected_mols, selected_img_mols
+
+
+def _multi_select_idx(max_r, atoms, labels, vectors):
+    """Return the indices and images of the atoms selected by multi_select()"""
     selected_mols = []
     selected_img_mols = []
 
     for label in labels:
-        selected_mol, selected_img_mol = select_per(
+        selected_mol, selected_img_mol = _select_per_idx(
             max_r, atoms, label, vectors)
         selected_mols.append(selected_mol)
         selected_img_mols.append(selected_img_mol)
 
         # checks to see if the user selected the same molecule twice
-    for moleculeI in selected_mols:
-        for moleculeJ in selected_mols:
-            if moleculeI != moleculeJ:
-                if moleculeI[0] in moleculeJ:
-                    raise ValueError(
-                        "You have selected several atoms in the same molecule!")
+    for i, moleculeI in enumerate(selected_mols):
+        for moleculeJ in selected_mols[i + 1:]:
+            if moleculeI[0] in moleculeJ:
+                raise ValueError(
+                    "You have selected several atoms in the same molecule!")
     tmp_a = [item for sublist in selected_mols for item in sublist]
     tmp_b = [item for sublist in selected_img_mols for item in sublist]
 
-    selected_mols = tmp_a
-    selected_img_mols = tmp_b
-
-    return selected_mols, selected_img_mols
+    return tmp_a, tmp_b
 
 
 def make_molecules(atoms, bl):
@@ -176,16 +191,15 @@ def make_molecules(atoms, bl):
     """
     molecules = []  # list of molecules
     max_length = 0  # number of atoms in a molecule
-    for i, atom in enumerate(atoms):
-        if atom not in [val for sublist in molecules for val in sublist]:
-            # creates a molecule if atom not already in molecules list
-            molecule = select(bl, atoms[i:], 0)
-            if len(molecule) > max_length:
-                max_length = len(molecule)
-                molecules = []
-                molecules.append(molecule)
-            elif len(molecule) == max_length:
-                molecules.append(molecule)
+    # the bonds are found once and each molecule is a connected component
+    for mol_idx in cn.molecule_orders(_atoms_graph(bl, atoms)):
+        molecule = [atoms[j] for j in mol_idx]
+        if len(molecule) > max_length:
+            max_length = len(molecule)
+            molecules = []
+            molecules.append(molecule)
+        elif len(molecule) == max_length:
+            molecules.append(molecule)
     return molecules
 
 
@@ -223,11 +237,10 @@ def complete_mol(max_r, atoms, label, vectors):
     # the atoms which are part of the same selected molecule.
     # first with intact coordinates and second with appropriate
     # atoms translated to join up the molecule with their image
-    full_mol, full_mol_trans = multi_select(max_r, atoms, label, vectors)
+    full_idx, full_mol_trans = _multi_select_idx(max_r, atoms, label, vectors)
 
-    # using an explicit loop does not work for some reason,
-    # use list comprehension
-    atoms = [a for a in atoms if a not in full_mol]
+    full_idx = set(full_idx)
+    atoms = [a for i, a in enumerate(atoms) if i not in full_idx]
 
     for atom in full_mol_trans:
         atoms.append(atom)
@@ -258,12 +271,10 @@ def complete_cell(atoms, vectors, max_bl=1.7):
     full_mol_l = []
 
     while len(atoms) != 0:
-        full_mol, cell = complete_mol(max_bl, atoms, [0], vectors)
+        full_idx, full_mol = _select_per_idx(max_bl, atoms, 0, vectors)
         full_mol_l.append(full_mol)
-        atoms = cell
-        for atom in full_mol:
-            if atom in atoms:
-                atoms.remove(atom)
+        full_idx = set(full_idx)
+        atoms = [a for i, a in enumerate(atoms) if i not in full_idx]
 
     out_cell = []
     for mol in full_mol_l:
@@ -328,14 +339,11 @@ def supercell(atoms, vectors, trans):
         The lattice vectors of the new cell
 
     """
-    cart = [0, 1, 2]
-    supercell = copy(atoms)
-    for comp in cart:
-        if trans[comp] != 1:
-            for mult in range(trans[comp])[1:]:
-                new_atoms = [i.v_translated(mult * vectors[comp])
-                             for i in supercell]
-                supercell += new_atoms
+    trans = np.array(trans)
+    # the first lattice vector varies fastest and the original atoms come first
+    grid = translation_grid(range(trans[2]), range(trans[1]), range(trans[0]))[:, ::-1]
+    images = _translated_atoms(atoms, vectors, grid[1:])
+    supercell = copy(atoms) + images
     out_vec = (vectors.T * trans.transpose()).T
     return supercell, out_vec
 
@@ -372,8 +380,6 @@ def make_mega_cell(atoms, traAN, traBN, traCN, vectors, alt_multi=False):
         The resulting supercell
 
     """
-    mega_cell = []
-
     if alt_multi:
         traA = range(-traAN, traAN)
         traB = range(-traBN, traBN)
@@ -384,21 +390,20 @@ def make_mega_cell(atoms, traAN, traBN, traCN, vectors, alt_multi=False):
         traC = range(-traCN, traCN + 1)
 
     # multiplying the cell
-    for i in traA:
-        for j in traB:
-            for k in traC:
-                traX = vectors[0][0] * i + \
-                    vectors[1][0] * j + vectors[2][0] * k
-                traY = vectors[0][1] * i + \
-                    vectors[1][1] * j + vectors[2][1] * k
-                traZ = vectors[0][2] * i + \
-                    vectors[1][2] * j + vectors[2][2] * k
-
-                for atom in atoms:
-                    mega_cell.append(atom.translated(traX, traY, traZ))
+    mega_cell = _translated_atoms(atoms, vectors, translation_grid(traA, traB, traC))
     return mega_cell
 
 
+def _translated_atoms(atoms, vectors, trans):
+    """Return new atoms translated by each lattice translation in turn"""
+    if len(atoms) == 0 or len(trans) == 0:
+        return []
+    pos = lattice_images([atom.get_pos() for atom in atoms], vectors, trans)
+    elems = [atom.elem for atom in atoms] * len(trans)
+    charges = [atom.q for atom in atoms] * len(trans)
+    return [Atom(elem, x, y, z, q) for elem, (x, y, z), q in zip(elems, pos.tolist(), charges)]
+
+
 def make_cluster(atoms, clust_rad, max_bl):
     """
     Generate a cluster of molecules from a cluster of atoms.
@@ -424,20 +429,24 @@ def make_cluster(atoms, clust_rad, max_bl):
         A list of atoms which form a cluster of molecules
 
     """
-    # atoms within the sphere of rad clust_rad
-    seed_atoms = []
+    # indices of the atoms within the sphere of rad clust_rad
+    seed_idx = []
 
-    for atom in atoms:
+    for i, atom in enumerate(atoms):
         if atom.c_dist(0, 0, 0) < clust_rad:
-            seed_atoms.append(atom)
+            seed_idx.append(i)
 
     # atoms in the cluster (seed_atoms + atoms to complete molecules)
     clust_atoms = []
-    for i, atom in enumerate(seed_atoms):
-        if atom not in clust_atoms:
-            mol2Add = select(max_bl, atoms, atoms.index(atom))
-            for atom2Add in mol2Add:
-                clust_atoms.append(atom2Add)
+    # indices of the atoms in the cluster
+    used = set()
+    graph = _atoms_graph(max_bl, atoms)
+    for i in seed_idx:
+        if i not in used:
+            mol_idx = cn.bfs_order(graph, [i])
+            used.update(mol_idx)
+            for j in mol_idx:
+                clust_atoms.append(atoms[j])
     return clust_atoms
 
 
@@ -1,10 +1,15 @@
 """The class used to manipulate lists of Atoms
 """
+import warnings
 import numpy as np
 # from copy import copy
 from copy import deepcopy
+from scipy.spatial import cKDTree
 
-from fromage.utils.atom import Atom
+from fromage.utils.atom import Atom, take_uids
+from fromage.utils import per_table as per
+from fromage.utils.periodic import PeriodicCell, neighbour_shifts, translation_grid, lattice_images
+from fromage.utils import connectivity as cn
 import fromage.io.edit_file as ef
 
 def try_ismol(to_test):
@@ -13,10 +18,74 @@ def try_ismol(to_test):
         raise TypeError("Cannot cast " +
                         type(to_test).__name__ + " to Mol object")
 
+def _warn_empty_cluster(clust_rad, mode):
+    """Warn that a cluster has no molecules"""
+    msg = "No molecule was found within a cluster radius of " + str(clust_rad)
+    if mode == 'exc':
+        msg += ". In 'exc' mode whole molecules must fit in the radius, " \
+               "try a larger radius or mode='inc'"
+    warnings.warn(msg)
+
+def _elem_index(atom):
+    """Return the index in per_table.periodic_list of the element of an Atom"""
+    if atom._mol is not None:
+        return atom._mol._elem[atom._row()]
+    return atom._element.index
+
+def _atom_arrays(atoms):
+    """Return the position, charge, element, kind and uid arrays of Atom objects"""
+    pos = np.array([(atom.x, atom.y, atom.z) for atom in atoms],
+                   dtype=float).reshape((-1, 3))
+    q = np.array([atom.q for atom in atoms], dtype=float)
+    elem = np.array([_elem_index(atom) for atom in atoms], dtype=int)
+    kind = np.empty(len(q), dtype=object)
+    # kinds are tuples so fill element-wise to stop numpy from unpacking them
+    for i, atom in enumerate(atoms):
+        kind[i] = atom.kind
+    uids = np.array([atom.uid for atom in atoms], dtype=np.int64)
+    return pos, q, elem, kind, uids
+
+def mol_from_arrays(pos, elems, charges=None, vectors=np.zeros((3, 3)), bonding='dis', thresh=1.8):
+    """
+    Return a Mol built directly from arrays without making any Atom objects
+
+    Parameters
+    ----------
+    pos : N x 3 array-like
+        Cartesian coordinates
+    elems : str or list of str
+        Element symbols. A single symbol is used for every atom
+    charges : N x 1 array-like, optional
+        Partial charges. Zero if None
+    vectors, bonding, thresh
+        See Mol
+    Returns
+    -------
+    out_mol : Mol object
+        The new Mol
+
+    """
+    pos = np.asarray(pos, dtype=float).reshape((-1, 3))
+    if isinstance(elems, str):
+        elem = np.full(len(pos), per.elem_index[elems.lower()], dtype=int)
+    else:
+        elem = [per.elem_index[i.lower()] for i in elems]
+    if charges is None:
+        charges = np.zeros(len(pos))
+    out_mol = Mol([], vectors=vectors, bonding=bonding, thresh=thresh)
+    out_mol._set_arrays(pos, charges, elem)
+    return out_mol
+
 default_thresh = {'dis' : 1.8,
                 'cov' : 0.2,
                 'vdw' : -0.3}
 
+# radius of each element of per_table.periodic_list which is subtracted from
+# the distance between two atoms for each type of bonding
+bond_radii = {'dis' : np.zeros(len(per.elements)),
+              'cov' : np.array([i.cov for i in per.elements]),
+              'vdw' : np.array([i.vdw for i in per.elements])}
+
 class Mol(object):
     """
     Object representing a list of atoms.
@@ -25,12 +94,33 @@ class Mol(object):
     unit cells. Although Mol shares many methods with list, it deliberately does
     not inherit it in order to avoid nonsensical operations such as Mol1 > Mol2
 
+    The atoms are not stored as Atom objects. Instead the Mol keeps an (N,3)
+    array of coordinates, an (N,) array of charges and an (N,) array of element
+    indices into per_table.periodic_list. Indexing or iterating over the Mol
+    hands out Atom objects which are views on one row of these arrays, so that
+    whole-molecule operations are single numpy operations. Unlike the atoms of
+    a list, these views do not survive removing, inserting or replacing atoms
+    in the Mol: they raise a RuntimeError afterwards. Copy the atoms that must
+    outlive such changes.
+
+    Each row also has the integer identity (uid) of its atom. Membership tests,
+    index and remove look up that identity in O(1) and only compare coordinates,
+    element and charge for atoms which are not found by identity.
+
+    Copies and slices of a Mol are copy-on-write: they share the arrays of the
+    original until either one of them is modified, at which point the modified
+    Mol makes its own copy of the arrays.
+
     Attributes
     ----------
     atoms : list of Atom objects
-        Member atoms of Mol
+        Member atoms of Mol. Setting this attribute replaces the arrays
     vectors : 3 x 3 numpy array
         Lattice vectors of the unit cell
+    cell : PeriodicCell object
+        The lattice of vectors with its inverse and a reduced basis,
+        computed when first needed and kept until vectors change. Used for
+        all periodic distances, while vectors stay as given
     bonding : string 'dist, 'cov' or 'vdw'
         The method for detecting bonding in this molecule.
         'dis' : distance between atoms < threshold
@@ -47,19 +137,308 @@ class Mol(object):
         # In case the user feeds a lone atom:
         if isinstance(in_atoms, Atom):
             in_atoms = [in_atoms]
+        # number of atoms. The arrays can be longer than that to allow for
+        # cheap appending
+        self._n = 0
+        # bumped when rows are removed, inserted or replaced, which makes the
+        # Atom views handed out before stale
+        self._generation = 0
+        self._pos = np.zeros((0, 3))
+        self._q = np.zeros(0)
+        self._elem = np.zeros(0, dtype=int)
+        self._kind = np.empty(0, dtype=object)
+        self._ids = np.zeros(0, dtype=np.int64)
+        # dictionary of uid: row, built when needed
+        self._uid_rows = None
+        # True if the arrays may be referenced by another Mol
+        self._shared = False
+        self._cell = None
+        # (cell, fractional coordinates), computed when needed
+        self._frac = None
+        # quantities derived from the bonds, see cached()
+        self._bond_cache = {}
         self.atoms = in_atoms
         self.vectors = vectors
         self.bonding = bonding
         self.thresh = thresh
+
     def __repr__(self):
         out_str = ""
-        for atom in self.atoms:
+        for atom in self:
             out_str += atom.__str__() + "\n"
         return out_str
 
     def __str__(self):
         return self.__repr__()
 
+    @property
+    def vectors(self):
+        return self._vectors
+
+    @vectors.setter
+    def vectors(self, in_vectors):
+        self._vectors = np.array(in_vectors, dtype=float)
+        self._cell = None
+
+    @property
+    def cell(self):
+        # the vectors can also be modified in place so check them every time
+        if self._cell is None or not np.array_equal(self._cell.vectors, self._vectors):
+            self._cell = PeriodicCell(self._vectors)
+        return self._cell
+
+    # array storage
+    @property
+    def atoms(self):
+        return [Atom._view(self, i) for i in range(self._n)]
+
+    @atoms.setter
+    def atoms(self, in_atoms):
+        if isinstance(in_atoms, Mol):
+            self._set_arrays(in_atoms._pos[:in_atoms._n],
+                             in_atoms._q[:in_atoms._n],
+                             in_atoms._elem[:in_atoms._n],
+                             in_atoms._kind[:in_atoms._n],
+                             in_atoms._ids[:in_atoms._n])
+        else:
+            self._set_arrays(*_atom_arrays(in_atoms))
+
+    def _set_arrays(self, pos, q, elem, kind=None, uids=None):
+        """
+        Replace the contents of the Mol with copies of the input arrays
+
+        Atoms get new identities if uids is None.
+
+        """
+        self._n = len(q)
+        self._moved()
+        self._generation += 1
+        self._pos = np.array(pos, dtype=float).reshape((self._n, 3))
+        self._q = np.array(q, dtype=float)
+        self._elem = np.array(elem, dtype=int)
+        self._kind = np.empty(self._n, dtype=object)
+        if kind is not None:
+            self._kind[:] = kind
+        if uids is None:
+            start = take_uids(self._n)
+            self._ids = np.arange(start, start + self._n, dtype=np.int64)
+        else:
+            self._ids = np.array(uids, dtype=np.int64)
+        self._uid_rows = None
+        self._shared = False
+        return
+
+    def _moved(self):
+        """
+        Forget what was computed from the positions
+
+        Call when atoms move, are added or removed or change element. The
+        bond cache is replaced rather than cleared since copies share it.
+
+        """
+        self._frac = None
+        self._bond_cache = {}
+        return
+
+    def _own(self):
+        """Copy the arrays if they are shared. Call before any modification"""
+        if self._shared:
+            n = self._n
+            # the atoms stay the same so keep what was computed from them
+            frac, bond_cache = self._frac, self._bond_cache
+            generation = self._generation
+            self._set_arrays(self._pos[:n], self._q[:n], self._elem[:n],
+                             self._kind[:n], self._ids[:n])
+            self._frac, self._bond_cache = frac, bond_cache
+            self._generation = generation
+        return
+
+    def cached(self, name, compute):
+        """
+        Return a quantity derived from the bonds, computing it only once
+
+        The value is kept until atoms move, are added or removed or change
+        element, and it is shared with copies of the Mol. Changing charges
+        keeps it. The bonding method, threshold and lattice vectors are part of
+        the key so changing them gives a different value.
+
+        Parameters
+        ----------
+        name : str
+            Name of the quantity
+        compute : callable
+            Function without arguments returning the quantity
+        Returns
+        -------
+        value
+            The result of compute(), which must not be modified
+
+        """
+        key = (name, self.bonding, self.thresh, self._vectors.tobytes())
+        if key not in self._bond_cache:
+            self._bond_cache[key] = compute()
+        return self._bond_cache[key]
+
+    def _share(self, index=slice(None)):
+        """
+        Return a Mol with the same properties sharing the arrays of this one
+
+        Parameters
+        ----------
+        index : slice
+            The rows of the arrays to share
+
+        """
+        new_mol = self.empty_mol()
+        new_mol._pos = self._pos[:self._n][index]
+        new_mol._q = self._q[:self._n][index]
+        new_mol._elem = self._elem[:self._n][index]
+        new_mol._kind = self._kind[:self._n][index]
+        new_mol._ids = self._ids[:self._n][index]
+        new_mol._n = len(new_mol._q)
+        new_mol._shared = True
+        self._shared = True
+        return new_mol
+
+    def take(self, indices):
+        """
+        Return a new Mol made of the atoms at the given indices
+
+        This only costs as much as the selection itself. The atoms keep their
+        identities.
+
+        Parameters
+        ----------
+        indices : list of ints or boolean array
+            The atoms to take, in the order they should appear in the new Mol
+        Returns
+        -------
+        new_mol : Mol object
+            A Mol with the same properties containing the selected atoms
+
+        """
+        indices = np.asarray(indices)
+        if indices.dtype != bool:
+            indices = indices.astype(int)
+        n = self._n
+        new_mol = self.empty_mol()
+        new_mol._set_arrays(self._pos[:n][indices], self._q[:n][indices],
+                            self._elem[:n][indices], self._kind[:n][indices],
+                            self._ids[:n][indices])
+        return new_mol
+
+    def _reserve(self, extra):
+        """Make sure the arrays can hold extra more atoms"""
+        self._own()
+        needed = self._n + extra
+        capacity = len(self._q)
+        if needed <= capacity:
+            return
+        # grow geometrically so that repeated appending is amortised O(1)
+        new_cap = max(needed, 2 * capacity, 8)
+        for name in ("_pos", "_q", "_elem", "_kind", "_ids"):
+            old = getattr(self, name)
+            new = np.zeros((new_cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+        return
+
+    def _write_row(self, i, atom):
+        """Copy the values of an Atom to row i of the arrays"""
+        self._own()
+        self._moved()
+        self._pos[i] = (atom.x, atom.y, atom.z)
+        self._q[i] = atom.q
+        self._elem[i] = _elem_index(atom)
+        self._kind[i] = atom.kind
+        self._ids[i] = atom.uid
+        self._uid_rows = None
+        return
+
+    def _delete(self, indices):
+        """Remove the rows of the arrays at the given indices"""
+        keep = np.ones(self._n, dtype=bool)
+        keep[indices] = False
+        n = self._n
+        self._set_arrays(self._pos[:n][keep], self._q[:n][keep],
+                         self._elem[:n][keep], self._kind[:n][keep],
+                         self._ids[:n][keep])
+        return
+
+    def _set_coord(self, i, comp, value):
+        self._own()
+        self._moved()
+        self._pos[i, comp] = value
+
+    def _set_charge(self, i, value):
+        self._own()
+        self._q[i] = value
+
+    def _set_elem(self, i, value):
+        self._own()
+        self._moved()
+        self._elem[i] = value
+
+    def _set_kind(self, i, value):
+        self._own()
+        self._kind[i] = value
+
+    def _match(self, atom, rows=slice(None)):
+        """Boolean mask of the atoms of the Mol which are equal to an Atom"""
+        n = self._n
+        same_elem = self._elem[:n][rows] == _elem_index(atom)
+        diff = self._pos[:n][rows] - (atom.x, atom.y, atom.z)
+        close = np.einsum('ij,ij->i', diff, diff) < 1e-10
+        # same criterion as Atom.__eq__
+        same_q = np.abs(self._q[:n][rows] - atom.q) < 1e-5
+        return same_elem & close & same_q
+
+    def _row(self, atom):
+        """
+        Return the row of an Atom in the Mol or None if it is absent
+
+        The atom is looked up by identity, which is only trusted if that row
+        is still equal to the atom. Copies which have been moved keep the
+        identity of the original so, failing that, the atom is compared by
+        value with every row.
+
+        """
+        if self._uid_rows is None:
+            rows = range(self._n - 1, -1, -1)
+            # reversed so that the first of repeated uids wins
+            self._uid_rows = dict(zip(self._ids[:self._n][::-1].tolist(), rows))
+        row = self._uid_rows.get(atom.uid)
+        if row is not None and not self._match(atom, [row])[0]:
+            row = None
+        if row is None:
+            matches = np.flatnonzero(self._match(atom))
+            if len(matches) > 0:
+                row = int(matches[0])
+        return row
+
+    def uids(self):
+        """Return an array of the identities of the atoms"""
+        return self._ids[:self._n].copy()
+
+    def get_pos(self):
+        """Return an N x 3 np array of the coordinates"""
+        return self._pos[:self._n].copy()
+
+    def set_pos(self, pos_array):
+        """
+        Assign the coordinates of all atoms at once
+
+        Parameters
+        ----------
+        pos_array : N x 3 array-like
+            The positions to assign to the atoms, in the order of the Mol
+
+        """
+        self._own()
+        self._moved()
+        self._pos[:self._n] = pos_array
+        return
+
     def set_bonding(self, bonding='dis', thresh=None):
         """
         Set the type of bonding detection used in this Mol
@@ -161,74 +540,233 @@ class Mol(object):
         bonded_bool : bool
             True if the atoms are bonded and False if not
         """
-        bonded_bool = atom_a.per_dist(atom_b, self.vectors, ref=self.bonding) <= self.thresh
+        bonded_bool = atom_a.per_dist(atom_b, self.cell, ref=self.bonding) <= self.thresh
         return bonded_bool
 
+    def _bond_radii(self):
+        """Return the radius of each atom which is subtracted from distances"""
+        return bond_radii[self.bonding][self._elem[:self._n]]
+
     # list-y behaviour
     def append(self, element):
-        self.atoms.append(element)
+        self._reserve(1)
+        self._write_row(self._n, element)
+        self._n += 1
 
     def extend(self, other_mol):
-        self.atoms.extend(other_mol.atoms)
+        if isinstance(other_mol, Mol):
+            n_other = other_mol._n
+            pos, q = other_mol._pos[:n_other], other_mol._q[:n_other]
+            elem, kind = other_mol._elem[:n_other], other_mol._kind[:n_other]
+            uids = other_mol._ids[:n_other]
+        else:
+            pos, q, elem, kind, uids = _atom_arrays(other_mol)
+        n_new = len(q)
+        self._reserve(n_new)
+        self._moved()
+        end = self._n + n_new
+        self._pos[self._n:end] = pos
+        self._q[self._n:end] = q
+        self._elem[self._n:end] = elem
+        self._kind[self._n:end] = kind
+        self._ids[self._n:end] = uids
+        self._uid_rows = None
+        self._n = end
 
     def insert(self, i, element):
-        self.atoms.insert(i, element)
+        atoms = self.atoms
+        atoms.insert(i, element)
+        self.atoms = atoms
 
     def remove(self, element):
-        self.atoms.remove(element)
+        self._delete(self.index(element))
 
     def index(self, element):
-        return self.atoms.index(element)
+        row = self._row(element)
+        if row is None:
+            raise ValueError(str(element) + " is not in Mol")
+        return row
 
     def pop(self, i=-1):
-        return self.atoms.pop(i)
+        popped = self[i].copy()
+        self._delete(i)
+        return popped
 
     def clear(self):
-        self.atoms.clear()
+        self._set_arrays(np.zeros((0, 3)), [], [])
 
     def count(self, element):
-        return self.atoms.count()
+        return int(np.count_nonzero(self._match(element)))
 
     def __add__(self, other_mol):
         try_ismol(other_mol)
-        return Mol(deepcopy(self).atoms + other_mol.atoms, vectors = self.vectors, bonding = self.bonding, thresh = self.thresh)
+        new_mol = self.copy()
+        new_mol.extend(other_mol)
+        return new_mol
+
+    def __iadd__(self, other_mol):
+        try_ismol(other_mol)
+        self.extend(other_mol)
+        return self
 
     def __len__(self):
-        return len(self.atoms)
+        return self._n
 
     def __eq__(self, other):
-        return self.atoms == other.atoms
+        if not isinstance(other, Mol):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        n = self._n
+        diff = self._pos[:n] - other._pos[:n]
+        return bool(np.all(self._elem[:n] == other._elem[:n]) and
+                    np.all(np.einsum('ij,ij->i', diff, diff) < 1e-10) and
+                    np.all(np.abs(self._q[:n] - other._q[:n]) < 1e-5))
 
     def __getitem__(self, index):
-        return self.atoms[index]
+        if isinstance(index, slice):
+            return self._share(index)
+        index = int(index)
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError("Mol index out of range")
+        return Atom._view(self, index)
 
     def __setitem__(self, index, value):
-        self.atoms[index] = value
+        self._write_row(range(self._n)[index], value)
+        self._generation += 1
         return
 
+    def __iter__(self):
+        for i in range(self._n):
+            yield Atom._view(self, i)
+
     def __contains__(self, elem):
-        return self.atoms.__contains__(elem)
+        return self._row(elem) is not None
 
     def copy(self):
-        return deepcopy(self)
+        new_mol = self._share()
+        new_mol._frac = self._frac
+        new_mol._bond_cache = self._bond_cache
+        return new_mol
 
     def write_xyz(self, name):
         """Write an xyz file of the Mol"""
-        ef.write_xyz(name, self.atoms)
+        ef.write_xyz(name, self)
 
     def empty_mol(self):
         """Return an empty mol with the same properties"""
-        new_mol = deepcopy(self)
-        new_mol.atoms = []
+        new_mol = Mol([], vectors=deepcopy(self.vectors),
+                      bonding=self.bonding, thresh=self.thresh)
+        new_mol._cell = self._cell
         return new_mol
 
+    def _check_labels(self, labels):
+        """Return labels as a list of ints after checking for repetitions"""
+        # Make sure that labels is a list
+        if isinstance(labels, (int, np.integer)):
+            labels = [labels]
+        labels = [int(i) for i in labels]
+
+        # Check for duplicate labels
+        if len(labels) > len(set(labels)):
+            raise TypeError("Some labels are repeated")
+        return labels
+
+    def bond_graph(self):
+        """
+        Return the sparse adjacency matrix of the bonds in the Mol
+
+        The bonds are found with a KD-tree in a single pass, using the bonding
+        method and threshold of the Mol. Periodic boundaries are ignored.
+
+        Returns
+        -------
+        graph : N x N scipy.sparse.csr_matrix of bools
+            Symmetric adjacency matrix of the atoms in the order of the Mol
+
+        """
+        graph = self.cached("graph", lambda: cn.bond_graph(
+            self._pos[:self._n], self._bond_radii(), self.thresh))
+        return graph
+
+    def periodic_bond_graph(self):
+        """
+        Return the bonds of the Mol through the periodic boundaries
+
+        Returns
+        -------
+        graph : N x N scipy.sparse.csr_matrix of bools
+            Adjacency matrix of the atoms in the order of the Mol
+        offsets : E x 3 numpy array of ints
+            Lattice translation of the bonded image of each bond. See
+            connectivity.periodic_bond_graph
+
+        """
+        graph, offsets = self.cached("periodic_graph", lambda: cn.periodic_bond_graph(
+            self.cell, self._pos[:self._n], self._bond_radii(), self.thresh))
+        return graph, offsets
+
+    def _bfs(self, labels, allowed=None, graph=None):
+        """
+        Return the indices of the atoms connected to some labels
+
+        The atoms are tracked by index so that no Atom comparisons or copies
+        are needed. The order is breadth-first: first the labels, then their
+        neighbours in the order of the Mol and so on.
+
+        Parameters
+        ----------
+        labels : list of ints
+            The atoms from which the search starts
+        allowed : boolean array or None
+            Mask of the atoms which can be added. If None, all atoms
+        graph : scipy.sparse.csr_matrix or None
+            The bond graph of the Mol if it was already built
+        Returns
+        -------
+        found : list of ints
+            The indices of the connected atoms
+
+        """
+        if graph is None:
+            graph = self.bond_graph()
+        return cn.bfs_order(graph, labels, allowed)
+
+    def _per_bfs(self, labels, allowed=None):
+        """
+        Return the indices and periodic images of atoms connected to labels
+
+        Same as _bfs but bonds can go through the periodic boundaries.
+
+        Parameters
+        ----------
+        labels : list of ints
+            The atoms from which the search starts
+        allowed : boolean array or None
+            Mask of the atoms which can be added. If None, all atoms
+        Returns
+        -------
+        found : list of ints
+            The indices of the connected atoms
+        img_pos : N x 3 numpy array
+            The position of each found atom translated so that the molecules
+            are fully connected without periodic boundaries
+
+        """
+        graph, offsets = self.periodic_bond_graph()
+        found, shifts = cn.periodic_bfs_order(graph, offsets, labels, allowed)
+        img_pos = self._pos[:self._n][found] + self.cell.offset_vecs(shifts)
+        return found, img_pos
+
     def select(self, labels):
         """
         Return a molecule out of the current Mol.
 
         The function returns a new Mol of selected atoms atoms. The selection is
         done by measuring by how much adjacent vdw spheres overlap. The returned
-        Mol's attributes are new objects obtained via a deep copy.
+        Mol does not share its atoms with the current one.
 
         Parameters
         ----------
@@ -240,39 +778,8 @@ class Mol(object):
         selected : Mol object
             The selected molecule
         """
-
-        # Make sure that labels is a list
-        if isinstance(labels, int):
-            labels = [labels]
-
-        # Check for duplicate labels
-        if len(labels) > len(set(labels)):
-            raise TypeError("Some labels are repeated")
-
-        selected = self.copy()
-        selected.atoms = deepcopy([self[i] for i in labels])
-        remaining = self.copy()
-        for atom in selected:
-            if atom in remaining:
-                remaining.remove(atom)
-
-        old_atoms = selected.copy()
-
-        # While there are atoms to add
-        cont = True
-        while cont:
-            cont = False
-            new_atoms = Mol([])
-            for old in old_atoms:
-                tmp_remaining = remaining.copy()
-                for rem in remaining:
-                    if self.bonded(old,rem):
-                        new_atoms.append(rem)
-                        selected.append(rem)
-                        tmp_remaining.remove(rem)
-                        cont = True  # An atom was added so continue loop
-                remaining = tmp_remaining
-            old_atoms = new_atoms
+        labels = self._check_labels(labels)
+        selected = self.take(self._bfs(labels))
         return selected
 
     def per_select(self, labels, old_pos=False):
@@ -297,51 +804,15 @@ class Mol(object):
             translations
 
         """
-
-        # Make sure that labels is a list
-        if isinstance(labels, int):
-            labels = [labels]
-
-        # Check for duplicate labels
-        if len(labels) > len(set(labels)):
-            raise TypeError("Some labels are repeated")
+        labels = self._check_labels(labels)
+        found, img_pos = self._per_bfs(labels)
 
         # Mol of selected atoms from the unit cell
-        selected_old = self.copy()
-        selected_old.atoms = [self[i] for i in labels]
-
+        selected_old = self.take(found)
         # Mol of selected atoms where the periodic image
         # atoms are translated back to form a molecule
-        selected_img = selected_old.copy()
-
-        remaining = self.copy()
-        for atom in selected_old:
-            if atom in remaining:
-                remaining.remove(atom)
-
-        old_atoms = selected_old.copy()
-
-        # While there are atoms to add
-        cont = True
-        while cont == True:
-            cont = False
-            new_atoms = Mol([])
-            for old in old_atoms:
-                tmp_remaining = remaining.copy()
-                for rem in remaining:
-                    # contains the distance from the point or image and the
-                    # coordinates of the point or image
-                    dist, per_img = old.per_dist(rem, self.vectors, ref=self.bonding, new_pos=True)
-                    # if the atom is close enough to be part of the molecule
-                    if dist <= self.thresh:
-                        new_atoms.append(per_img)
-                        selected_old.append(rem)
-                        selected_img.append(per_img)
-                        tmp_remaining.remove(rem)
-                        cont = True  # An atom was added so continue loop
-                remaining = tmp_remaining
-                old_atoms = new_atoms
-
+        selected_img = self.take(found)
+        selected_img.set_pos(img_pos)
 
         if old_pos:
             return selected_img, selected_old
@@ -350,14 +821,9 @@ class Mol(object):
 
     def segregate(self):
         """Separate current Mol in a list of Mols of different molecules"""
-        molecules = []  # list of molecules
-        remaining = self.copy()
-
-        while len(remaining) > 0:
-            molecule = remaining.select(0)
-            molecules.append(molecule)
-            for atom in molecule:
-                remaining.remove(atom)
+        orders = self.cached("molecules",
+                             lambda: cn.molecule_orders(self.bond_graph()))
+        molecules = [self.take(found) for found in orders]
         return molecules
 
     def complete_mol(self, labels):
@@ -380,14 +846,15 @@ class Mol(object):
         new_cell : Mol object
             The cell with the completed molecule
         """
-        new_mol, scattered_mol = self.per_select(labels, old_pos=True)
-        new_cell_atoms = deepcopy(
-            [a for a in self.atoms if a not in scattered_mol])
-        new_cell = self.copy()
-        new_cell.atoms = new_cell_atoms
-
-        for atom in new_mol:
-            new_cell.append(atom.copy())
+        labels = self._check_labels(labels)
+        found, img_pos = self._per_bfs(labels)
+        new_mol = self.take(found)
+        new_mol.set_pos(img_pos)
+
+        untouched = np.ones(self._n, dtype=bool)
+        untouched[found] = False
+        new_cell = self.take(untouched)
+        new_cell.extend(new_mol)
         return new_mol, new_cell
 
     def complete_cell(self):
@@ -404,38 +871,29 @@ class Mol(object):
 
         """
         full_mol_l = []
-        remaining = self.copy()
-
-        while len(remaining) != 0:
-            full_mol, cell = remaining.complete_mol(0)
+        pos = self._pos[:self._n]
+        # every molecule is made whole in one pass over the bond graph
+        orders, all_shifts = self.cached("periodic_molecules", lambda:
+                                         cn.periodic_molecule_orders(*self.periodic_bond_graph()))
+        for found, shifts in zip(orders, all_shifts):
+            full_mol = self.take(found)
+            full_mol.set_pos(pos[found] + self.cell.offset_vecs(shifts))
             full_mol_l.append(full_mol)
-            remaining = cell
-            for atom in full_mol:
-                if atom in remaining:
-                    remaining.remove(atom)
 
-        # Convinently, remaining is now an empty Mol
-        out_cell = remaining
+        out_cell = self.empty_mol()
         for mol in full_mol_l:
             out_cell.extend(mol)
         return out_cell, full_mol_l
 
     def centroid(self):
         """Return np array of the centroid"""
-        N = len(self.atoms)
-        centro = np.array([0.0, 0.0, 0.0])
-        for atom in self.atoms:
-            centro[0] += atom.x
-            centro[1] += atom.y
-            centro[2] += atom.z
-        centro = centro / N
+        centro = np.mean(self._pos[:self._n], axis=0)
         return centro
 
     def center_mol(self):
         """Translate molecules to center"""
         cen = self.centroid()
-        for atom in self.atoms:
-            atom.v_translate(-cen)
+        self.translate(-cen)
         return
 
     def translate(self, vector):
@@ -448,11 +906,25 @@ class Mol(object):
             Translation vector
 
         """
-        for atom in self.atoms:
-            atom.v_translate(vector)
+        self._own()
+        self._moved()
+        self._pos[:self._n] += vector
         return
 
-    def supercell(self, trans):
+    def _images(self, trans, out_vec, lazy):
+        """Return the images of the Mol under lattice translations"""
+        if lazy:
+            return LazySupercell(self, trans, vectors=out_vec)
+        n = self._n
+        new_cell = self.empty_mol()
+        # the translated atoms are new atoms with their own uids
+        new_cell._set_arrays(lattice_images(self._pos[:n], self.vectors, trans),
+                             np.tile(self._q[:n], len(trans)),
+                             np.tile(self._elem[:n], len(trans)))
+        new_cell.vectors = out_vec
+        return new_cell
+
+    def supercell(self, trans, lazy=False):
         """
         Return a supercell of I x J x K
 
@@ -460,30 +932,22 @@ class Mol(object):
         ----------
         trans : array-like of length 3
             Multiplications of the primitive cell
+        lazy : bool
+            If True, return a LazySupercell which only makes atoms when they
+            are asked for
         Returns
         -------
-        supercell : Mol object
+        supercell : Mol or LazySupercell object
             New supercell with adjusted lattice vectors
 
         """
         # make the input into a np array
         trans = np.array(trans)
-
-        new_cell = self.empty_mol()
-        for a_mult in range(trans[0]):
-            for b_mult in range(trans[1]):
-                for c_mult in range(trans[2]):
-                    vector = a_mult * \
-                        self.vectors[0] + b_mult * \
-                        self.vectors[1] + c_mult * self.vectors[2]
-                    new_atoms = Mol([i.v_translated(vector)
-                                     for i in self.atoms])
-                    new_cell += new_atoms
+        grid = translation_grid(range(trans[0]), range(trans[1]), range(trans[2]))
         out_vec = (self.vectors.T * trans.transpose()).T
-        new_cell.vectors = out_vec
-        return new_cell
+        return self._images(grid, out_vec, lazy)
 
-    def centered_supercell(self, trans, from_origin=False):
+    def centered_supercell(self, trans, from_origin=False, lazy=False):
         """
         Make a bigger supercell out of an input cell.
 
@@ -504,34 +968,24 @@ class Mol(object):
         from_origin : bool
             Determines the kind of multiplication. True is corner of the cell as
             the center, False is middle of the cell.
+        lazy : bool
+            If True, return a LazySupercell which only makes atoms when they
+            are asked for
 
         Returns
         -------
-        mega_cell : Mol object
+        mega_cell : Mol or LazySupercell object
             The resulting supercell
 
         """
-        trans_series = [0, 0, 0]
-        for i, tra in enumerate(trans):
-            if from_origin:
-                trans_series[i] = list(range(-tra, tra))
-            else:
-                trans_series[i] = list(range(-tra, tra + 1))
-        trans_series = np.array(trans_series)
-
-        new_cell = self.empty_mol()
-        for a_mult in trans_series[0]:
-            for b_mult in trans_series[1]:
-                for c_mult in trans_series[2]:
-                    vector = a_mult * \
-                        self.vectors[0] + b_mult * \
-                        self.vectors[1] + c_mult * self.vectors[2]
-                    new_atoms = Mol([i.v_translated(vector)
-                                     for i in self.atoms])
-                    new_cell += new_atoms
+        trans = np.array(trans)
+        if from_origin:
+            ranges = [range(-tra, tra) for tra in trans]
+        else:
+            ranges = [range(-tra, tra + 1) for tra in trans]
+        grid = translation_grid(*ranges)
         out_vec = (self.vectors.T * trans.transpose()).T
-        new_cell.vectors = out_vec
-        return new_cell
+        return self._images(grid, out_vec, lazy)
 
     def trans_from_rad(self, clust_rad):
         """
@@ -578,13 +1032,143 @@ class Mol(object):
         trans_count -= np.array([1, 1, 1])
         return trans_count
 
+    def _molecule_spheres(self):
+        """
+        Return the whole molecules of the unit cell and their bounding spheres
+
+        Returns
+        -------
+        mols : list of Mol objects
+            The whole molecules of the unit cell
+        centroids : M x 3 numpy array
+            The centroid of each molecule
+        bounds : M x 1 numpy array
+            The distance from each centroid to the furthest atom
+
+        """
+        mols = self.complete_cell()[1]
+        centroids = np.array([mol.centroid() for mol in mols]).reshape((-1, 3))
+        bounds = np.array([np.max(np.linalg.norm(mol.get_pos() - centroid, axis=1))
+                           for mol, centroid in zip(mols, centroids)])
+        return mols, centroids, bounds
+
+    def _translation_box(self, centroid, centre, max_dist):
+        """
+        Return the range of translations bringing a point near another
+
+        Parameters
+        ----------
+        centroid : 3 x 1 array-like
+            The point to be translated
+        centre : 3 x 1 array-like
+            The point it should be brought near
+        max_dist : float
+            The maximum distance between them
+        Returns
+        -------
+        low, high : 3 x 1 numpy arrays of ints
+            The lowest and highest multiple of each lattice vector in a box
+            containing all of the translations
+
+        """
+        # how far a point moves in fractional coordinates when it moves by one
+        # Angstrom
+        frac_per_ang = np.linalg.norm(self.cell.inv, axis=0)
+        frac_diff = self.cell.frac(np.asarray(centre) - centroid)
+        low = np.ceil(frac_diff - max_dist * frac_per_ang).astype(int)
+        high = np.floor(frac_diff + max_dist * frac_per_ang).astype(int)
+        return low, high
+
+    def _molecule_images(self, centre, reach):
+        """
+        Return the lattice translations of whole molecules near a point
+
+        The molecules of the unit cell are completed once and each of them is
+        then placed by lattice translations. Only the translations which bring
+        the bounding sphere of the molecule within reach of the point are
+        kept.
+
+        Parameters
+        ----------
+        centre : 3 x 1 array-like
+            The point around which molecules are placed
+        reach : float
+            Maximum distance from the point to the closest atom of a molecule
+        Returns
+        -------
+        mols : list of Mol objects
+            The whole molecules of the unit cell
+        images : K x 4 numpy array of ints
+            Each row is a translation (i, j, k) of self.vectors followed by the
+            index of the molecule in mols, sorted in that order
+
+        """
+        mols, centroids, bounds = self._molecule_spheres()
+        images = []
+        for i_mol, (centroid, bound) in enumerate(zip(centroids, bounds)):
+            max_dist = reach + bound
+            low, high = self._translation_box(centroid, centre, max_dist)
+            trans = np.mgrid[low[0]:high[0] + 1,
+                             low[1]:high[1] + 1,
+                             low[2]:high[2] + 1].reshape((3, -1)).T
+            diff = centroid + self.cell.offset_vecs(trans) - centre
+            close = np.einsum('ij,ij->i', diff, diff) <= max_dist**2
+            trans = trans[close]
+            images.append(np.column_stack((trans, np.full(len(trans), i_mol))))
+        images = np.concatenate(images).reshape((-1, 4))
+        images = images[np.lexsort(images.T[::-1])]
+        return mols, images
+
+    def _cluster_filter(self, clust_rad, mode, central_mol):
+        """
+        Return the region of a cluster and the test for including molecules
+
+        Returns
+        -------
+        centre : 3 x 1 numpy array
+            Centre of a sphere containing the cluster
+        reach : float
+            Radius of that sphere
+        keep : callable
+            Takes a K x N x 3 array of the positions of K images of a molecule
+            and returns a boolean array saying which images are in the cluster
+
+        """
+        # if there is a central mol, the cluster is the union of the spheres
+        # around its atoms, which is inside the sphere enclosing the central
+        # mol grown by clust_rad
+        if central_mol:
+            central_pos = central_mol.get_pos()
+            centre = np.mean(central_pos, axis=0)
+            central_rad = np.max(np.linalg.norm(central_pos - centre, axis=1))
+            reach = clust_rad + central_rad
+            central_tree = cKDTree(central_pos)
+        else:
+            centre = np.zeros(3)
+            reach = clust_rad
+
+        def keep(img_pos):
+            if central_mol:
+                # distance to the closest atom of the central mol
+                dist = central_tree.query(img_pos.reshape((-1, 3)),
+                                          distance_upper_bound=clust_rad)[0]
+                inside = dist.reshape(img_pos.shape[:2]) < clust_rad
+            else:
+                inside = np.einsum('ijk,ijk->ij', img_pos, img_pos) < clust_rad**2
+            if mode == 'exc':
+                return inside.all(axis=1)
+            return inside.any(axis=1)
+
+        return centre, reach, keep
+
     def make_cluster(self, clust_rad, mode = 'exc', central_mol = None):
         """
         Generate a cluster of molecules from a primitive cell
 
-        This first makes a supercell of the correct size which will contain with
-        one additional buffer shell. Then the sphere is generated from this new
-        supercell by connectivity.
+        The molecules of the cell are completed once and then placed whole by
+        lattice translation. Each placed molecule is kept or not depending on
+        how many of its atoms lie within the radius. See iter_cluster for
+        clusters too large to hold in memory.
 
         A central molecule can also be supplied which will turn the spheres
         defining the clusters into the union of spheres stemming from each atom
@@ -598,135 +1182,253 @@ class Mol(object):
         mode : str
             Switches between inclusive and exclusive selecting. Inclusive,
             'inc', selects all molecules which have atoms within the radius.
-            Exclusive, 'exc', selects all molecules fully in the radius.
-            Default: false
+            Exclusive, 'exc', selects all molecules fully in the radius, so a
+            radius smaller than a molecule gives an empty cluster and a
+            warning. Default: 'exc'
         central_mol : Mol
             If this is supplied, the central molecule will act as a kernel for
             the cluster which will end up being of the appropriate shape.
         Returns
         -------
         cluster : Mol object
-            Spherical cluster of molecules from their crystal positions
+            Spherical cluster of molecules from their crystal positions. The
+            molecules are in order of translation then of molecule in the cell
 
         """
-        # if there is a central mol, account for nearest neighbour molecules
-        # bleeding out of the original radius
-        if central_mol:
-            central_rad = 0
-            for atom in central_mol:
-                dis = atom.v_dist([0,0,0])
-                if dis < central_rad:
-                    central_rad = dis
-            trans = self.trans_from_rad(clust_rad + central_rad)
-        # get the translations necessary to enclose the required mols
+        centre, reach, keep_images = self._cluster_filter(clust_rad, mode, central_mol)
+        mols, images = self._molecule_images(centre, reach)
+
+        # (row of images, positions, molecule) of each kept image
+        kept = []
+        for i_mol, mol in enumerate(mols):
+            rows = np.flatnonzero(images[:, 3] == i_mol)
+            # every image of the molecule at once
+            img_pos = mol.get_pos()[None, :, :] + \
+                self.cell.offset_vecs(images[rows, :3])[:, None, :]
+            keep = keep_images(img_pos)
+            kept.extend((row, pos, mol) for row, pos in zip(rows[keep], img_pos[keep]))
+        kept.sort(key=lambda image: image[0])
+
+        clust_atoms = Mol([])
+        if kept:
+            kept_mols = [mol for _, _, mol in kept]
+            clust_atoms._set_arrays(np.concatenate([pos for _, pos, _ in kept]),
+                                    np.concatenate([mol.charges() for mol in kept_mols]),
+                                    np.concatenate([mol._elem[:mol._n] for mol in kept_mols]),
+                                    np.concatenate([mol._kind[:mol._n] for mol in kept_mols]))
         else:
-            trans = self.trans_from_rad(clust_rad)
-        # if the cluster is inclusive, then extra mols might be required from
-        # an additional layer of the supercell
-        if mode == 'inc':
-            trans += np.array([1,1,1]) # one buffer cell layer
-        supercell = self.centered_supercell(trans, from_origin=True)
+            _warn_empty_cluster(clust_rad, mode)
+        return clust_atoms
+
+    def iter_cluster(self, clust_rad, mode='exc', central_mol=None):
+        """
+        Generate the molecules of a cluster one shell of cells at a time
 
-        seed_atoms = Mol([])
+        The same molecules as make_cluster are produced, but the lattice
+        translations are visited in shells of increasing size around the
+        centre of the cluster so that only one shell is held in memory at a
+        time. Within a shell, molecules come in order of increasing distance of
+        their centroid from the centre.
 
-        # get seedatoms in the shape of the central mol if pertinent
-        if central_mol:
-            for atom_i in supercell:
-                for atom_j in central_mol:
-                    if atom_i.dist(atom_j) < clust_rad:
-                        seed_atoms.append(atom_i)
-                        break
-        # get spherical seedatoms
+        Parameters
+        ----------
+        clust_rad, mode, central_mol
+            See make_cluster
+        Yields
+        ------
+        mol : Mol object
+            A whole molecule of the cluster
+
+        """
+        centre, reach, keep_images = self._cluster_filter(clust_rad, mode, central_mol)
+        mols, centroids, bounds = self._molecule_spheres()
+        if not mols:
+            _warn_empty_cluster(clust_rad, mode)
+            return
+        boxes = [self._translation_box(centroid, centre, reach + bound)
+                 for centroid, bound in zip(centroids, bounds)]
+        # shells are counted from the translation closest to the centre
+        middle = np.round(self.cell.frac(centre - np.mean(centroids, axis=0))).astype(int)
+        n_shells = max(np.max(np.abs(np.concatenate(box) - np.tile(middle, 2)))
+                       for box in boxes) + 1
+
+        found = False
+        for shell in range(n_shells):
+            # translations on the surface of a cube of half side shell
+            cube = np.mgrid[-shell:shell + 1, -shell:shell + 1,
+                            -shell:shell + 1].reshape((3, -1)).T
+            trans = middle + cube[np.max(np.abs(cube), axis=1) == shell]
+            # (distance, molecule, positions) of each kept image
+            kept = []
+            for i_mol, mol in enumerate(mols):
+                low, high = boxes[i_mol]
+                mol_trans = trans[np.all((trans >= low) & (trans <= high), axis=1)]
+                diff = centroids[i_mol] + self.cell.offset_vecs(mol_trans) - centre
+                dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+                close = dist <= reach + bounds[i_mol]
+                mol_trans, dist = mol_trans[close], dist[close]
+                img_pos = mol.get_pos()[None, :, :] + \
+                    self.cell.offset_vecs(mol_trans)[:, None, :]
+                keep = keep_images(img_pos)
+                kept.extend((d, i_mol, pos) for d, pos in zip(dist[keep], img_pos[keep]))
+            kept.sort(key=lambda image: image[:2])
+            found = found or bool(kept)
+            for _, i_mol, pos in kept:
+                img = Mol([])
+                img._set_arrays(pos, mols[i_mol].charges(), mols[i_mol]._elem[:mols[i_mol]._n],
+                                mols[i_mol]._kind[:mols[i_mol]._n])
+                yield img
+        if not found:
+            _warn_empty_cluster(clust_rad, mode)
+
+    def write_cluster(self, in_name, clust_rad, mode='exc', central_mol=None, points=False):
+        """
+        Write a cluster to a file without holding all of it in memory
+
+        Parameters
+        ----------
+        in_name : str
+            Name of the file to write
+        clust_rad, mode, central_mol
+            See make_cluster
+        points : bool
+            If True write the point charges as lines of x y z q, otherwise
+            write an xyz file
+
+        """
+        mols = self.iter_cluster(clust_rad, mode=mode, central_mol=central_mol)
+        if points:
+            ef.write_points_iter(in_name, mols)
         else:
-            for atom in supercell:
-                if atom.v_dist([0, 0, 0]) < clust_rad:
-                    seed_atoms.append(atom)
-
-        
-        max_mol_len = 0
-        if mode == 'exc':
-            while len(seed_atoms) > 0:
-                mol = seed_atoms.select(0)
-                if len(mol) > max_mol_len:
-                    max_mol_len = len(mol)
-                    clust_atoms = Mol([])
-                if len(mol) == max_mol_len:
-                    clust_atoms += mol
-                for atom in mol:
-                    seed_atoms.remove(atom)
-        if mode == 'inc':
-            clust_atoms = Mol([])
-            max_mol_len = len(supercell.select(supercell.index(seed_atoms[0])))
-
-            while len(seed_atoms) > 0:
-                mol_tmp = seed_atoms.select(0) # The part of the mol detected in seed_atoms
-                if len(mol_tmp) < max_mol_len:
-                    # The whole mol, which could potentially include even more seed_atoms
-                    mol = supercell.select(supercell.index(seed_atoms[0]))
-                else:
-                    mol = mol_tmp
-                clust_atoms += mol
-                for atom in mol_tmp:
-                    seed_atoms.remove(atom)
-                for atom in mol:
-                    supercell.remove(atom)
-                    # remove all atoms of the mol which are part of seed_atoms
-                    try:
-                        seed_atoms.remove(atom)
-                    except ValueError:
-                        pass
+            ef.write_xyz_iter(in_name, mols)
+        return
 
-        return clust_atoms
+    def remove_duplicates(self, thresh=0.001, periodic=False):
+        """
+        Remove the duplicate atoms
 
-    def remove_duplicates(self, thresh=0.001):
-        """Remove the duplicate atoms"""
-        purged_mol = Mol([self.atoms[0]])
-        for atom_a in self[1:]:
-            unique = True
-            for atom_b in purged_mol:
-                if atom_a.very_close(atom_b, thresh=thresh):
-                    unique = False
-                    break
-            if unique:
-                purged_mol.append(atom_a)
-        self.atoms = purged_mol
+        Two atoms are duplicates if all of their coordinates differ by less
+        than thresh, as in Atom.very_close. The first atom is kept and the
+        neighbours are found with a KD-tree so that this scales as N log N.
+
+        Parameters
+        ----------
+        thresh : float
+            Maximum difference in each coordinate between duplicates
+        periodic : bool
+            If True, atoms which are duplicates after a lattice translation by
+            self.vectors are also removed
+        Returns
+        -------
+        merge_map : numpy array of ints
+            For each atom of the original Mol, the index in the purged Mol of
+            the atom it was merged into, or kept as
+
+        """
+        n = self._n
+        pos = self._pos[:n]
+        if periodic:
+            # wrap all atoms into the cell so that only neighbouring images
+            # need checking
+            pos = self.cell.cart(self.frac_pos() % 1)
+            shifts = self.cell.offset_vecs(neighbour_shifts)
+        else:
+            shifts = np.zeros((1, 3))
+
+        tree = cKDTree(pos)
+        # the ball includes its surface but very_close is a strict inequality
+        rad = np.nextafter(thresh, 0)
+        neighbours = [[] for i in range(n)]
+        for shift in shifts:
+            near_l = tree.query_ball_point(pos + shift, rad, p=np.inf)
+            for i, near in enumerate(near_l):
+                neighbours[i].extend(near)
+
+        merge_map = np.empty(n, dtype=int)
+        # row in the purged Mol of each kept atom, -1 if removed
+        new_row = np.full(n, -1)
+        n_kept = 0
+        for i in range(n):
+            kept_before = [j for j in neighbours[i] if j < i and new_row[j] >= 0]
+            if kept_before:
+                merge_map[i] = new_row[min(kept_before)]
+            else:
+                new_row[i] = n_kept
+                merge_map[i] = n_kept
+                n_kept += 1
+        self._delete(np.flatnonzero(new_row < 0))
+        return merge_map
+
+    def frac_pos(self):
+        """
+        Return the fractional coordinates of the atoms
+
+        The array is computed once and reused until the atoms move or the
+        lattice vectors change, so it must not be modified.
+
+        Returns
+        -------
+        frac : N x 3 numpy array
+            Read-only fractional coordinates in the order of the Mol
+
+        """
+        cell = self.cell
+        if self._frac is None or self._frac[0] is not cell:
+            frac = cell.frac(self._pos[:self._n])
+            frac.flags.writeable = False
+            self._frac = (cell, frac)
+        return self._frac[1]
+
+    def confined_frac_pos(self):
+        """
+        Return the fractional coordinates translated to the range [0,1]
+
+        Only the coordinates which are out of range are translated so that
+        atoms on the faces of the cell stay where they are.
+
+        Returns
+        -------
+        frac : N x 3 numpy array
+            Fractional coordinates in the order of the Mol
+
+        """
+        frac_pos = self.frac_pos().copy()
+        out_of_range = (frac_pos < 0) | (frac_pos > 1)
+        frac_pos[out_of_range] %= 1
+        return frac_pos
+
+    def dir_to_frac_pos_inplace(self):
+        """Move all atoms of this Mol to fractional coordinates"""
+        frac_pos = self.confined_frac_pos()
+        self.set_pos(frac_pos)
         return
 
-    def dir_to_frac_pos(self):
-        """Move all atoms to fractional coordinates"""
+    def frac_to_dir_pos_inplace(self):
+        """Move all atoms of this Mol to direct coordinates"""
+        self.set_pos(self.cell.cart(self._pos[:self._n]))
+        return
 
+    def confine(self):
+        """Move all atoms of this Mol to fit inside the primitive cell"""
+        self.set_pos(self.cell.cart(self.confined_frac_pos()))
+        return
+
+    def dir_to_frac_pos(self):
+        """Return a copy of the Mol in fractional coordinates"""
         out_mol = self.copy()
-        # transpose to get the transformation matrix
-        M = np.transpose(self.vectors)
-        # inverse transformation matrix
-        U = np.linalg.inv(M)
-
-        for atom in out_mol:
-            # change of basis transformation
-            dir_pos = atom.get_pos()
-            frac_pos = np.dot(U, dir_pos)
-            for i, coord in enumerate(frac_pos):
-                # if the coordinate is out of range
-                if coord < 0 or coord > 1:
-                    # translate it to the range [0,1]
-                    frac_pos[i] = coord % 1
-            atom.set_pos(frac_pos)
+        out_mol.dir_to_frac_pos_inplace()
         return out_mol
 
     def frac_to_dir_pos(self):
-        """Move all atoms to direct coordinates"""
+        """Return a copy of the Mol in direct coordinates"""
         out_mol = self.copy()
-        for atom in out_mol:
-            new_pos = np.matmul(self.vectors.T, atom.get_pos())
-            atom.set_pos(new_pos)
-
+        out_mol.frac_to_dir_pos_inplace()
         return out_mol
 
     def confined(self):
-        """Move all atoms to fit inside the primitive cell"""
-        frac_mol = self.dir_to_frac_pos()
-        out_mol = frac_mol.frac_to_dir_pos()
-
+        """Return a copy of the Mol with all atoms inside the primitive cell"""
+        out_mol = self.copy()
+        out_mol.confine()
         return out_mol
 
     def centered_mols(self, labels, return_trans = False):
@@ -751,7 +1453,7 @@ class Mol(object):
         centro = mol.centroid()
         mol.translate(-centro)
         mod_cell.translate(-centro)
-        mod_cell = mod_cell.confined()
+        mod_cell.confine()
 
         if return_trans:
             return mol, mod_cell, -centro
@@ -773,11 +1475,57 @@ class Mol(object):
             The total potential
 
         """
-        tot_pot = 0
-        for atom in self:
-            tot_pot += atom.es_pot(position)
+        diff = self._pos[:self._n] - position
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        tot_pot = np.sum(self._q[:self._n] / dist)
         return tot_pot
 
+    def es_pot_many(self, points, excl_rad=None, max_mem=2**26):
+        """
+        Return the electrostatic potential generated by this Mol at many points
+
+        The points are treated in chunks so that no more than about max_mem
+        bytes of temporary arrays are allocated at once, however many points
+        and charges there are.
+
+        Parameters
+        ----------
+        points : M x 3 array-like
+            The points at which the potential should be evaluated
+        excl_rad : float or None
+            Charges closer than this radius to a point do not contribute to the
+            potential at that point. Use it to skip coincident points. If None,
+            all charges contribute
+        max_mem : int
+            Approximate memory cap in bytes for the temporary arrays
+        Returns
+        -------
+        tot_pots : M x 1 numpy array
+            The total potential at each point
+
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        pos = self._pos[:self._n]
+        q = self._q[:self._n]
+        tot_pots = np.zeros(len(points))
+        if self._n == 0:
+            return tot_pots
+        # about three chunk x N float arrays are alive at the same time
+        chunk = max(1, int(max_mem // (3 * 8 * self._n)))
+        for start in range(0, len(points), chunk):
+            block = points[start:start + chunk]
+            dist2 = np.zeros((len(block), self._n))
+            for comp in range(3):
+                dist2 += (block[:, comp, None] - pos[None, :, comp])**2
+            if excl_rad is None:
+                inv_dist = 1 / np.sqrt(dist2)
+            else:
+                inv_dist = np.zeros_like(dist2)
+                far = dist2 >= excl_rad**2
+                inv_dist[far] = 1 / np.sqrt(dist2[far])
+            tot_pots[start:start + chunk] = np.dot(inv_dist, q)
+        return tot_pots
+
     def change_charges(self, charges):
         """
         Change all of the charges of the constituent atoms at once
@@ -789,25 +1537,23 @@ class Mol(object):
             order corresponding to self.atoms
 
         """
-        for i, atom in enumerate(self.atoms):
-            atom.q = charges[i]
+        self._own()
+        self._q[:self._n] = np.asarray(charges, dtype=float)[:self._n]
         return
 
     def charges(self):
         """Return an array of charges"""
-        l_char = []
-        for atom in self.atoms:
-            l_char.append(atom.q)
-        arr_char = np.array(l_char)
+        arr_char = self._q[:self._n].copy()
         return arr_char
 
     def raw_assign_charges(self, charges):
         """Assign the charges from an array-like to the atoms"""
-        for char,at in zip(charges,self.atoms):
-            at.q=char
+        n_char = min(len(charges), self._n)
+        self._own()
+        self._q[:n_char] = np.asarray(charges, dtype=float)[:n_char]
         return
 
-    def populate(self, reference_mol):
+    def populate(self, reference_mol, by_molecule=False):
         """
         Assign charges to the Mol by comparing to the connectivity of a
         reference
@@ -816,6 +1562,10 @@ class Mol(object):
         ----------
         reference_mol : Mol object
             Charged molecule or cell
+        by_molecule : bool
+            If True, match only one copy of each different molecule of the Mol
+            against the reference and copy its charges to the others. Faster
+            for large clusters
 
         """
         # This is a naughty in-function import to prevent a circular dependency.
@@ -823,5 +1573,92 @@ class Mol(object):
         # executable script which needs to read_file and in turn use mol.py
         # Some careful refactoring should fix this
         import fromage.scripts.assign_charges as ac
-        ac.assign_charges(reference_mol, self)
+        if by_molecule:
+            ac.assign_charges_by_molecule(reference_mol, self)
+        else:
+            ac.assign_charges(reference_mol, self)
         pass
+
+
+class LazySupercell(object):
+    """
+    Images of a Mol under lattice translations, made only when asked for
+
+    A LazySupercell has the length and indexing of the supercell Mol it stands
+    for, with the atoms of the first translation first and so on, but it only
+    stores the original Mol and the translations. Positions can be obtained
+    for any subset of atoms so that seeds can be selected from huge
+    supercells which are never built.
+
+    Attributes
+    ----------
+    mol : Mol object
+        The translated cell
+    trans : T x 3 numpy array of ints
+        Multiples of mol.vectors for each image
+    vectors : 3 x 3 numpy array
+        Lattice vectors of the supercell
+
+    """
+
+    def __init__(self, mol, trans, vectors=None):
+        self.mol = mol
+        self.trans = np.asarray(trans, dtype=int).reshape((-1, 3))
+        if vectors is None:
+            vectors = mol.vectors
+        self.vectors = np.array(vectors, dtype=float)
+
+    def __len__(self):
+        return len(self.trans) * len(self.mol)
+
+    def __repr__(self):
+        return "LazySupercell of " + str(len(self.trans)) + " images of " + \
+            str(len(self.mol)) + " atoms"
+
+    def _split(self, indices):
+        """Return the translation and atom of flat indices"""
+        indices = np.arange(len(self))[indices]
+        return np.divmod(indices, len(self.mol))
+
+    def get_pos(self, indices=slice(None)):
+        """
+        Return the positions of some atoms of the supercell
+
+        Parameters
+        ----------
+        indices : int, slice, array of ints or boolean mask
+            The atoms of the supercell. Default all
+        Returns
+        -------
+        pos : M x 3 numpy array
+            Cartesian coordinates
+
+        """
+        img, at = self._split(indices)
+        pos = self.mol._pos[:self.mol._n][at] + \
+            np.dot(self.trans[img], self.mol.vectors)
+        return pos
+
+    def take(self, indices):
+        """Return a Mol of some atoms of the supercell"""
+        img, at = self._split(indices)
+        img, at = np.atleast_1d(img), np.atleast_1d(at)
+        new_mol = self.mol.empty_mol()
+        new_mol._set_arrays(self.get_pos(indices).reshape((-1, 3)),
+                            self.mol._q[:self.mol._n][at],
+                            self.mol._elem[:self.mol._n][at])
+        new_mol.vectors = self.vectors
+        return new_mol
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.take([index])[0]
+        return self.take(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def materialise(self):
+        """Return the whole supercell as a Mol"""
+        return self.take(slice(None))
@@ -26,6 +26,78 @@ for atom in periodic_list:
             "vdw" : atom[5],
             "mass" : atom[6]}
 
+
+
+class Element(object):
+    """
+    Record of the properties of one element
+
+    There is exactly one Element per entry of periodic_list and every Atom of
+    that element references it instead of carrying its own copy of the data.
+
+    Attributes
+    ----------
+    index : int
+        Position of the element in periodic_list
+    symbol : str
+        Element symbol
+    at_num : int
+        Atomic number
+    valence_e : int
+        Number of valence electrons
+    cov : float
+        Covalent radius in Angstrom
+    vdw : float
+        Van der Waals radius in Angstrom
+    mass : float
+        Mass in Da
+
+    """
+    __slots__ = ("index", "symbol", "at_num", "valence_e", "cov", "vdw", "mass")
+
+    def __init__(self, index, symbol, at_num, valence_e, cov, vdw, mass):
+        self.index = index
+        self.symbol = symbol
+        self.at_num = at_num
+        self.valence_e = valence_e
+        self.cov = cov
+        self.vdw = vdw
+        self.mass = mass
+
+    def __repr__(self):
+        return "Element(" + self.symbol + ")"
+
+
+# The shared Element records, in the order of periodic_list
+elements = []
+# Lower case symbol -> Element record
+element_table = {}
+# Position of each element in periodic_list. Mol objects store their elements as
+# these integer indices instead of strings
+elem_index = {}
+
+for i, atom in enumerate(periodic_list):
+    elements.append(Element(i, *atom[1:]))
+    element_table[atom[0]] = elements[i]
+    elem_index[atom[0]] = i
+
+
+def element(symbol):
+    """
+    Return the shared Element record of an element symbol
+
+    Parameters
+    ----------
+    symbol : str
+        Element symbol, case insensitive
+    Returns
+    -------
+    record : Element object
+        The record shared by all atoms of that element
+
+    """
+    return element_table[symbol.lower()]
+
 bohrconv = 1.88973
 
 
@@ -0,0 +1,230 @@
+"""Defines the PeriodicCell object used for distances in periodic systems
+"""
+import numpy as np
+
+# all combinations of -1, 0 and 1 lattice translations
+neighbour_shifts = np.array([(i, j, k) for i in (-1, 0, 1)
+                             for j in (-1, 0, 1)
+                             for k in (-1, 0, 1)])
+
+
+def translation_grid(a_range, b_range, c_range):
+    """
+    Return the lattice translations of a triple loop as a T x 3 array
+
+    The translations come in the order of nested loops over a_range, then
+    b_range, then c_range, with c_range varying fastest.
+    """
+    grid = np.meshgrid(np.asarray(a_range, dtype=int), np.asarray(b_range, dtype=int),
+                       np.asarray(c_range, dtype=int), indexing='ij')
+    return np.array(grid).reshape((3, -1)).T
+
+
+def lattice_images(pos, vectors, trans):
+    """
+    Return the images of positions under several lattice translations
+
+    Parameters
+    ----------
+    pos : N x 3 array-like
+        Cartesian coordinates
+    vectors : 3 x 3 array-like
+        Lattice vectors as rows
+    trans : T x 3 array-like of ints
+        Multiples of the lattice vectors
+    Returns
+    -------
+    images : (T * N) x 3 numpy array
+        All N positions translated by the first translation, then all N by the
+        second and so on
+
+    """
+    pos = np.asarray(pos, dtype=float).reshape((-1, 3))
+    shifts = np.dot(np.asarray(trans).reshape((-1, 3)), vectors)
+    return (shifts[:, None, :] + pos[None, :, :]).reshape((-1, 3))
+
+
+def reduce_lattice(vectors):
+    """
+    Return a reduced basis of the lattice and the transformation to it
+
+    Each vector is repeatedly shortened by integer combinations of the others,
+    first by projecting onto each other vector and then by adding or
+    subtracting the other two, until none can be made shorter. In three
+    dimensions this gives a Minkowski reduced basis: the vectors are the
+    shortest possible and as close to orthogonal as the lattice allows.
+
+    Parameters
+    ----------
+    vectors : 3 x 3 array-like
+        Lattice vectors as rows
+    Returns
+    -------
+    reduced : 3 x 3 numpy array
+        Reduced lattice vectors as rows, sorted by length
+    transform : 3 x 3 numpy array of ints
+        Unimodular matrix such that reduced = transform.vectors
+
+    """
+    reduced = np.array(vectors, dtype=float)
+    transform = np.identity(3, dtype=int)
+    # the combinations of the two other vectors with coefficients -1, 0 and 1
+    combos = [neighbour_shifts[neighbour_shifts[:, i] == 0] for i in range(3)]
+    changed = True
+    while changed:
+        changed = False
+        order = np.argsort(np.einsum('ij,ij->i', reduced, reduced), kind='stable')
+        reduced = reduced[order]
+        transform = transform[order]
+        for i in range(3):
+            for j in range(3):
+                norm2 = np.dot(reduced[j], reduced[j])
+                if i == j or norm2 == 0:
+                    continue
+                mult = int(np.round(np.dot(reduced[i], reduced[j]) / norm2))
+                if mult != 0:
+                    reduced[i] -= mult * reduced[j]
+                    transform[i] -= mult * transform[j]
+                    changed = True
+            cands = reduced[i] + np.dot(combos[i], reduced)
+            lengths = np.einsum('ij,ij->i', cands, cands)
+            best = np.argmin(lengths)
+            # only accept a real improvement to avoid cycling between ties
+            if lengths[best] < np.dot(reduced[i], reduced[i]) * (1 - 1e-12):
+                reduced[i] = cands[best]
+                transform[i] += np.dot(combos[i][best], transform)
+                changed = True
+    return reduced, transform
+
+
+def as_cell(vectors):
+    """Return a PeriodicCell from lattice vectors or an existing PeriodicCell"""
+    if isinstance(vectors, PeriodicCell):
+        return vectors
+    return PeriodicCell(vectors)
+
+
+class PeriodicCell(object):
+    """
+    Object representing the lattice of a periodic system.
+
+    The lattice vectors and their inverse are computed once and then used for
+    whole arrays of positions at a time. Fractional coordinates f and Cartesian
+    coordinates r of N points are N x 3 arrays related by r = f.vectors.
+
+    Minimum images are searched for in a reduced basis of the same lattice.
+    The fractional difference is rounded to [-0.5, 0.5] in that basis and the
+    27 images around it are compared, which is enough to find the closest
+    image however skewed the original cell is. Image offsets are always
+    returned in terms of the original vectors.
+
+    Attributes
+    ----------
+    vectors : 3 x 3 numpy array
+        Lattice vectors as rows
+    inv : 3 x 3 numpy array
+        Inverse of vectors, such that f = r.inv
+    reduced : 3 x 3 numpy array
+        Reduced lattice vectors, see reduce_lattice()
+    transform : 3 x 3 numpy array of ints
+        Matrix such that reduced = transform.vectors
+
+    """
+
+    def __init__(self, vectors):
+        self.vectors = np.array(vectors, dtype=float)
+        self.inv = np.linalg.inv(self.vectors)
+        self.reduced, self.transform = reduce_lattice(self.vectors)
+        self._red_inv = np.linalg.inv(self.reduced)
+        # Cartesian translations of the neighbouring images in the reduced
+        # basis
+        self._shift_vecs = np.dot(neighbour_shifts, self.reduced)
+
+    def __repr__(self):
+        return "PeriodicCell(" + repr(self.vectors.tolist()) + ")"
+
+    def frac(self, pos):
+        """Return the fractional coordinates of an N x 3 array of positions"""
+        return np.dot(pos, self.inv)
+
+    def cart(self, frac_pos):
+        """Return the Cartesian coordinates of fractional coordinates"""
+        return np.dot(frac_pos, self.vectors)
+
+    def wrap(self, pos):
+        """Return the positions translated inside the cell"""
+        return self.cart(self.frac(pos) % 1)
+
+    def offset_vecs(self, offsets):
+        """Return the Cartesian translations of integer image offsets"""
+        return np.dot(offsets, self.vectors)
+
+    def _min_image_diff(self, diff):
+        """Return the shortest length and image offset of difference vectors"""
+        frac_diff = np.dot(diff, self._red_inv)
+        base = -np.round(frac_diff)
+        reduced = np.dot(frac_diff + base, self.reduced)
+        # every neighbouring image of the reduced difference
+        imgs = reduced[..., None, :] + self._shift_vecs
+        dist2 = np.einsum('...j,...j->...', imgs, imgs)
+        best = np.argmin(dist2, axis=-1)
+        dist = np.sqrt(np.take_along_axis(dist2, best[..., None], axis=-1)[..., 0])
+        red_offsets = (base + neighbour_shifts[best]).astype(int)
+        # back to multiples of the original vectors
+        offsets = np.dot(red_offsets, self.transform)
+        return dist, offsets
+
+    def min_image_pairs(self, pos_a, pos_b):
+        """
+        Return the minimum image distances between paired points
+
+        Parameters
+        ----------
+        pos_a, pos_b : N x 3 array-likes
+            The points pos_a[i] and pos_b[i] make a pair
+        Returns
+        -------
+        dist : N x 1 numpy array
+            The distance from pos_a[i] to the closest image of pos_b[i]
+        offsets : N x 3 numpy array of ints
+            The lattice translation of the closest image, which is at
+            pos_b[i] + offsets[i].vectors
+
+        """
+        diff = np.asarray(pos_b, dtype=float) - np.asarray(pos_a, dtype=float)
+        return self._min_image_diff(diff)
+
+    def min_image(self, pos_a, pos_b=None, max_mem=2**26):
+        """
+        Return all minimum image distances between two sets of points
+
+        Parameters
+        ----------
+        pos_a : N x 3 array-like
+            The first set of points
+        pos_b : M x 3 array-like or None
+            The second set of points. If None, pos_a
+        max_mem : int
+            Approximate memory cap in bytes for the temporary arrays
+        Returns
+        -------
+        dist : N x M numpy array
+            The distance from pos_a[i] to the closest image of pos_b[j]
+        offsets : N x M x 3 numpy array of ints
+            The lattice translation of the closest image, which is at
+            pos_b[j] + offsets[i, j].vectors
+
+        """
+        pos_a = np.asarray(pos_a, dtype=float).reshape((-1, 3))
+        if pos_b is None:
+            pos_b = pos_a
+        pos_b = np.asarray(pos_b, dtype=float).reshape((-1, 3))
+        dist = np.zeros((len(pos_a), len(pos_b)))
+        offsets = np.zeros((len(pos_a), len(pos_b), 3), dtype=int)
+        # the 27 images of each pair take up most of the memory
+        chunk = max(1, int(max_mem // (27 * 4 * 8 * max(len(pos_b), 1))))
+        for start in range(0, len(pos_a), chunk):
+            diff = pos_b[None, :, :] - pos_a[start:start + chunk, None, :]
+            dist[start:start + chunk], offsets[start:start + chunk] = \
+                self._min_image_diff(diff)
+        return dist, offsets
@@ -7,7 +7,7 @@ import sys
 import fromage.io.edit_file as ef
 import fromage.io.read_file as rf
 
-from fromage.scripts.assign_charges import assign_charges
+from fromage.scripts.assign_charges import assign_charges, gauss_charge_table, apply_charge_table
 
 class RunSeq(object):
     """
@@ -67,8 +67,8 @@ class RunSeq(object):
         if self.inputs["target_shell"]:
             shell_high = rf.mol_from_file(self.inputs["target_shell"])
             self.write_out("Outer region read in with " + str(len(shell_high)) + " atoms.\n")
-            high_level_pop_mol = rf.mol_from_gauss(self.inputs["high_pop_file"], pop=self.inputs["high_pop_method"])
-            shell_high.populate(high_level_pop_mol)
+            high_fps, high_rounds, _ = gauss_charge_table(self.inputs["high_pop_file"], pop=self.inputs["high_pop_method"])
+            apply_charge_table(shell_high, high_fps, high_rounds, by_molecule=True)
         else:
             shell_high = self.cell.make_cluster(self.inputs["clust_rad"], central_mol = self.region_1, mode = self.inputs["clust_mode"])
             for atom_i in self.region_1:
@@ -77,9 +77,9 @@ class RunSeq(object):
                         shell_high.remove(atom_j)
                         break
             self.write_out("Outer region generated with " + str(len(shell_high)) + " atoms.\n")
-        low_level_pop_mol = rf.mol_from_gauss(self.inputs["low_pop_file"], pop=self.inputs["low_pop_method"])
+        low_fps, low_rounds, _ = gauss_charge_table(self.inputs["low_pop_file"], pop=self.inputs["low_pop_method"])
         shell_low = shell_high.copy()
-        shell_low.populate(low_level_pop_mol)
+        apply_charge_table(shell_low, low_fps, low_rounds, by_molecule=True)
         return shell_low, shell_high
 
     def run_ewald(self, calc_name=None):
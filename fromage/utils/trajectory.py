@@ -0,0 +1,139 @@
+"""Defines the Trajectory object which holds several configurations of a Mol
+"""
+import numpy as np
+
+from fromage.utils.mol import Mol
+from fromage.utils.atom import take_uids
+from fromage.utils import per_table as per
+
+
+class Trajectory(object):
+    """
+    Object representing several configurations of the same atoms.
+
+    The coordinates of all configurations (frames) are stored in one F x N x 3
+    array while the elements, charges and atom identities are stored once and
+    shared by every frame. Indexing a Trajectory with an int returns a Mol
+    which is a view on that frame, so no Atom objects are made until they are
+    asked for. As with any other Mol copy, the Mol only copies the arrays if it
+    is modified, which leaves the Trajectory untouched. Indexing with a slice
+    returns a Trajectory which shares the frames of this one.
+
+    Attributes
+    ----------
+    frames : F x N x 3 numpy array
+        Cartesian coordinates of every atom in every frame
+    vectors : 3 x 3 numpy array
+        Lattice vectors of the unit cell
+    bonding : string 'dist, 'cov' or 'vdw'
+        The method for detecting bonding in the Mol of each frame. See Mol
+    thresh : float
+        Threshold for the bonding detection
+
+    """
+
+    def __init__(self, frames, elems, charges=None, vectors=np.zeros((3, 3)), bonding='dis', thresh=1.8):
+        self.frames = np.asarray(frames, dtype=float)
+        if self.frames.ndim != 3:
+            self.frames = self.frames.reshape((len(self.frames), -1, 3))
+        n_at = self.frames.shape[1]
+        if isinstance(elems, str):
+            self._elem = np.full(n_at, per.elem_index[elems.lower()], dtype=int)
+        else:
+            self._elem = np.array([per.elem_index[i.lower()] for i in elems],
+                                  dtype=int)
+        if len(self._elem) != n_at:
+            raise ValueError("The frames have " + str(n_at) +
+                             " atoms but there are " + str(len(self._elem)) +
+                             " elements")
+        if charges is None:
+            self._q = np.zeros(n_at)
+        else:
+            self._q = np.array(charges, dtype=float)
+        self._kind = np.empty(n_at, dtype=object)
+        # the atoms are the same in every frame
+        start = take_uids(n_at)
+        self._ids = np.arange(start, start + n_at, dtype=np.int64)
+        self.vectors = vectors
+        self.bonding = bonding
+        self.thresh = thresh
+
+    def __repr__(self):
+        return "Trajectory of " + str(len(self)) + " frames of " + \
+            str(self.n_atoms) + " atoms"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def n_atoms(self):
+        return self.frames.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._share(index)
+        return self.frame_mol(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.frame_mol(i)
+
+    def _share(self, index):
+        """Return a Trajectory of some frames sharing the arrays of this one"""
+        new_traj = Trajectory.__new__(Trajectory)
+        new_traj.frames = self.frames[index]
+        new_traj._elem = self._elem
+        new_traj._q = self._q
+        new_traj._kind = self._kind
+        new_traj._ids = self._ids
+        new_traj.vectors = self.vectors
+        new_traj.bonding = self.bonding
+        new_traj.thresh = self.thresh
+        return new_traj
+
+    def frame_mol(self, index):
+        """
+        Return a Mol which is a view on one frame
+
+        Parameters
+        ----------
+        index : int
+            The number of the frame
+        Returns
+        -------
+        mol : Mol object
+            The atoms of the frame. The Mol shares its arrays with the
+            Trajectory until it is modified
+
+        """
+        pos = self.frames[index]
+        mol = Mol([], vectors=self.vectors.copy(), bonding=self.bonding,
+                  thresh=self.thresh)
+        mol._pos = pos
+        mol._q = self._q
+        mol._elem = self._elem
+        mol._kind = self._kind
+        mol._ids = self._ids
+        mol._n = len(pos)
+        mol._shared = True
+        return mol
+
+    def charges(self):
+        """Return an array of the charges shared by every frame"""
+        return self._q.copy()
+
+    def change_charges(self, charges):
+        """
+        Change the charges of the atoms in every frame at once
+
+        Parameters
+        ----------
+        charges : array-like of floats
+            The new charges in the order of the atoms
+
+        """
+        self._q = np.array(charges, dtype=float)
+        return
@@ -1,9 +1,17 @@
 import numpy as np
 
 import fromage.io.edit_file as ef
+from fromage.fdist import fdist as fd
 from copy import deepcopy
 
 
+def _pos_vdw(atoms):
+    """Return the N x 3 array of positions and the vdw radii of some atoms"""
+    pos = np.array([atom.get_pos() for atom in atoms]).reshape((-1, 3))
+    vdw = np.array([atom.vdw for atom in atoms])
+    return pos, vdw
+
+
 class CubeGrid(object):
     """
     A grid of voxels with attached values for each one
@@ -113,42 +121,32 @@ class CubeGrid(object):
             The central molecule which we want to enclose in the grid
         rest: list of Atom objects
             The rest of the atoms
+        scaled : bool
+            If True, the squared distance to each atom is multiplied by the
+            square of its vdw radius
 
         """
-        for point in self.grid:
-            close_to_mol = False
-            min_dist2 = float("inf")
-            for atom_i in mol:
-                r = atom_i.c_dist2(*point[:3])
-                if scaled:
-                    r *= atom_i.vdw**2
-                if r < min_dist2:
-                    min_dist2 = r
-                    close_to_mol = True
-            for atom_j in rest:
-                r = atom_j.c_dist2(*point[:3])
-                if scaled:
-                    r *= atom_i.vdw**2
-                if r < min_dist2:
-                    min_dist2 = r
-                    close_to_mol = False
-            if close_to_mol:
-                point[3] = 1
-            else:
-                point[3] = 0
-
+        mol_pos, mol_vdw = _pos_vdw(mol)
+        rest_pos, rest_vdw = _pos_vdw(rest)
+        if scaled:
+            mol_weights, rest_weights = mol_vdw**2, rest_vdw**2
+        else:
+            mol_weights, rest_weights = None, None
+
+        # the compiled kernel runs on OpenMP threads and fills the grid in place
+        self.grid = np.ascontiguousarray(self.grid, dtype=float)
+        fd.grid_proximity(self.grid, mol_pos, rest_pos, mol_weights,
+                          rest_weights)
         return
 
     def vdw_vol(self, mol):
         """Give each point in the grid a value of 1 if it is inside the vdw radius of one of the atoms in the molecule"""
 
-        for point in self.grid:
-            # empty grid first
-            point[3] = 0
-            for atom in mol:
-                if atom.c_dist2(*point[:3]) < atom.vdw**2:
-                    point[3] = 1
-                    break
+        pos, vdw = _pos_vdw(mol)
+
+        # the compiled kernel runs on OpenMP threads and fills the grid in place
+        self.grid = np.ascontiguousarray(self.grid, dtype=float)
+        fd.grid_vdw(self.grid, pos, vdw)
         return
 
     def subtract_grid(self, in_grid):
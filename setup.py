@@ -1,8 +1,18 @@
 #!/usr/bin/env python
 
+import os
 from distutils.core import setup, Extension
 
-fdist_module = Extension('fromage.fdist._fdist', sources=['fromage/fdist/fdist_wrap.cxx', 'fromage/fdist/fdist.cpp'],)
+# The grid kernels of fdist are threaded with OpenMP. Set FROMAGE_NO_OPENMP to
+# build without it, e.g. with compilers that do not understand -fopenmp
+if os.environ.get('FROMAGE_NO_OPENMP'):
+    openmp_args = []
+else:
+    openmp_args = ['-fopenmp']
+
+fdist_module = Extension('fromage.fdist._fdist', sources=['fromage/fdist/fdist_wrap.cxx', 'fromage/fdist/fdist.cpp'],
+                         extra_compile_args=openmp_args,
+                         extra_link_args=openmp_args,)
 
 setup(name='fromage',
       version='1.0',